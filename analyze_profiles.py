@@ -7,18 +7,11 @@ from collections import defaultdict
 from mapreduce_framework import MapReduceFramework
 from demographic_analysis import DemographicMapper, DemographicReducer
 from correlation_analysis import CorrelationMapper, CorrelationReducer
-from clustering import ClusteringMapper, ClusteringReducer
+from clustering import DistributedKMeans
+from parquet_input import parquet_splits
 
-def load_data(file_path: str) -> pd.DataFrame:
-    """Load the profile data from parquet file."""
-    return pd.read_parquet(file_path)
-
-def run_demographic_analysis(data: pd.DataFrame) -> Dict:
-    """Run demographic analysis using MapReduce."""
-    framework = MapReduceFramework()
-    results = framework.run(DemographicMapper, DemographicReducer, data)
-    
-    # Visualize results
+def plot_demographic_results(results: Dict):
+    """Visualize demographic analysis results."""
     plt.figure(figsize=(15, 5))
     
     # Age distribution
@@ -44,14 +37,9 @@ def run_demographic_analysis(data: pd.DataFrame) -> Dict:
     
     plt.tight_layout()
     plt.savefig('demographic_analysis.png')
-    return results
 
-def run_correlation_analysis(data: pd.DataFrame) -> Dict:
-    """Run correlation analysis using MapReduce."""
-    framework = MapReduceFramework()
-    results = framework.run(CorrelationMapper, CorrelationReducer, data)
-    
-    # Visualize correlations
+def plot_correlation_results(results: Dict):
+    """Visualize correlation analysis results."""
     plt.figure(figsize=(10, 6))
     
     # Numerical correlations
@@ -63,15 +51,9 @@ def run_correlation_analysis(data: pd.DataFrame) -> Dict:
     
     plt.tight_layout()
     plt.savefig('correlation_analysis.png')
-    return results
 
-def run_clustering_analysis(data: pd.DataFrame, n_clusters: int = 5) -> Dict:
-    """Run clustering analysis using MapReduce."""
-    framework = MapReduceFramework()
-    mapper = ClusteringMapper(n_clusters=n_clusters)
-    results = framework.run(mapper, ClusteringReducer, data)
-    
-    # Visualize clusters
+def plot_clustering_results(results: Dict):
+    """Visualize clustering analysis results."""
     plt.figure(figsize=(10, 6))
     
     # Plot cluster statistics
@@ -90,20 +72,33 @@ def run_clustering_analysis(data: pd.DataFrame, n_clusters: int = 5) -> Dict:
     
     plt.tight_layout()
     plt.savefig('clustering_analysis.png')
-    return results
 
 def main():
-    # Load data
-    data = load_data('profiles.parquet')
-    
-    # Run analyses
-    demographic_results = run_demographic_analysis(data)
-    correlation_results = run_correlation_analysis(data)
-    clustering_results = run_clustering_analysis(data)
+    # Demographics, correlations and the k-means stats pass share one scan;
+    # the k-means iterations then reuse the same warm session
+    kmeans = DistributedKMeans(n_clusters=5)
+    jobs = [
+        (DemographicMapper(), DemographicReducer),
+        (CorrelationMapper(), CorrelationReducer),
+        kmeans.stats_job()
+    ]
+
+    # Workers read their own row groups, projected to the columns the jobs
+    # declare and with the derived features attached, and keep them in
+    # shared memory, so no pass re-reads the file and the parent never
+    # holds the table
+    splits = parquet_splits('profiles.parquet', [mapper for mapper, _ in jobs])
+
+    with MapReduceFramework().session(splits, cache_splits=True) as session:
+        demographic_results, correlation_results, feature_stats = session.run_fused(jobs)
+        clustering_results = kmeans.fit(session, feature_stats)
+    plot_demographic_results(demographic_results)
+    plot_correlation_results(correlation_results)
+    plot_clustering_results(clustering_results)
     
     # Print summary results
     print("\nDemographic Analysis Results:")
-    print(f"Total profiles: {len(data)}")
+    print(f"Total profiles: {feature_stats['rows']}")
     print(f"Age statistics: {demographic_results['age_stats']}")
     print(f"Gender distribution: {demographic_results['gender_counts']}")
     
@@ -1,76 +1,329 @@
 import pandas as pd
 import numpy as np
 from collections import defaultdict
-from mapreduce_framework import Mapper, Reducer, MapReduceFramework
-from typing import Dict, List, Any
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import MiniBatchKMeans
+from mapreduce_framework import Mapper, Reducer, MapReduceFramework, MapReduceSession
+from streaming_stats import RunningMoments
+from typing import Dict, List, Any, Optional
+from sklearn.cluster import KMeans
+
+# Features clustered on, in column order of the feature matrix
+FEATURES = ('age', 'completion_rate')
+
+class FeatureScaler:
+    """Global standardization built from a stats pass over the whole input.
+
+    Missing ages are filled with the global mean age, so the spread of the
+    filled column is the non-null sum of squares over every row.
+    """
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray):
+        self.mean = np.asarray(mean, dtype=float)
+        self.scale = np.asarray(scale, dtype=float)
+
+    @classmethod
+    def from_stats(cls, stats: Dict) -> 'FeatureScaler':
+        moments = stats['feature_moments']
+        n_rows = stats['rows']
+        mean = [moments[name].mean for name in FEATURES]
+        scale = [np.sqrt(moments[name].m2 / n_rows) if n_rows else 0.0 for name in FEATURES]
+        # Constant features are left unscaled, as StandardScaler does
+        return cls(mean, [s if s > 0 else 1.0 for s in scale])
+
+    def fill(self, raw: np.ndarray) -> np.ndarray:
+        return np.where(np.isnan(raw), self.mean, raw)
+
+    def transform(self, raw: np.ndarray) -> np.ndarray:
+        return (self.fill(raw) - self.mean) / self.scale
+
+    def inverse_transform(self, scaled: np.ndarray) -> np.ndarray:
+        return scaled * self.scale + self.mean
+
+def raw_features(chunk: pd.DataFrame) -> np.ndarray:
+    """(rows x features) matrix of the clustering features, NaN where missing."""
+    return np.column_stack([chunk[name].to_numpy(dtype=float) for name in FEATURES])
+
+def row_keys(index: pd.Index) -> np.ndarray:
+    """uint64 key of each row label: integer labels as they are, others hashed."""
+    if pd.api.types.is_integer_dtype(index.dtype):
+        return np.asarray(index, dtype=np.uint64)
+    return pd.util.hash_pandas_object(index).to_numpy()
+
+def row_uniforms(index: pd.Index, seed: int) -> np.ndarray:
+    """Uniform [0, 1) draws keyed by row label (splitmix64).
+
+    Sampling decisions depend only on the row and the seed, never on
+    which chunk or worker the row landed in.
+    """
+    with np.errstate(over='ignore'):
+        z = row_keys(index) + np.uint64(seed) * np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)).astype(float) / float(1 << 53)
+
+def squared_distances(X: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    """(rows x centers) squared Euclidean distances."""
+    return ((X[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+
+class FeatureStatsMapper(Mapper):
+    """Stats pass: global feature moments plus a seeded first k-means center."""
+    derived_columns = FEATURES
+    columns = ()
+
+    def __init__(self, seed: int = 42):
+        self.seed = seed
+
+    def map(self, chunk: pd.DataFrame) -> Dict[str, List]:
+        results = defaultdict(list)
+        raw = raw_features(chunk)
+        for i, name in enumerate(FEATURES):
+            moments = RunningMoments()
+            moments.update_many(raw[~np.isnan(raw[:, i]), i])
+            results['feature_moments'].append((name, moments))
+        results['rows'].append(len(chunk))
+        if len(chunk):
+            u = row_uniforms(chunk.index, self.seed)
+            first = int(np.argmin(u))
+            results['first_center'].append((u[first], raw[first]))
+        return results
+
+    def combine(self, key: str, values: List) -> List:
+        if key == 'feature_moments':
+            merged = {}
+            for name, moments in values:
+                merged.setdefault(name, RunningMoments()).merge(moments)
+            return list(merged.items())
+        if key == 'rows':
+            return [sum(values)]
+        if key == 'first_center':
+            return [min(values, key=lambda pair: pair[0])]
+        return values
+
+class FeatureStatsReducer(Reducer):
+    def reduce(self, key: str, values: List) -> Any:
+        if key == 'feature_moments':
+            merged = {}
+            for name, moments in values:
+                merged.setdefault(name, RunningMoments()).merge(moments)
+            return merged
+        if key == 'rows':
+            return sum(values)
+        if key == 'first_center':
+            return min(values, key=lambda pair: pair[0])[1]
+        return None
+
+class KMeansCostMapper(Mapper):
+    """k-means|| pass: total squared distance to the current candidate set."""
+    derived_columns = FEATURES
+    columns = ()
+
+    def __init__(self, scaler: FeatureScaler, centers: np.ndarray):
+        self.scaler = scaler
+        self.centers = centers
+
+    def map(self, chunk: pd.DataFrame) -> Dict[str, List]:
+        X = self.scaler.transform(raw_features(chunk))
+        return {'cost': [float(squared_distances(X, self.centers).min(axis=1).sum())]}
+
+    def combine(self, key: str, values: List) -> List:
+        return [sum(values)]
+
+class KMeansSampleMapper(Mapper):
+    """k-means|| pass: keep each row with probability l * d^2 / cost."""
+    derived_columns = FEATURES
+    columns = ()
+
+    def __init__(self, scaler: FeatureScaler, centers: np.ndarray, cost: float,
+                 oversampling: float, seed: int):
+        self.scaler = scaler
+        self.centers = centers
+        self.cost = cost
+        self.oversampling = oversampling
+        self.seed = seed
+
+    def map(self, chunk: pd.DataFrame) -> Dict[str, List]:
+        X = self.scaler.transform(raw_features(chunk))
+        d2 = squared_distances(X, self.centers).min(axis=1)
+        keep = row_uniforms(chunk.index, self.seed) < self.oversampling * d2 / self.cost
+        keys = row_keys(chunk.index[keep]).tolist()
+        return {'candidates': [(key, X[i]) for i, key in zip(np.flatnonzero(keep), keys)]}
+
+class KMeansWeightMapper(Mapper):
+    """k-means|| pass: how many rows each candidate center is nearest to."""
+    derived_columns = FEATURES
+    columns = ()
+
+    def __init__(self, scaler: FeatureScaler, centers: np.ndarray):
+        self.scaler = scaler
+        self.centers = centers
+
+    def map(self, chunk: pd.DataFrame) -> Dict[str, List]:
+        X = self.scaler.transform(raw_features(chunk))
+        nearest = squared_distances(X, self.centers).argmin(axis=1)
+        return {'weights': [np.bincount(nearest, minlength=len(self.centers))]}
+
+    def combine(self, key: str, values: List) -> List:
+        return [np.sum(values, axis=0)]
+
+class CollectReducer(Reducer):
+    """Sums scalar/array partials and concatenates everything else."""
+
+    def reduce(self, key: str, values: List) -> Any:
+        if key in ('cost', 'weights'):
+            return np.sum(values, axis=0)
+        return values
 
 class ClusteringMapper(Mapper):
-    def __init__(self, n_clusters=5):
-        self.n_clusters = n_clusters
-        self.kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=42)
-        self.scaler = StandardScaler()
-    
+    """Lloyd step: assign rows to the broadcast centroids and emit partial sums."""
+    derived_columns = FEATURES
+    columns = ()
+
+    def __init__(self, scaler: FeatureScaler, centroids: np.ndarray):
+        self.scaler = scaler
+        self.centroids = np.asarray(centroids, dtype=float)
+        self.n_clusters = len(self.centroids)
+
     def map(self, chunk: pd.DataFrame) -> Dict[str, List]:
         results = defaultdict(list)
-        
-        # Extract age and calculate completion rate
-        age_data = chunk.iloc[:, 2].fillna(chunk.iloc[:, 2].mean())
-        completion_rates = chunk.apply(lambda row: (row.notna().sum() / len(row)) * 100, axis=1)
-        
-        # Scale features
-        X = self.scaler.fit_transform(np.column_stack([age_data, completion_rates]))
-        
-        # Perform clustering
-        cluster_labels = self.kmeans.fit_predict(X)
-        
-        # Collect statistics for each cluster
-        for cluster_id in range(self.n_clusters):
+
+        raw = self.scaler.fill(raw_features(chunk))
+        X = self.scaler.transform(raw)
+        d2 = squared_distances(X, self.centroids)
+        cluster_labels = d2.argmin(axis=1)
+        results['inertia'].append(float(d2.min(axis=1).sum()))
+
+        # Collect partial sums and statistics for each cluster
+        for cluster_id in np.unique(cluster_labels):
             mask = cluster_labels == cluster_id
-            cluster_data = {
-                'age_mean': age_data[mask].mean(),
-                'age_std': age_data[mask].std(),
-                'completion_mean': completion_rates[mask].mean(),
-                'completion_std': completion_rates[mask].std(),
-                'size': mask.sum()
-            }
-            results['cluster_stats'].append((cluster_id, cluster_data))
-        
+            results['centroid_sums'].append((int(cluster_id), (X[mask].sum(axis=0), int(mask.sum()))))
+            cluster_data = {}
+            for i, name in enumerate(FEATURES):
+                cluster_data[name] = RunningMoments()
+                cluster_data[name].update_many(raw[mask, i])
+            results['cluster_stats'].append((int(cluster_id), cluster_data))
+
         return results
 
+    def combine(self, key: str, values: List) -> List:
+        if key == 'inertia':
+            return [sum(values)]
+        if key == 'centroid_sums':
+            sums = {}
+            for cluster_id, (total, count) in values:
+                if cluster_id in sums:
+                    sums[cluster_id] = (sums[cluster_id][0] + total, sums[cluster_id][1] + count)
+                else:
+                    sums[cluster_id] = (total, count)
+            return list(sums.items())
+        if key == 'cluster_stats':
+            return list(_merge_cluster_stats(values).items())
+        return values
+
 class ClusteringReducer(Reducer):
-    def reduce(self, key: str, values: List) -> Dict:
+    def reduce(self, key: str, values: List) -> Any:
+        if key == 'inertia':
+            return sum(values)
+
+        if key == 'centroid_sums':
+            # New centroid = mean of the rows assigned to it
+            sums = {}
+            for cluster_id, (total, count) in values:
+                prev_total, prev_count = sums.get(cluster_id, (0.0, 0))
+                sums[cluster_id] = (prev_total + total, prev_count + count)
+            return {cluster_id: total / count for cluster_id, (total, count) in sorted(sums.items())}
+
         if key == 'cluster_stats':
-            # Combine cluster statistics
-            cluster_stats = defaultdict(lambda: {
-                'age_sum': 0,
-                'age_sq_sum': 0,
-                'completion_sum': 0,
-                'completion_sq_sum': 0,
-                'count': 0
-            })
-            
-            # Aggregate statistics
-            for cluster_id, stats in values:
-                cluster_stats[cluster_id]['age_sum'] += stats['age_mean'] * stats['size']
-                cluster_stats[cluster_id]['age_sq_sum'] += (stats['age_std']**2 + stats['age_mean']**2) * stats['size']
-                cluster_stats[cluster_id]['completion_sum'] += stats['completion_mean'] * stats['size']
-                cluster_stats[cluster_id]['completion_sq_sum'] += (stats['completion_std']**2 + stats['completion_mean']**2) * stats['size']
-                cluster_stats[cluster_id]['count'] += stats['size']
-            
-            # Calculate final statistics
             final_stats = {}
-            for cluster_id, stats in cluster_stats.items():
-                n = stats['count']
+            for cluster_id, stats in sorted(_merge_cluster_stats(values).items()):
                 final_stats[cluster_id] = {
-                    'age_mean': stats['age_sum'] / n,
-                    'age_std': np.sqrt(stats['age_sq_sum']/n - (stats['age_sum']/n)**2),
-                    'completion_mean': stats['completion_sum'] / n,
-                    'completion_std': np.sqrt(stats['completion_sq_sum']/n - (stats['completion_sum']/n)**2),
-                    'size': n
+                    'age_mean': stats['age'].mean,
+                    'age_std': stats['age'].std,
+                    'completion_mean': stats['completion_rate'].mean,
+                    'completion_std': stats['completion_rate'].std,
+                    'size': stats['age'].count
                 }
-            
             return final_stats
-        
+
         return {}
+
+def _merge_cluster_stats(values: List) -> Dict[int, Dict[str, RunningMoments]]:
+    merged = {}
+    for cluster_id, stats in values:
+        if cluster_id not in merged:
+            merged[cluster_id] = {name: RunningMoments() for name in FEATURES}
+        for name in FEATURES:
+            merged[cluster_id][name].merge(stats[name])
+    return merged
+
+class DistributedKMeans:
+    """Iterative k-means over a MapReduceSession.
+
+    One stats pass builds a global scaler, k-means|| (Bahmani et al., 2012)
+    oversamples candidate centers in a few passes and a weighted k-means++
+    on the driver picks the initial centroids. Each Lloyd iteration then
+    broadcasts the centroids with the mapper and reduces per-cluster sums
+    and counts, until no centroid moves more than ``tol`` (in scaled units).
+    Row sampling is keyed by row label, so the result does not depend on
+    how the input is partitioned.
+    """
+
+    def __init__(self, n_clusters: int = 5, max_iter: int = 50, tol: float = 1e-4,
+                 oversampling: Optional[float] = None, rounds: int = 5, seed: int = 42):
+        if max_iter < 1:
+            raise ValueError(f"max_iter must be at least 1, got {max_iter}")
+        self.n_clusters = n_clusters
+        self.max_iter = max_iter
+        self.tol = tol
+        self.oversampling = oversampling or 2 * n_clusters
+        self.rounds = rounds
+        self.seed = seed
+
+    def stats_job(self):
+        """Mapper/reducer pair for the stats pass, e.g. to fuse with other jobs."""
+        return FeatureStatsMapper(self.seed), FeatureStatsReducer
+
+    def fit(self, session: MapReduceSession, feature_stats: Optional[Dict] = None) -> Dict:
+        if feature_stats is None:
+            feature_stats = session.run(*self.stats_job())
+        scaler = FeatureScaler.from_stats(feature_stats)
+        centroids = self._init_centroids(session, scaler, feature_stats['first_center'])
+
+        for n_iter in range(1, self.max_iter + 1):
+            results = session.run(ClusteringMapper(scaler, centroids), ClusteringReducer)
+            # Sizes, stats and inertia describe the assignment to these centroids
+            assigned = centroids
+            updated = centroids.copy()
+            for cluster_id, centroid in results['centroid_sums'].items():
+                updated[cluster_id] = centroid
+            shift = np.sqrt(((updated - centroids) ** 2).sum(axis=1)).max()
+            centroids = updated
+            if shift <= self.tol:
+                break
+
+        results['centroids'] = dict(enumerate(scaler.inverse_transform(assigned)))
+        results['n_iter'] = n_iter
+        return results
+
+    def _init_centroids(self, session: MapReduceSession, scaler: FeatureScaler,
+                        first_center: np.ndarray) -> np.ndarray:
+        """k-means|| seeding followed by a weighted k-means++ on the candidates."""
+        centers = scaler.transform(np.atleast_2d(first_center))
+        for round_ in range(self.rounds):
+            cost = session.run(KMeansCostMapper(scaler, centers), CollectReducer)['cost']
+            if cost <= 0:
+                break
+            sampler = KMeansSampleMapper(scaler, centers, cost, self.oversampling,
+                                         self.seed + round_ + 1)
+            sampled = session.run(sampler, CollectReducer).get('candidates', [])
+            if sampled:
+                # Order by row key so the candidate set is partition-independent
+                sampled.sort(key=lambda pair: pair[0])
+                centers = np.vstack([centers] + [point for _, point in sampled])
+
+        centers = np.unique(centers, axis=0)
+        if len(centers) <= self.n_clusters:
+            return centers
+        weights = session.run(KMeansWeightMapper(scaler, centers), CollectReducer)['weights']
+        local = KMeans(n_clusters=self.n_clusters, n_init=1, random_state=self.seed)
+        local.fit(centers, sample_weight=weights)
+        return local.cluster_centers_
@@ -4,62 +4,33 @@ Calculate days_since_registration from registration and last_login dates.
 Final version with correct column indices and datetime parsing.
 """
 
+import sys
 import pandas as pd
 import numpy as np
-from datetime import datetime
 from pathlib import Path
 
-def parse_date(date_str):
-    """Parse date string to datetime object"""
-    try:
-        if pd.isna(date_str) or date_str == 'null':
-            return None
-        # Parse datetime string
-        return datetime.strptime(str(date_str), '%Y-%m-%d %H:%M:%S.%f')
-    except Exception:
-        try:
-            # Try without milliseconds
-            return datetime.strptime(str(date_str), '%Y-%m-%d %H:%M:%S')
-        except Exception:
-            return None
+# Shared helpers live in the project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from pokec_cache import load_profiles
+from pokec_dates import duration_categories
 
-def calculate_days_between(row):
-    """Calculate days between registration and last login"""
-    try:
-        reg_date = parse_date(row['registration'])
-        login_date = parse_date(row['last_login'])
-        
-        if reg_date is None or login_date is None:
-            return np.nan
-            
-        # Calculate difference in days
-        days = (login_date - reg_date).days
-        
-        # Validate the difference makes sense
-        if days < 0:
-            return np.nan  # Invalid if registration is after last login
-        return days
-        
-    except Exception as e:
-        print(f"Error calculating days: {e}")
-        return np.nan
+# Labels of the duration categories (see pokec_dates.DURATION_BOUNDS)
+DURATION_LABELS = np.array(['1 month', '3 months', '6 months', '1 year', '2 years', '2+ years'],
+                           dtype=object)
 
-def get_duration_category(days):
-    """Get duration category for given days"""
-    if pd.isna(days):
-        return 'Invalid/Missing'
-    elif days <= 30:
-        return '1 month'
-    elif days <= 90:
-        return '3 months'
-    elif days <= 180:
-        return '6 months'
-    elif days <= 365:
-        return '1 year'
-    elif days <= 730:
-        return '2 years'
-    else:
-        return '2+ years'
+def calculate_days_between(df):
+    """Whole days between registration and last login of every row"""
+    # The cache holds both as parsed timestamps (NaT where missing or invalid)
+    days = (df['last_login'] - df['registration']).dt.days
+    
+    # Invalid if registration is after last login
+    return days.where(days >= 0)
+
+def get_duration_categories(days):
+    """Duration category of every day count ('Invalid/Missing' for NaN)"""
+    labels = DURATION_LABELS[duration_categories(days.fillna(0).to_numpy())]
+    labels[days.isna().to_numpy()] = 'Invalid/Missing'
+    return pd.Series(labels, index=days.index)
 
 def main():
     print("Loading data...")
@@ -68,26 +39,19 @@ def main():
     Path("data").mkdir(exist_ok=True)
     Path("reports").mkdir(exist_ok=True)
     
-    # Read only required columns (5=last_login, 6=registration)
-    df = pd.read_csv('data/soc-pokec-profiles.txt', 
-                     sep='\t',
-                     names=range(60),
-                     usecols=[5, 6],
-                     nrows=10000)
-    
-    # Rename columns
-    df.columns = ['last_login', 'registration']
+    # Read only required columns from the Parquet cache of the TSV
+    df = load_profiles(['last_login', 'registration'], nrows=10000)
     
     print("\nSample of raw data:")
     print(df.head().to_string())
     
     print("\nCalculating days since registration...")
     
-    # Calculate days between registration and last login
-    df['days_since_registration'] = df.apply(calculate_days_between, axis=1)
+    # Calculate days between registration and last login (vectorized)
+    df['days_since_registration'] = calculate_days_between(df)
     
     # Add duration category
-    df['duration_category'] = df['days_since_registration'].apply(get_duration_category)
+    df['duration_category'] = get_duration_categories(df['days_since_registration'])
     
     # Generate statistics
     valid_days = df['days_since_registration'].dropna()
@@ -3,6 +3,7 @@
 Classification analysis using Random Forest and Gradient Boosting
 """
 
+import sys
 import pandas as pd
 import numpy as np
 from pathlib import Path
@@ -14,6 +15,11 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
 
+# Shared helpers live in the project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from pokec_cache import load_profiles
+from pokec_schema import TSV_COLUMNS
+
 class PokecClassifier:
     def __init__(self):
         self.label_encoders = {}
@@ -32,13 +38,7 @@ class PokecClassifier:
         
     def load_data(self, file_path, nrows=10000):
         """Load and prepare the dataset"""
-        # Read data
-        df = pd.read_csv(file_path, 
-                        sep='\t',
-                        names=range(60),
-                        nrows=nrows)
-        
-        # Select relevant features
+        # Select relevant features (by TSV position)
         features = {
             3: 'public',          # Target variable
             7: 'age',            
@@ -52,8 +52,10 @@ class PokecClassifier:
             15: 'sports'
         }
         
+        # Read just those columns from the Parquet cache of the TSV
+        df = load_profiles([TSV_COLUMNS[i] for i in features], nrows=nrows, tsv_path=file_path)
+        
         # Rename columns
-        df = df[features.keys()]
         df.columns = features.values()
         
         return df
@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import sys
 import pandas as pd
 import numpy as np
 from sklearn.cluster import KMeans
@@ -7,6 +8,10 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 
+# Shared helpers live in the project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from pokec_cache import load_profiles
+
 # Create directories for outputs
 Path("reports/figures").mkdir(parents=True, exist_ok=True)
 
@@ -14,11 +19,8 @@ def load_data():
     """Load and preprocess the data"""
     print("Loading data...")
     
-    # Read relevant columns
-    df = pd.read_csv('data/soc-pokec-profiles.txt', 
-                     sep='\t',
-                     usecols=[0, 2, 7],  # user_id, completion_percentage, age
-                     names=['user_id', 'completion_percentage', 'AGE'])
+    # Read relevant columns from the Parquet cache of the TSV
+    df = load_profiles(['user_id', 'completion_percentage', 'AGE'])
     
     # Clean and preprocess data
     df['completion_percentage'] = pd.to_numeric(df['completion_percentage'], errors='coerce')
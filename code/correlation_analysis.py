@@ -1,10 +1,15 @@
 #!/usr/bin/env python3
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 import numpy as np
 
+# Shared helpers live in the project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from pokec_cache import load_profiles
+
 # Create directories for outputs
 Path("reports/figures").mkdir(parents=True, exist_ok=True)
 
@@ -17,11 +22,8 @@ def load_data():
         'AGE', 'last_login', 'registration'
     ]
     
-    # Read the first few lines to get column positions
-    df = pd.read_csv('data/soc-pokec-profiles.txt', 
-                     sep='\t',
-                     usecols=[0, 1, 2, 3, 7],  # Adjust indices based on actual positions
-                     names=['user_id', 'public', 'completion_percentage', 'gender', 'AGE'])
+    # Read them from the Parquet cache of the TSV
+    df = load_profiles(['user_id', 'public', 'completion_percentage', 'gender', 'AGE'])
     
     # Convert data types
     df['completion_percentage'] = pd.to_numeric(df['completion_percentage'], errors='coerce')
@@ -3,25 +3,24 @@
 Simple script to encode categorical variables from the Pokec dataset.
 """
 
+import sys
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
+# Shared helpers live in the project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from pokec_cache import load_profiles
+
 def main():
     # Create output directories
     Path("data").mkdir(exist_ok=True)
     Path("reports").mkdir(exist_ok=True)
     
     print("Loading data...")
-    # Read only the columns we need
-    df = pd.read_csv('data/soc-pokec-profiles.txt', 
-                     sep='\t',
-                     usecols=[3, 4, 16],  # gender, region, eye_color columns
-                     nrows=10000,  # Sample size
-                     names=range(60))  # Just number the columns 0-59
-    
-    # Rename columns to meaningful names
-    df.columns = ['gender', 'region', 'eye_color']
+    # Read only the columns we need from the Parquet cache of the TSV
+    df = load_profiles(['gender', 'region', 'eye_color'],
+                       nrows=10000)  # Sample size
     
     print("\nOriginal data sample:")
     print(df.head())
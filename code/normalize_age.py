@@ -3,6 +3,7 @@
 Normalize and standardize age feature, with clustering analysis
 """
 
+import sys
 import pandas as pd
 import numpy as np
 from pathlib import Path
@@ -11,6 +12,10 @@ from sklearn.cluster import KMeans
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+# Shared helpers live in the project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from pokec_cache import load_profiles
+
 def load_and_clean_age(df):
     """Clean and validate age data"""
     # Convert age to numeric, handling errors
@@ -93,12 +98,8 @@ def main():
     Path("reports").mkdir(exist_ok=True)
     Path("plots").mkdir(exist_ok=True)
     
-    # Read data
-    df = pd.read_csv('data/soc-pokec-profiles.txt', 
-                     sep='\t',
-                     names=range(60),
-                     usecols=[7],  # age column
-                     nrows=10000)
+    # Read the age column from the Parquet cache of the TSV
+    df = load_profiles(['AGE'], nrows=10000)
     
     # Rename column
     df.columns = ['age']
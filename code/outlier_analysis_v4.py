@@ -1,100 +1,123 @@
 #!/usr/bin/env python3
+"""
+Outlier analysis of the Pokec profiles in two streaming passes over the
+typed Parquet cache of the TSV (pokec_cache.py).
+
+The first pass reads the cache in chunks and keeps only the per-column
+missing counts and exact histograms of AGE and completion_percentage,
+from which the z-score and IQR statistics are derived. The second pass
+flags and caps outliers chunk by chunk and appends every cleaned chunk
+to a Parquet file, so memory depends on CHUNK_SIZE, not on the dataset.
+"""
+import sys
 import pandas as pd
 import numpy as np
-from scipy import stats
+import pyarrow as pa
+import pyarrow.parquet as pq
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 
+# Shared helpers live in the project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from pokec_cache import cache_schema, iter_profiles
+from pokec_schema import TSV_COLUMNS, VALUE_RANGES
+from streaming_stats import DenseHistogram, histogram_percentiles
+
+CLEANED_FILE = 'data/soc-pokec-profiles-cleaned.parquet'
+
+# Rows per chunk; peak memory grows with this, not with the input
+CHUNK_SIZE = 100000
+
+# Numeric columns profiled with histograms
+NUMERIC_COLUMNS = ('AGE', 'completion_percentage')
+
 # Create directories for outputs
 Path("reports/figures").mkdir(parents=True, exist_ok=True)
 
-def load_data():
-    """Load and perform initial data cleaning"""
-    print("Loading data...")
-    
-    # Read all potentially relevant columns
-    df = pd.read_csv('data/soc-pokec-profiles.txt', 
-                     sep='\t',
-                     names=['user_id', 'public', 'completion_percentage', 'gender',
-                           'region', 'last_login', 'registration', 'AGE', 'body',
-                           'I_am_working_in_field', 'spoken_languages', 'hobbies',
-                           'I_most_enjoy_good_food', 'pets', 'body_type', 'my_eyesight',
-                           'eye_color', 'hair_color', 'hair_type', 'completed_level_of_education',
-                           'favourite_color', 'relation_to_smoking', 'relation_to_alcohol',
-                           'sign_in_zodiac', 'on_pokec_for', 'love_is_for_me', 'relation_to_casual_sex',
-                           'my_partner_should_be', 'marital_status', 'children', 'relation_to_children',
-                           'I_like_movies', 'I_like_watching_movie', 'I_like_music', 'I_mostly_like',
-                           'the_idea_of_good_evening', 'I_like_specialties_from_kitchen',
-                           'fun', 'I_am_going_to_concerts', 'my_active_sports',
-                           'my_passive_sports', 'profession', 'I_like_books', 'life_style',
-                           'music', 'cars', 'politics', 'relationships', 'art_culture',
-                           'hobbies_interests', 'science_technologies', 'computers_internet',
-                           'education', 'sport', 'movies', 'travelling', 'health',
-                           'companies_brands', 'more'])
-    
-    # Convert and clean numeric columns with reasonable bounds
-    df['AGE'] = pd.to_numeric(df['AGE'], errors='coerce')
+def read_chunks():
+    """DataFrame chunks of the profiles, in file order"""
+    return iter_profiles(batch_size=CHUNK_SIZE)
+
+def clean_chunk(df):
+    """Convert and clean numeric columns with reasonable bounds"""
+    # Floats in every chunk, whether or not it has missing or capped values
+    df['AGE'] = pd.to_numeric(df['AGE'], errors='coerce').astype(float)
     df.loc[(df['AGE'] < 10) | (df['AGE'] > 100), 'AGE'] = np.nan
     
-    df['completion_percentage'] = pd.to_numeric(df['completion_percentage'], errors='coerce')
+    df['completion_percentage'] = pd.to_numeric(df['completion_percentage'], errors='coerce').astype(float)
     df.loc[(df['completion_percentage'] < 0) | (df['completion_percentage'] > 100), 'completion_percentage'] = np.nan
     
     df['user_id'] = pd.to_numeric(df['user_id'], errors='coerce')
-    
-    print("Initial data shape:", df.shape)
     return df
 
-def calculate_zscore_outliers(series):
+def profile_data():
+    """First pass: row count, missing counts and numeric histograms"""
+    print("Profiling data...")
+    rows = 0
+    null_counts = 0
+    histograms = {column: DenseHistogram(*VALUE_RANGES[column]) for column in NUMERIC_COLUMNS}
+    
+    for chunk in read_chunks():
+        chunk = clean_chunk(chunk)
+        rows += len(chunk)
+        null_counts = null_counts + chunk.isnull().sum()
+        for column, histogram in histograms.items():
+            histogram.update_many(chunk[column].dropna())
+    
+    print("Initial data shape:", (rows, len(TSV_COLUMNS)))
+    return {
+        'rows': rows,
+        'null_counts': null_counts,
+        'histograms': histograms
+    }
+
+def numeric_stats(histogram):
+    """Mean, sample standard deviation and quartiles, as pandas computes them"""
+    count = histogram.count
+    q1, q3 = histogram.percentiles([25, 75])
+    return {
+        'mean': histogram.mean if count else np.nan,
+        'std': histogram.std * np.sqrt(count / (count - 1)) if count > 1 else np.nan,
+        'q1': q1,
+        'q3': q3,
+        'iqr': q3 - q1
+    }
+
+def calculate_zscore_outliers(histogram):
     """Calculate number of outliers using z-score method"""
-    clean_series = series.dropna()
-    z_scores = np.abs(stats.zscore(clean_series))
-    return len(clean_series[z_scores > 3])
+    std = histogram.std
+    if not histogram.count or std == 0:
+        return 0
+    z_scores = np.abs(histogram.values - histogram.mean) / std
+    return int(histogram.counts[z_scores > 3].sum())
 
-def identify_outliers(df):
+def identify_outliers(profile):
     """Identify outliers using multiple methods and provide justification"""
     print("Identifying outliers...")
+    histograms = profile['histograms']
     
-    # 1. Age Outliers
-    age_stats = {
-        'mean': df['AGE'].mean(),
-        'std': df['AGE'].std(),
-        'q1': df['AGE'].quantile(0.25),
-        'q3': df['AGE'].quantile(0.75),
-        'iqr': df['AGE'].quantile(0.75) - df['AGE'].quantile(0.25)
-    }
-    
+    # 1. Age Outliers (IQR counts are taken in the second pass)
+    age_stats = numeric_stats(histograms['AGE'])
     age_outliers = {
-        'zscore': calculate_zscore_outliers(df['AGE']),
-        'iqr': len(df[
-            (df['AGE'] < age_stats['q1'] - 1.5 * age_stats['iqr']) |
-            (df['AGE'] > age_stats['q3'] + 1.5 * age_stats['iqr'])
-        ].dropna())
+        'zscore': calculate_zscore_outliers(histograms['AGE']),
+        'iqr': 0
     }
     
     # 2. Completion Percentage Outliers
-    comp_stats = {
-        'mean': df['completion_percentage'].mean(),
-        'std': df['completion_percentage'].std(),
-        'q1': df['completion_percentage'].quantile(0.25),
-        'q3': df['completion_percentage'].quantile(0.75),
-        'iqr': df['completion_percentage'].quantile(0.75) - df['completion_percentage'].quantile(0.25)
-    }
-    
+    comp_stats = numeric_stats(histograms['completion_percentage'])
     completion_outliers = {
-        'zscore': calculate_zscore_outliers(df['completion_percentage']),
-        'iqr': len(df[
-            (df['completion_percentage'] < comp_stats['q1'] - 1.5 * comp_stats['iqr']) |
-            (df['completion_percentage'] > comp_stats['q3'] + 1.5 * comp_stats['iqr'])
-        ].dropna())
+        'zscore': calculate_zscore_outliers(histograms['completion_percentage']),
+        'iqr': 0
     }
     
     # 3. Identify sparse columns
-    sparsity = (df.isnull().sum() / len(df) * 100).round(1)
+    missing = profile['null_counts'] / profile['rows']
+    sparsity = (missing * 100).round(1)
     sparse_columns = sparsity[sparsity > 50].index.tolist()
     
     # 4. Analyze feature completeness
-    feature_completeness = (1 - df.isnull().mean()) * 100
+    feature_completeness = (1 - missing) * 100
     
     return {
         'age_stats': age_stats,
@@ -106,10 +129,62 @@ def identify_outliers(df):
         'feature_completeness': feature_completeness
     }
 
-def handle_outliers(df, outlier_info):
-    """Handle outliers using appropriate methods"""
+def count_iqr_outliers(df, stats):
+    """Rows outside the IQR fences of ``stats`` (column, stats) that have no missing field"""
+    column, stats = stats
+    outside = ((df[column] < stats['q1'] - 1.5 * stats['iqr']) |
+               (df[column] > stats['q3'] + 1.5 * stats['iqr']))
+    # Rows with a missing field were never counted (the old df[...].dropna())
+    return int((outside & df.notna().all(axis=1)).sum())
+
+def parquet_schema(df):
+    """Arrow schema of the cleaned chunks: the cache types, with floats for the cleaned numbers
+
+    Fixed up front, since whether an integer column comes back as floats
+    depends on whether a chunk has missing values.
+    """
+    types = cache_schema()
+    fields = []
+    for column, dtype in df.dtypes.items():
+        if column in NUMERIC_COLUMNS:
+            field_type = pa.float64()
+        elif column in types.names:
+            field_type = types.field(column).type
+        else:
+            field_type = pa.from_numpy_dtype(dtype)
+        fields.append(pa.field(column, field_type))
+    return pa.schema(fields)
+
+def write_cleaned_data(profile, outlier_info):
+    """Second pass: count IQR outliers, handle outliers and write the cleaned chunks to Parquet"""
     print("Handling outliers...")
+    cleaned_ages = pd.Series(dtype=float)
+    completeness_groups = None
+    writer = None
+    try:
+        for chunk in read_chunks():
+            chunk = clean_chunk(chunk)
+            outlier_info['age_outliers']['iqr'] += count_iqr_outliers(
+                chunk, ('AGE', outlier_info['age_stats']))
+            outlier_info['completion_outliers']['iqr'] += count_iqr_outliers(
+                chunk, ('completion_percentage', outlier_info['comp_stats']))
+            
+            df_cleaned, completeness_groups = handle_outliers(chunk, outlier_info)
+            cleaned_ages = cleaned_ages.add(df_cleaned['AGE'].value_counts(), fill_value=0)
+            
+            if writer is None:
+                schema = parquet_schema(df_cleaned)
+                writer = pq.ParquetWriter(CLEANED_FILE, schema)
+            writer.write_table(pa.Table.from_pandas(df_cleaned, schema=schema, preserve_index=False))
+    finally:
+        if writer is not None:
+            writer.close()
     
+    print(f"Cleaned data written to {CLEANED_FILE}")
+    return cleaned_ages.sort_index(), completeness_groups
+
+def handle_outliers(df, outlier_info):
+    """Handle outliers using appropriate methods"""
     df_cleaned = df.copy()
     
     # 1. Age Handling
@@ -143,24 +218,47 @@ def handle_outliers(df, outlier_info):
     
     return df_cleaned, completeness_groups
 
-def generate_visualizations(df, df_cleaned, outlier_info):
+def box_stats(values, counts):
+    """Boxplot statistics (1.5 IQR whiskers) of values occurring ``counts`` times"""
+    values = np.asarray(values, dtype=float)
+    counts = np.asarray(counts)
+    values, counts = values[counts > 0], counts[counts > 0]
+    q1, median, q3 = histogram_percentiles(values, counts, [25, 50, 75])
+    iqr = q3 - q1
+    inside = (values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)
+    return {
+        'med': median, 'q1': q1, 'q3': q3,
+        'whislo': values[inside].min(), 'whishi': values[inside].max(),
+        'fliers': values[~inside]
+    }
+
+def draw_boxplot(ax, values, counts, label):
+    """Horizontal boxplot of a value histogram, styled like sns.boxplot"""
+    ax.bxp([box_stats(values, counts)], orientation='horizontal', widths=0.8, patch_artist=True,
+           boxprops={'facecolor': sns.color_palette()[0]}, medianprops={'color': '.25'})
+    ax.set_yticks([])
+    ax.set_xlabel(label)
+
+def generate_visualizations(profile, cleaned_ages, outlier_info):
     """Generate visualizations for outlier analysis"""
     print("Generating visualizations...")
+    ages = profile['histograms']['AGE']
+    completion = profile['histograms']['completion_percentage']
     
     # 1. Age Distribution Before and After
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 5))
-    sns.boxplot(x=df['AGE'].dropna(), ax=ax1)
+    draw_boxplot(ax1, ages.values, ages.counts, 'AGE')
     ax1.set_title('Age Distribution (Before)')
-    sns.boxplot(x=df_cleaned['AGE'].dropna(), ax=ax2)
+    draw_boxplot(ax2, cleaned_ages.index, cleaned_ages.to_numpy(), 'AGE')
     ax2.set_title('Age Distribution (After)')
     plt.tight_layout()
     plt.savefig('reports/figures/age_outliers.png')
     plt.close()
     
     # 2. Completion Percentage Distribution
-    plt.figure(figsize=(10, 6))
-    sns.boxplot(x=df['completion_percentage'].dropna())
-    plt.title('Completion Percentage Distribution')
+    fig, ax = plt.subplots(figsize=(10, 6))
+    draw_boxplot(ax, completion.values, completion.counts, 'completion_percentage')
+    ax.set_title('Completion Percentage Distribution')
     plt.savefig('reports/figures/completion_distribution.png')
     plt.close()
     
@@ -173,7 +271,7 @@ def generate_visualizations(df, df_cleaned, outlier_info):
     plt.savefig('reports/figures/feature_completeness.png')
     plt.close()
 
-def generate_report(df, df_cleaned, outlier_info, completeness_groups):
+def generate_report(profile, cleaned_ages, outlier_info, completeness_groups):
     """Generate a comprehensive report on outlier handling"""
     print("Generating report...")
     
@@ -278,8 +376,8 @@ The following visualizations have been generated in the reports/figures director
 3. feature_completeness.png - Distribution of feature completeness
 
 """.format(
-        total_records=len(df),
-        total_features=len(df.columns),
+        total_records=profile['rows'],
+        total_features=len(TSV_COLUMNS),
         min_missing=outlier_info['sparsity'].min(),
         max_missing=outlier_info['sparsity'].max(),
         high_quality_features='\n'.join(f'- {col}' for col in completeness_groups['high_quality']),
@@ -297,10 +395,10 @@ The following visualizations have been generated in the reports/figures director
         comp_q3=outlier_info['comp_stats']['q3'],
         comp_zscore_outliers=outlier_info['completion_outliers']['zscore'],
         comp_iqr_outliers=outlier_info['completion_outliers']['iqr'],
-        orig_age_min=df['AGE'].min(),
-        orig_age_max=df['AGE'].max(),
-        clean_age_min=df_cleaned['AGE'].min(),
-        clean_age_max=df_cleaned['AGE'].max(),
+        orig_age_min=profile['histograms']['AGE'].min,
+        orig_age_max=profile['histograms']['AGE'].max,
+        clean_age_min=cleaned_ages.index.min(),
+        clean_age_max=cleaned_ages.index.max(),
         new_feature_count=len(outlier_info['sparse_columns'])
     )
     
@@ -311,20 +409,20 @@ The following visualizations have been generated in the reports/figures director
 def main():
     print("Starting outlier analysis...")
     
-    # Load data
-    df = load_data()
+    # Profile the data (first pass)
+    profile = profile_data()
     
     # Identify outliers
-    outlier_info = identify_outliers(df)
+    outlier_info = identify_outliers(profile)
     
-    # Handle outliers
-    df_cleaned, completeness_groups = handle_outliers(df, outlier_info)
+    # Handle outliers and write the cleaned data (second pass)
+    cleaned_ages, completeness_groups = write_cleaned_data(profile, outlier_info)
     
     # Generate visualizations
-    generate_visualizations(df, df_cleaned, outlier_info)
+    generate_visualizations(profile, cleaned_ages, outlier_info)
     
     # Generate report
-    generate_report(df, df_cleaned, outlier_info, completeness_groups)
+    generate_report(profile, cleaned_ages, outlier_info, completeness_groups)
     
     print("Analysis complete! Check reports/outlier_analysis_report.txt for results.")
 
@@ -3,6 +3,7 @@
 Complete pipeline for processing and encoding the social network profiles data.
 """
 
+import sys
 import pandas as pd
 import numpy as np
 from pathlib import Path
@@ -12,31 +13,16 @@ from category_encoders import TargetEncoder
 import warnings
 warnings.filterwarnings('ignore')
 
+# Shared helpers live in the project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from pokec_cache import load_profiles
+
 def load_raw_data():
     """Load the raw data from soc-pokec-profiles.txt"""
     print("Loading raw data...")
     
-    # Define column names based on the dataset description
-    columns = [
-        'user_id', 'public', 'completion_percentage', 'gender', 'region',
-        'last_login', 'registration', 'AGE', 'body', 'I_am_working_in_field',
-        'spoken_languages', 'hobbies', 'I_most_enjoy_good_food', 'pets',
-        'body_type', 'my_eyesight', 'eye_color', 'hair_color', 'hair_type',
-        'completed_level_of_education', 'favourite_color', 'relation_to_smoking',
-        'relation_to_alcohol', 'sign_in_zodiac', 'on_pokec_for', 'love_is_for_me',
-        'relation_to_casual_sex', 'my_partner_should_be', 'marital_status',
-        'children', 'relation_to_children', 'I_like_movies', 'I_like_watching_movie',
-        'I_like_music', 'I_mostly_like_listening_to_music', 'the_idea_of_good_evening',
-        'I_like_specialties_from_kitchen', 'fun', 'I_am_going_to_concerts',
-        'my_active_sports', 'my_passive_sports', 'profession', 'I_like_books',
-        'life_style', 'music', 'cars', 'politics', 'relationships', 'art_culture',
-        'hobbies_interests', 'science_technologies', 'computers_internet',
-        'education', 'sport', 'movies', 'travelling', 'health', 'companies_brands',
-        'more'
-    ]
-    
-    # Read the data
-    df = pd.read_csv('data/soc-pokec-profiles.txt', sep='\t', names=columns)
+    # Every column, typed, from the Parquet cache of the TSV
+    df = load_profiles()
     return df
 
 def clean_text(text):
@@ -7,7 +7,13 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 import re
-from collections import defaultdict
+import sys
+
+# Shared helpers live in the project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from keyword_matcher import KeywordMatcher
+from pokec_cache import load_profiles
+from pokec_keywords import HOBBY_KEYWORDS, LANGUAGE_KEYWORDS
 
 def clean_text(text):
     """Clean text but preserve more potential matches"""
@@ -31,64 +37,24 @@ def clean_text(text):
 
 def get_hobby_keywords():
     """Define hobby categories with more Slovak variations"""
-    return {
-        'sport': ['sport', 'futbal', 'basketbal', 'volejbal', 'tenis', 'hokej', 'fitness', 
-                 'behanie', 'plavanie', 'sportovanie', 'futbalovy', 'basketbalovy', 'hokejovy'],
-        'music': ['hudba', 'spev', 'gitara', 'klavir', 'spievanie', 'koncerty', 'hudby', 
-                 'spievam', 'hudobny', 'gitare', 'klaviri', 'koncertoch'],
-        'reading': ['citanie', 'knihy', 'literatura', 'citat', 'knih', 'literarny'],
-        'movies': ['filmy', 'kino', 'serial', 'filmov', 'serialy', 'filmare', 'kinach'],
-        'travel': ['cestovanie', 'turistika', 'cestovat', 'cestuje', 'turista', 'cestovatel'],
-        'art': ['umenie', 'malovanie', 'kresba', 'fotenie', 'fotografovanie', 'malovat', 
-               'kreslit', 'fotit', 'umeni', 'umelecky'],
-        'computers': ['pocitace', 'programovanie', 'hry', 'gaming', 'internet', 'pc', 
-                    'notebook', 'programator', 'herne', 'online'],
-        'food': ['varenie', 'jedlo', 'gastonomia', 'pecenie', 'varit', 'kuchyna', 
-                'gastronomie', 'kucharske', 'peciem'],
-        'nature': ['priroda', 'zahrada', 'zvierata', 'turistika', 'prirode', 'zahradka', 
-                 'zvieratka', 'prirodny'],
-        'social': ['priatelia', 'party', 'zabava', 'tanec', 'disco', 'zabavat', 
-                 'kamarati', 'parties', 'diskoteky', 'tanecny'],
-        'sports_extreme': ['skateboard', 'snowboard', 'bike', 'adrenalin', 'extreme', 
-                         'skating', 'biking', 'adrenalinu'],
-        'education': ['studium', 'ucenie', 'skola', 'vzdelavanie', 'student', 'ucit', 
-                    'skolsky', 'vzdelavaci'],
-        'cars': ['auta', 'motocykle', 'mechanika', 'auto', 'moto', 'automobily', 
-               'motorkarske', 'mechanik'],
-        'shopping': ['nakupovanie', 'moda', 'oblecenie', 'nakupovat', 'nakupy', 
-                   'modne', 'obliekanie']
-    }
+    return {category: list(keywords) for category, keywords in HOBBY_KEYWORDS.items()}
 
 def get_language_keywords():
     """Define language mappings with more variations"""
-    return {
-        'slovak': ['slovensky', 'slovencina', 'slovensky jazyk', 'slovensky hovorim', 
-                 'slovenska rec', 'slovensky perfektne'],
-        'english': ['anglicky', 'anglictina', 'english', 'aj', 'eng', 'anglicky jazyk'],
-        'german': ['nemecky', 'nemcina', 'deutsch', 'nj', 'nemecky jazyk', 'po nemecky'],
-        'czech': ['cesky', 'cestina', 'cj', 'cesky jazyk', 'po cesky'],
-        'hungarian': ['madarsky', 'madarcina', 'madarsky jazyk', 'po madarsky'],
-        'french': ['francuzsky', 'francuzstina', 'fj', 'francuzsky jazyk'],
-        'russian': ['rusky', 'rustina', 'rj', 'rusky jazyk', 'po rusky'],
-        'spanish': ['spanielsky', 'spanielcina', 'sj', 'spanielsky jazyk'],
-        'italian': ['taliansky', 'taliancina', 'tj', 'taliansky jazyk'],
-        'polish': ['polsky', 'polstina', 'pj', 'polsky jazyk']
-    }
+    return {language: list(keywords) for language, keywords in LANGUAGE_KEYWORDS.items()}
 
-def find_matches(text_list, category_keywords):
-    """Find matches using more flexible matching"""
-    matches = set()
-    
-    for text in text_list:
-        text = ' ' + text + ' '  # Add spaces to help with word boundaries
-        for category, keywords in category_keywords.items():
-            if any(f' {keyword} ' in text for keyword in keywords):
-                matches.add(category)
-            # Try partial matches for longer strings
-            elif len(text) > 10 and any(keyword in text for keyword in keywords):
-                matches.add(category)
-    
-    return list(matches)
+def encode_categories(fragments, matcher, prefix):
+    """Matched category lists and one-hot columns of the present categories"""
+    # One automaton pass per row; rows are category bitsets
+    masks = matcher.masks(fragments)
+    membership = matcher.to_sparse(masks)
+    present = np.flatnonzero(membership.getnnz(axis=0))
+    
+    categories = pd.Series([matcher.names(mask) for mask in masks.tolist()],
+                           index=fragments.index)
+    one_hot = pd.DataFrame(membership[:, present].toarray(), index=fragments.index,
+                           columns=[f'{prefix}_{matcher.categories[i]}' for i in present])
+    return categories, one_hot
 
 def main():
     print("Loading data...")
@@ -97,42 +63,29 @@ def main():
     Path("data").mkdir(exist_ok=True)
     Path("reports").mkdir(exist_ok=True)
     
-    # Read data
-    df = pd.read_csv('data/soc-pokec-profiles.txt', 
-                     sep='\t',
-                     names=range(60),
-                     usecols=[11, 10],  # hobbies and languages columns
-                     nrows=10000)
+    # Read the hobbies and languages columns from the Parquet cache of the TSV
+    df = load_profiles(['hobbies', 'spoken_languages'], nrows=10000)
     
     # Rename columns
     df.columns = ['hobbies', 'languages']
     
+    # Keyword automatons, compiled once
+    hobby_matcher = KeywordMatcher(get_hobby_keywords())
+    language_matcher = KeywordMatcher(get_language_keywords())
+    
     print("\nProcessing hobbies...")
     df['hobbies_clean'] = df['hobbies'].apply(clean_text)
-    df['hobby_categories'] = df['hobbies_clean'].apply(
-        lambda x: find_matches(x, get_hobby_keywords())
-    )
+    df['hobby_categories'], hobby_cols = encode_categories(
+        df['hobbies_clean'], hobby_matcher, 'hobby')
     
     print("Processing languages...")
     df['languages_clean'] = df['languages'].apply(clean_text)
-    df['language_categories'] = df['languages_clean'].apply(
-        lambda x: find_matches(x, get_language_keywords())
-    )
-    
-    # Create binary columns
-    print("\nCreating binary columns...")
+    df['language_categories'], lang_cols = encode_categories(
+        df['languages_clean'], language_matcher, 'language')
     
-    # For hobbies
-    hobby_cols = pd.DataFrame()
-    all_hobbies = set().union(*df['hobby_categories'])
-    for hobby in sorted(all_hobbies):
-        hobby_cols[f'hobby_{hobby}'] = df['hobby_categories'].apply(lambda x: hobby in x)
-    
-    # For languages
-    lang_cols = pd.DataFrame()
-    all_languages = set().union(*df['language_categories'])
-    for lang in sorted(all_languages):
-        lang_cols[f'language_{lang}'] = df['language_categories'].apply(lambda x: lang in x)
+    # Categories found at least once (one binary column each)
+    all_hobbies = [col[len('hobby_'):] for col in hobby_cols.columns]
+    all_languages = [col[len('language_'):] for col in lang_cols.columns]
     
     # Combine all columns
     df_encoded = pd.concat([df, hobby_cols, lang_cols], axis=1)
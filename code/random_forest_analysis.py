@@ -3,6 +3,7 @@
 Simple Random Forest Classification Analysis
 """
 
+import sys
 import pandas as pd
 import numpy as np
 from pathlib import Path
@@ -13,15 +14,14 @@ from sklearn.metrics import classification_report
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+# Shared helpers live in the project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from pokec_cache import load_profiles
+from pokec_schema import TSV_COLUMNS
+
 def load_and_prepare_data(file_path, nrows=10000):
     """Load and prepare the dataset"""
-    # Read data
-    df = pd.read_csv(file_path, 
-                    sep='\t',
-                    names=range(60),
-                    nrows=nrows)
-    
-    # Select only essential features
+    # Select only essential features (by TSV position)
     features = {
         3: 'public',          # Target variable
         7: 'age',            
@@ -30,8 +30,10 @@ def load_and_prepare_data(file_path, nrows=10000):
         11: 'hobbies'
     }
     
+    # Read just those columns from the Parquet cache of the TSV
+    df = load_profiles([TSV_COLUMNS[i] for i in features], nrows=nrows, tsv_path=file_path)
+    
     # Rename columns
-    df = df[features.keys()]
     df.columns = features.values()
     
     return df
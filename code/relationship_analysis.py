@@ -1,10 +1,16 @@
 #!/usr/bin/env python3
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 import numpy as np
 
+# Shared helpers live in the project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from pokec_cache import load_profiles
+from pokec_schema import TSV_COLUMNS
+
 # Set style for better visualizations
 sns.set_style('whitegrid')
 sns.set_palette("husl")
@@ -28,10 +34,9 @@ def load_data():
                 'hair_type', 'body_type', 'relation_to_smoking', 'relation_to_alcohol',
                 'sign_in_zodiac', 'marital_status']
     
-    df = pd.read_csv('data/soc-pokec-profiles.txt', 
-                     sep='\t',
-                     usecols=col_indices,
-                     names=col_names)
+    # Plain strings rather than categoricals, so plots show only the top categories
+    df = load_profiles([TSV_COLUMNS[i] for i in col_indices], categorical=False)
+    df.columns = col_names
     
     # Clean and preprocess data
     df['completion_percentage'] = pd.to_numeric(df['completion_percentage'], errors='coerce')
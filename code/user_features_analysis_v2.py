@@ -1,9 +1,14 @@
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 import numpy as np
 
+# Shared helpers live in the project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from pokec_cache import load_profiles
+
 # Set style for better visualizations
 sns.set_style("whitegrid")
 sns.set_palette("husl")
@@ -14,11 +19,8 @@ Path("reports/figures").mkdir(parents=True, exist_ok=True)
 def load_data():
     """Load and preprocess the data"""
     print("Loading data...")
-    # Read only the columns we need (columns 0, 3, 4, 7 contain user_id, gender, region, age)
-    df = pd.read_csv('data/soc-pokec-profiles.txt', 
-                     sep='\t', 
-                     usecols=[0, 3, 4, 7], 
-                     names=['user_id', 'gender', 'region', 'AGE'])
+    # Read only the columns we need from the Parquet cache of the TSV
+    df = load_profiles(['user_id', 'gender', 'region', 'AGE'])
     
     # Basic data cleaning
     df['AGE'] = pd.to_numeric(df['AGE'], errors='coerce')
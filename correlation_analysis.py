@@ -1,40 +1,72 @@
 import pandas as pd
 import numpy as np
 from collections import defaultdict
-from mapreduce_framework import Mapper, Reducer, MapReduceFramework
-from typing import Dict, List, Any
+from mapreduce_framework import (Mapper, Reducer, MapReduceFramework, AGE_COLUMN,
+                                 GENDER_COLUMN, REGION_COLUMN)
+from streaming_stats import CoMoments
+from typing import Dict, List, Any, Sequence
 
 class CorrelationMapper(Mapper):
+    derived_columns = ('age', 'completion_rate')
+
+    categorical_cols = (GENDER_COLUMN, REGION_COLUMN)
+
+    def __init__(self, numerical_cols: Sequence[int] = (AGE_COLUMN,)):
+        self.numerical_cols = tuple(numerical_cols)
+        self.columns = tuple(sorted(set(self.numerical_cols) | set(self.categorical_cols)))
+
+    def numeric_column(self, chunk: pd.DataFrame, col: int) -> pd.Series:
+        if col == AGE_COLUMN:
+            return chunk['age']
+        return pd.to_numeric(chunk[col], errors='coerce')
+
     def map(self, chunk: pd.DataFrame) -> Dict[str, List]:
         results = defaultdict(list)
         
-        # Calculate completion percentage for each profile
-        chunk['completion_rate'] = chunk.apply(lambda row: (row.notna().sum() / len(row)) * 100, axis=1)
-        
-        # Analyze correlations with numerical features
-        numerical_cols = [2]  # Age column
-        for col in numerical_cols:
-            valid_data = chunk[chunk.iloc[:, col].notna()]
-            results['numerical_corr'].append((col, 
-                np.corrcoef(valid_data.iloc[:, col], valid_data['completion_rate'])[0, 1]))
+        # Emit co-moments against completion rate so the reducer gets exact r
+        completion = chunk['completion_rate']
+        for col in self.numerical_cols:
+            values = self.numeric_column(chunk, col)
+            valid = values.notna() & completion.notna()
+            moments = CoMoments()
+            moments.update_many(values[valid], completion[valid])
+            results['numerical_corr'].append((col, moments))
         
         # Analyze categorical features
-        categorical_cols = [1, 4]  # Gender and region columns
-        for col in categorical_cols:
-            group_stats = chunk.groupby(chunk.iloc[:, col])['completion_rate'].agg(['mean', 'count'])
+        for col in self.categorical_cols:
+            group_stats = chunk.groupby(chunk[col])['completion_rate'].agg(['mean', 'count'])
             for category, stats in group_stats.iterrows():
                 results['categorical_stats'].append((col, category, stats['mean'], stats['count']))
         
         return results
 
+    def combine(self, key: str, values: List) -> List:
+        if key == 'numerical_corr':
+            merged = {}
+            for col, moments in values:
+                if col in merged:
+                    merged[col].merge(moments)
+                else:
+                    merged[col] = moments
+            return list(merged.items())
+        if key == 'categorical_stats':
+            # Pool per-category means weighted by their counts
+            totals = defaultdict(lambda: [0.0, 0])
+            for col, category, mean, count in values:
+                totals[(col, category)][0] += mean * count
+                totals[(col, category)][1] += count
+            return [(col, category, total / count, count)
+                    for (col, category), (total, count) in totals.items() if count]
+        return values
+
 class CorrelationReducer(Reducer):
     def reduce(self, key: str, values: List) -> Dict:
         if key == 'numerical_corr':
-            # Average correlation coefficients
-            corr_dict = defaultdict(list)
-            for col, corr in values:
-                corr_dict[col].append(corr)
-            return {col: np.mean(corrs) for col, corrs in corr_dict.items()}
+            # Merge co-moments per column; r is exact regardless of chunking
+            merged = {}
+            for col, moments in values:
+                merged.setdefault(col, CoMoments()).merge(moments)
+            return {col: moments.correlation for col, moments in merged.items()}
         
         elif key == 'categorical_stats':
             # Combine category statistics
@@ -1,10 +1,32 @@
 import pandas as pd
 import numpy as np
 from collections import defaultdict
-from mapreduce_framework import Mapper, Reducer, MapReduceFramework
+from mapreduce_framework import (Mapper, Reducer, MapReduceFramework, sum_counts,
+                                 GENDER_COLUMN, REGION_COLUMN)
+from streaming_stats import NumericSummary, merge_all
 from typing import Dict, List, Any
 
+# Percentiles reported next to the median for numeric summaries
+PERCENTILES = [5, 25, 75, 95]
+
+# Seed of the quantile sketches, so the same input gives the same report
+QUANTILE_SEED = 0
+
 class DemographicMapper(Mapper):
+    derived_columns = ('age', 'completion_rate')
+    columns = (GENDER_COLUMN, REGION_COLUMN)
+
+    def __init__(self, quantile_error: float = 0.01, seed: int = QUANTILE_SEED):
+        # Normalized rank error allowed for the median and percentiles
+        self.quantile_error = quantile_error
+        self.seed = seed
+
+    def summarize(self, values) -> NumericSummary:
+        """Compact mergeable summary (moments + quantile sketch) of a column."""
+        summary = NumericSummary.from_error(self.quantile_error, seed=self.seed)
+        summary.update_many(values)
+        return summary
+
     def map(self, chunk: pd.DataFrame) -> Dict[str, List]:
         results = {
             'age_stats': [],
@@ -14,34 +36,42 @@ class DemographicMapper(Mapper):
         }
         
         # Age analysis
-        age_data = chunk.iloc[:, 2].dropna()
-        results['age_stats'].extend(age_data.values)
+        age_data = chunk['age'].dropna()
+        results['age_stats'].append(self.summarize(age_data.values))
         
-        # Gender analysis (column 1)
-        gender_counts = chunk.iloc[:, 1].value_counts()
+        # Gender analysis
+        gender_counts = chunk[GENDER_COLUMN].value_counts()
         for gender, count in gender_counts.items():
             results['gender_counts'].append((gender, count))
         
-        # Region analysis (column 4)
-        region_counts = chunk.iloc[:, 4].value_counts()
+        # Region analysis
+        region_counts = chunk[REGION_COLUMN].value_counts()
         for region, count in region_counts.items():
             results['region_counts'].append((region, count))
         
-        # Calculate completion rates
-        chunk['completion_rate'] = chunk.apply(lambda row: (row.notna().sum() / len(row)) * 100, axis=1)
-        results['completion_rates'].extend(chunk['completion_rate'].values)
+        # Completion rates (derived once per chunk by the framework)
+        results['completion_rates'].append(self.summarize(chunk['completion_rate'].values))
         
         return results
 
+    def combine(self, key: str, values: List) -> List:
+        if key in ['gender_counts', 'region_counts']:
+            return sum_counts(values)
+        if key in ['age_stats', 'completion_rates']:
+            return [merge_all(values)]
+        return values
+
 class DemographicReducer(Reducer):
     def reduce(self, key: str, values: List) -> Dict:
         if key == 'age_stats':
+            summary = merge_all(values)
             return {
-                'mean': np.mean(values),
-                'median': np.median(values),
-                'std': np.std(values),
-                'min': np.min(values),
-                'max': np.max(values)
+                'mean': summary.moments.mean,
+                'median': summary.percentile(50),
+                'std': summary.moments.std,
+                'min': summary.moments.min,
+                'max': summary.moments.max,
+                'percentiles': {f'p{q}': summary.percentile(q) for q in PERCENTILES}
             }
         elif key in ['gender_counts', 'region_counts']:
             counts = defaultdict(int)
@@ -49,9 +79,11 @@ class DemographicReducer(Reducer):
                 counts[val] += count
             return dict(sorted(counts.items(), key=lambda x: x[1], reverse=True))
         elif key == 'completion_rates':
+            summary = merge_all(values)
             return {
-                'mean': np.mean(values),
-                'median': np.median(values),
-                'std': np.std(values)
+                'mean': summary.moments.mean,
+                'median': summary.percentile(50),
+                'std': summary.moments.std,
+                'percentiles': {f'p{q}': summary.percentile(q) for q in PERCENTILES}
             }
         return {}
@@ -8,6 +8,9 @@ Output: Key-value pairs for age statistics and clustering
 
 import sys
 import json
+from streaming_fields import FieldExtractor, read_fields
+
+FIELDS = FieldExtractor(['AGE'])
 
 def validate_age(age_str):
     """Validate and clean age value"""
@@ -19,35 +22,40 @@ def validate_age(age_str):
         pass
     return None
 
+def open_output(out=None):
+    """Where map_fields writes its records"""
+    return out or sys.stdout
+
+def map_fields(fields, out):
+    """Emit the records for one line's FIELDS"""
+    try:
+        age_str, = fields
+        age = validate_age(age_str)
+        
+        if age is not None:
+            # Emit for different computations
+            
+            # For basic statistics
+            out.write(f"stats\t{json.dumps({'age': age, 'count': 1})}\n")
+            
+            # For age value (used in normalization)
+            out.write(f"age_value\t{age}\n")
+            
+            # For squared differences (used in standardization)
+            out.write(f"age_squared\t{age * age}\n")
+            
+            # For clustering initialization
+            out.write(f"cluster_point\t{age}\n")
+            
+    except Exception as e:
+        sys.stderr.write(f"Error processing line: {str(e)}\n")
+
 def main():
+    out = open_output()
+    
     # Process input lines from stdin
-    for line in sys.stdin:
-        try:
-            # Split line into fields
-            fields = line.strip().split('\t')
-            
-            if len(fields) >= 8:  # Ensure we have enough fields
-                # Extract age (field 7)
-                age = validate_age(fields[7])
-                
-                if age is not None:
-                    # Emit for different computations
-                    
-                    # For basic statistics
-                    print(f"stats\t{json.dumps({'age': age, 'count': 1})}")
-                    
-                    # For age value (used in normalization)
-                    print(f"age_value\t{age}")
-                    
-                    # For squared differences (used in standardization)
-                    print(f"age_squared\t{age * age}")
-                    
-                    # For clustering initialization
-                    print(f"cluster_point\t{age}")
-                    
-        except Exception as e:
-            sys.stderr.write(f"Error processing line: {str(e)}\n")
-            continue
+    for fields in read_fields(FIELDS):
+        map_fields(fields, out)
 
 if __name__ == "__main__":
     main()
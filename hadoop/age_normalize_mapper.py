@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Mapper normalizing every profile's age with the age job's statistics
+Input: Tab-separated lines from Pokec profiles
+Output: user_id\tage\tnormalized\tstandardized\tcluster
+
+The statistics and cluster centers come from the JSON report of
+age_reducer.py, read from the path given as the first argument (default
+age_analysis.txt, shipped with -file). Run as a map-only job after the
+age analysis; profiles without a valid age are skipped.
+"""
+
+import sys
+import json
+from age_mapper import validate_age
+from age_reducer import AgeAnalysisReducer
+from streaming_fields import FieldExtractor, read_fields
+
+FIELDS = FieldExtractor(['user_id', 'AGE'])
+
+REPORT = 'age_analysis.txt'
+
+def load_reducer(path):
+    """AgeAnalysisReducer holding the statistics of an age report"""
+    with open(path) as f:
+        return AgeAnalysisReducer.from_report(json.load(f))
+
+def main():
+    reducer = load_reducer(sys.argv[1] if len(sys.argv) > 1 else REPORT)
+    # Output columns of each distinct age (at most 100 of them)
+    normalized = {}
+    write = sys.stdout.write
+    for user_id, age_str in read_fields(FIELDS):
+        age = validate_age(age_str)
+        if age is None:
+            continue
+        columns = normalized.get(age)
+        if columns is None:
+            columns = normalized[age] = (
+                f"{age}\t{reducer.normalize_age(age)}\t"
+                f"{reducer.standardize_age(age)}\t{reducer.assign_cluster(age)}\n"
+            )
+        write(f"{user_id}\t{columns}")
+
+if __name__ == "__main__":
+    main()
@@ -4,17 +4,31 @@ MapReduce implementation - Reducer
 Process age statistics and perform clustering
 Input: Key-value pairs from mapper
 Output: JSON format with normalized/standardized ages and clusters
+
+Only running sums and a histogram of the (1-100) ages are kept, so memory
+does not grow with the number of users; age_normalize_mapper.py applies
+the report's statistics to every profile in a second, map-only job.
 """
 
+import os
 import sys
 import json
 import numpy as np
-from collections import defaultdict
+
+# Shared helpers live in the project root (shipped alongside with -file on Hadoop)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from streaming_stats import histogram_percentiles
+
+# Input ages kept as the sample of processed ages in the report
+SAMPLE_SIZE = 5
 
 class AgeAnalysisReducer:
     def __init__(self, n_clusters=5):
         self.n_clusters = n_clusters
-        self.ages = []
+        # Count of each distinct age, in order of first appearance; ages are
+        # validated to 1-100, so this stays O(100) however many users there are
+        self.age_counts = {}
+        self.sample_ages = []
         self.sum_age = 0
         self.sum_squared = 0
         self.count = 0
@@ -26,6 +40,14 @@ class AgeAnalysisReducer:
             'std_age': 0
         }
     
+    @classmethod
+    def from_report(cls, report):
+        """Reducer holding the statistics and cluster centers of a JSON report"""
+        reducer = cls(n_clusters=len(report['clusters']['centers']) + 1)
+        reducer.stats = dict(report['statistics'])
+        reducer.cluster_centers = np.array(report['clusters']['centers'])
+        return reducer
+    
     def update_statistics(self, age):
         """Update running statistics"""
         self.stats['min_age'] = min(self.stats['min_age'], age)
@@ -33,7 +55,9 @@ class AgeAnalysisReducer:
         self.sum_age += age
         self.sum_squared += age * age
         self.count += 1
-        self.ages.append(age)
+        self.age_counts[age] = self.age_counts.get(age, 0) + 1
+        if len(self.sample_ages) < SAMPLE_SIZE:
+            self.sample_ages.append(age)
     
     def calculate_final_statistics(self):
         """Calculate final statistics"""
@@ -54,12 +78,16 @@ class AgeAnalysisReducer:
             return 0  # Default for constant values
         return (age - self.stats['mean_age']) / self.stats['std_age']
     
+    def age_percentiles(self, percentiles):
+        """np.percentile (linear) of all ages, read off the age histogram"""
+        ages = sorted(self.age_counts)
+        return histogram_percentiles(ages, [self.age_counts[age] for age in ages], percentiles)
+    
     def initialize_clusters(self):
         """Initialize cluster centers using quantiles"""
-        if self.ages:
-            ages_array = np.array(self.ages)
+        if self.age_counts:
             quantiles = np.linspace(0, 100, self.n_clusters + 1)[1:-1]
-            self.cluster_centers = np.percentile(ages_array, quantiles)
+            self.cluster_centers = self.age_percentiles(quantiles)
     
     def assign_cluster(self, age):
         """Assign age to nearest cluster"""
@@ -68,6 +96,36 @@ class AgeAnalysisReducer:
         distances = np.abs(self.cluster_centers - age)
         return int(np.argmin(distances))
     
+    def assign_clusters(self, ages):
+        """assign_cluster of every age in an array"""
+        ages = np.asarray(ages, dtype=float)
+        if self.cluster_centers is None:
+            return np.zeros(len(ages), dtype=np.int64)
+        return np.argmin(np.abs(self.cluster_centers[None, :] - ages[:, None]), axis=1)
+    
+    def cluster_statistics(self):
+        """Count, mean and std of the ages of each cluster, in order of first appearance"""
+        ages = np.fromiter(self.age_counts, dtype=float, count=len(self.age_counts))
+        counts = np.fromiter(self.age_counts.values(), dtype=float, count=len(self.age_counts))
+        clusters = self.assign_clusters(ages)
+        
+        n = self.n_clusters
+        cluster_counts = np.bincount(clusters, weights=counts, minlength=n)
+        sum_age = np.bincount(clusters, weights=counts * ages, minlength=n)
+        sum_squared = np.bincount(clusters, weights=counts * ages * ages, minlength=n)
+        
+        cluster_stats = {}
+        for cluster_id in dict.fromkeys(clusters.tolist()):
+            count = int(cluster_counts[cluster_id])
+            mean = float(sum_age[cluster_id]) / count
+            variance = (float(sum_squared[cluster_id]) / count) - (mean ** 2)
+            cluster_stats[cluster_id] = {
+                'count': count,
+                'mean': mean,
+                'std': np.sqrt(variance)
+            }
+        return cluster_stats
+    
     def process_input(self):
         """Process input from mapper"""
         for line in sys.stdin:
@@ -92,45 +150,22 @@ class AgeAnalysisReducer:
     
     def output_results(self):
         """Output results in JSON format"""
-        # Process all ages
-        processed_ages = []
-        for age in self.ages:
-            processed_ages.append({
-                'original': age,
-                'normalized': self.normalize_age(age),
-                'standardized': self.standardize_age(age),
-                'cluster': self.assign_cluster(age)
-            })
-        
-        # Calculate cluster statistics
-        cluster_stats = defaultdict(lambda: {'count': 0, 'sum_age': 0, 'sum_squared': 0})
-        for age_data in processed_ages:
-            cluster = age_data['cluster']
-            age = age_data['original']
-            cluster_stats[cluster]['count'] += 1
-            cluster_stats[cluster]['sum_age'] += age
-            cluster_stats[cluster]['sum_squared'] += age * age
-        
-        # Finalize cluster statistics
-        for cluster_id, stats in cluster_stats.items():
-            count = stats['count']
-            if count > 0:
-                mean = stats['sum_age'] / count
-                variance = (stats['sum_squared'] / count) - (mean ** 2)
-                cluster_stats[cluster_id] = {
-                    'count': count,
-                    'mean': mean,
-                    'std': np.sqrt(variance)
-                }
+        # Sample of the first processed ages
+        processed_ages = [{
+            'original': age,
+            'normalized': self.normalize_age(age),
+            'standardized': self.standardize_age(age),
+            'cluster': self.assign_cluster(age)
+        } for age in self.sample_ages]
         
         # Prepare final report
         report = {
             'statistics': self.stats,
             'clusters': {
-                'centers': self.cluster_centers.tolist(),
-                'stats': cluster_stats
+                'centers': [] if self.cluster_centers is None else self.cluster_centers.tolist(),
+                'stats': self.cluster_statistics()
             },
-            'processed_ages': processed_ages[:5]  # Sample of first 5 processed ages
+            'processed_ages': processed_ages
         }
         
         # Output JSON results
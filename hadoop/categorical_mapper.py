@@ -3,10 +3,14 @@
 Mapper for categorical encoding.
 Input: Tab-separated lines from Pokec profiles
 Output: Key-value pairs for one-hot encoding
-Format: category_name\tvalue\t1
+Format: category_name\tvalue\tcount (counts combined in the mapper)
 """
 
 import sys
+from streaming_combiner import InMapperCombiner
+from streaming_fields import FieldExtractor, read_fields
+
+FIELDS = FieldExtractor(['gender', 'region', 'eye_color'])
 
 def clean_gender(value):
     """Clean and standardize gender values"""
@@ -40,27 +44,30 @@ def clean_eye_color(value):
             return english
     return value
 
+def open_output(out=None):
+    """Where map_fields writes its records (flushed at end of input)"""
+    return InMapperCombiner(out=out)
+
+def map_fields(fields, combiner):
+    """Count the category values of one line's FIELDS"""
+    try:
+        gender, region, eye_color = fields
+        
+        # Count each category value (emitted once per value)
+        combiner.add(('gender', clean_gender(gender)))
+        combiner.add(('region', clean_region(region)))
+        combiner.add(('eye_color', clean_eye_color(eye_color)))
+    except Exception as e:
+        sys.stderr.write(f"Error processing line: {str(e)}\n")
+
 def main():
+    combiner = open_output()
+    
     # Read input lines from stdin
-    for line in sys.stdin:
-        try:
-            # Split line into fields
-            fields = line.strip().split('\t')
-            
-            # Extract relevant fields (gender, region, eye_color)
-            # Fields are at positions 3, 4, and 16 respectively
-            if len(fields) >= 17:
-                gender = clean_gender(fields[3])
-                region = clean_region(fields[4])
-                eye_color = clean_eye_color(fields[16])
-                
-                # Emit key-value pairs for each category
-                print(f"gender\t{gender}\t1")
-                print(f"region\t{region}\t1")
-                print(f"eye_color\t{eye_color}\t1")
-        except Exception as e:
-            sys.stderr.write(f"Error processing line: {str(e)}\n")
-            continue
+    for fields in read_fields(FIELDS):
+        map_fields(fields, combiner)
+    
+    combiner.flush()
 
 if __name__ == "__main__":
     main()
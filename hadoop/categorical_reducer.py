@@ -1,64 +1,84 @@
 #!/usr/bin/env python3
 """
 Reducer for categorical encoding.
-Input: Key-value pairs from mapper (category_name\tvalue\t1)
+Input: Key-value pairs from mapper (category_name\tvalue\tcount)
 Output: One-hot encoded counts for each category
+
+With --partial the reducer prints its partial counts as one JSON line
+instead, so a job can run with many reduce tasks and merge_parts.py can
+combine the part-* files into the final output.
 """
 
 import sys
 from collections import defaultdict
 import json
 
-def main():
-    current_category = None
-    category_counts = defaultdict(int)
-    category_values = defaultdict(set)
-    
-    # Read input key-value pairs from stdin
-    for line in sys.stdin:
+class PartialState:
+    """Counts per category value seen by one reduce task."""
+
+    def __init__(self):
+        self.category_counts = defaultdict(lambda: defaultdict(int))
+
+    def add_line(self, line):
+        category, value, count = line.strip().split('\t')
+        self.category_counts[category][value] += int(count)
+
+    def merge(self, other):
+        for category, counts in other.category_counts.items():
+            for value, count in counts.items():
+                self.category_counts[category][value] += count
+        return self
+
+    def to_dict(self):
+        return {'category_counts': self.category_counts}
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        for category, counts in data['category_counts'].items():
+            state.category_counts[category].update(counts)
+        return state
+
+def read_state(lines):
+    """Fold mapper output lines into a PartialState."""
+    state = PartialState()
+    for line in lines:
         try:
-            # Parse input
-            category, value, count = line.strip().split('\t')
-            count = int(count)
-            
-            # If we encounter a new category, output the previous category's counts
-            if current_category and current_category != category:
-                # Output one-hot encoded counts for the previous category
-                output = {
-                    'category': current_category,
-                    'total_records': sum(category_counts.values()),
-                    'unique_values': len(category_counts),
-                    'value_counts': dict(category_counts)
-                }
-                print(json.dumps(output))
-                
-                # Reset counts for new category
-                category_counts = defaultdict(int)
-            
-            # Update current category and counts
-            current_category = category
-            category_counts[value] += count
-            category_values[category].add(value)
-            
+            state.add_line(line)
         except Exception as e:
             sys.stderr.write(f"Error processing line: {str(e)}\n")
             continue
-    
-    # Output the last category
-    if current_category:
+    return state
+
+def render(state):
+    """One JSON line per category, then the summary line."""
+    lines = []
+    for category in sorted(state.category_counts):
+        category_counts = state.category_counts[category]
         output = {
-            'category': current_category,
+            'category': category,
             'total_records': sum(category_counts.values()),
             'unique_values': len(category_counts),
-            'value_counts': dict(category_counts)
+            'value_counts': dict(sorted(category_counts.items()))
         }
-        print(json.dumps(output))
-    
+        lines.append(json.dumps(output))
+
     # Output summary statistics
     summary = {
-        'categories': list(category_values.keys()),
+        'categories': sorted(state.category_counts),
         'unique_values_per_category': {
-            cat: len(values) for cat, values in category_values.items()
+            cat: len(values) for cat, values in sorted(state.category_counts.items())
         }
     }
-    print("SUMMARY: " + json.dumps(summary))
+    lines.append("SUMMARY: " + json.dumps(summary))
+    return '\n'.join(lines)
+
+def main():
+    state = read_state(sys.stdin)
+    if '--partial' in sys.argv[1:]:
+        print(json.dumps(state.to_dict()))
+    else:
+        print(render(state))
+
+if __name__ == "__main__":
+    main()
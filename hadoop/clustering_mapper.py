@@ -4,7 +4,10 @@ Mapper for clustering analysis of user age and completion percentage
 Input format: tab-separated values with user profile data
 """
 import sys
-import json
+from streaming_codec import CLUSTERING, StreamingCodec
+from streaming_fields import FieldExtractor, read_fields
+
+FIELDS = FieldExtractor(['AGE', 'completion_percentage'])
 
 # Pre-defined cluster centers (based on previous analysis)
 AGE_CLUSTERS = {
@@ -41,14 +44,15 @@ def assign_cluster(age):
             
     return nearest_cluster
 
-def process_line(line):
-    """Process a single line of input data"""
+def open_output(out=None):
+    """Where map_fields writes its records"""
+    return StreamingCodec(*CLUSTERING, out=out)
+
+def map_fields(fields, codec):
+    """Process one line's FIELDS"""
     try:
-        fields = line.strip().split('\t')
-        
         # Extract and clean age and completion percentage
-        age = clean_numeric(fields[7])  # AGE column
-        completion = clean_numeric(fields[2])  # completion_percentage column
+        age, completion = (clean_numeric(value) for value in fields)
         
         if age is not None and completion is not None:
             # Validate age range
@@ -56,24 +60,25 @@ def process_line(line):
                 cluster = assign_cluster(age)
                 if cluster is not None:
                     # Emit cluster statistics
-                    print(f"CLUSTER\t{json.dumps({
+                    codec.emit('CLUSTER', {
                         'cluster': cluster,
                         'age': age,
                         'completion': completion
-                    })}")
+                    })
                     
                 # Emit overall age statistics for verification
-                print(f"AGE_STATS\t{json.dumps({
+                codec.emit('AGE_STATS', {
                     'age': age,
                     'completion': completion
-                })}")
+                })
                 
     except Exception as e:
         return  # Skip malformed lines
 
 def main():
-    for line in sys.stdin:
-        process_line(line)
+    codec = open_output()
+    for fields in read_fields(FIELDS):
+        map_fields(fields, codec)
 
 if __name__ == "__main__":
     main()
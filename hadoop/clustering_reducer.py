@@ -2,24 +2,34 @@
 """
 Reducer for clustering analysis of user age and completion percentage
 """
+import os
 import sys
-import json
 from collections import defaultdict
 import math
 
+# Shared helpers live in the project root (shipped alongside with -file on Hadoop)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from streaming_stats import DenseHistogram
+from streaming_codec import CLUSTERING, StreamingCodec
+
+# Completion percentages are whole numbers from 0 to 100
+COMPLETION_RANGE = (0, 100)
+
 class ClusterStats:
     """Calculate statistics for a cluster"""
     def __init__(self):
-        self.ages = []
-        self.completions = []
+        self.age_min = float('inf')
+        self.age_max = float('-inf')
+        self.completions = DenseHistogram(*COMPLETION_RANGE)
         self.count = 0
         self.age_sum = 0
         self.completion_sum = 0
         self.completion_sum_sq = 0
         
     def add_point(self, age, completion):
-        self.ages.append(age)
-        self.completions.append(completion)
+        self.completions.update(completion)
+        self.age_min = min(self.age_min, age)
+        self.age_max = max(self.age_max, age)
         self.count += 1
         self.age_sum += age
         self.completion_sum += completion
@@ -37,21 +47,12 @@ class ClusterStats:
         variance = (self.completion_sum_sq / self.count) - (mean_completion * mean_completion)
         std_dev = math.sqrt(variance) if variance > 0 else 0
         
-        # Calculate median completion
-        self.completions.sort()
-        if self.count % 2 == 0:
-            median = (self.completions[self.count//2-1] + self.completions[self.count//2]) / 2
-        else:
-            median = self.completions[self.count//2]
-            
-        # Calculate age range
-        self.ages.sort()
-        age_min = self.ages[0]
-        age_max = self.ages[-1]
+        # Exact median completion from the histogram
+        median = self.completions.median()
         
         return {
             'count': self.count,
-            'age_range': {'min': age_min, 'max': age_max},
+            'age_range': {'min': self.age_min, 'max': self.age_max},
             'mean_age': round(mean_age, 1),
             'completion': {
                 'mean': round(mean_completion, 2),
@@ -63,26 +64,30 @@ class ClusterStats:
 class OverallStats:
     """Calculate overall statistics"""
     def __init__(self):
-        self.ages = []
-        self.completions = []
+        self.count = 0
+        self.age_min = self.completion_min = float('inf')
+        self.age_max = self.completion_max = float('-inf')
         
     def add_point(self, age, completion):
-        self.ages.append(age)
-        self.completions.append(completion)
+        self.count += 1
+        self.age_min = min(self.age_min, age)
+        self.age_max = max(self.age_max, age)
+        self.completion_min = min(self.completion_min, completion)
+        self.completion_max = max(self.completion_max, completion)
         
     def get_stats(self):
-        if not self.ages:
+        if not self.count:
             return None
             
         return {
-            'total_users': len(self.ages),
+            'total_users': self.count,
             'age_range': {
-                'min': min(self.ages),
-                'max': max(self.ages)
+                'min': self.age_min,
+                'max': self.age_max
             },
             'completion_range': {
-                'min': min(self.completions),
-                'max': max(self.completions)
+                'min': self.completion_min,
+                'max': self.completion_max
             }
         }
 
@@ -133,12 +138,12 @@ def main():
     # Initialize statistics collectors
     cluster_stats = defaultdict(ClusterStats)
     overall_stats = OverallStats()
+    codec = StreamingCodec(*CLUSTERING)
     
     # Process input from mapper
     for line in sys.stdin:
         try:
-            key, value = line.strip().split('\t')
-            data = json.loads(value)
+            key, data = codec.parse(line)
             
             if key == 'CLUSTER':
                 # Add data to cluster statistics
@@ -7,9 +7,14 @@ Input format: tab-separated values where:
 - column 2: completion_percentage
 - column 3: gender
 - column 7: age
+Output: KIND\tfields...\tcount, counts combined in the mapper (completion,
+age, gender and public take few distinct values)
 """
 import sys
-import json
+from streaming_combiner import InMapperCombiner
+from streaming_fields import FieldExtractor, read_fields
+
+FIELDS = FieldExtractor(['user_id', 'public', 'completion_percentage', 'gender', 'AGE'])
 
 def is_valid_age(age):
     """Validate age is within reasonable range"""
@@ -36,19 +41,14 @@ def get_age_group(age):
     except:
         return None
 
-for line in sys.stdin:
+def open_output(out=None):
+    """Where map_fields writes its records (flushed at end of input)"""
+    return InMapperCombiner(out=out)
+
+def map_fields(fields, combiner):
+    """Emit the correlation records for one line's FIELDS"""
     try:
-        # Remove leading/trailing whitespace and split by tab
-        fields = line.strip().split('\t')
-        
-        if len(fields) < 8:  # Ensure we have enough fields
-            continue
-            
-        user_id = fields[0]
-        public = fields[1]
-        completion_percentage = fields[2]
-        gender = fields[3]
-        age = fields[7]
+        user_id, public, completion_percentage, gender, age = fields
         
         # Convert to numeric values
         try:
@@ -56,30 +56,41 @@ for line in sys.stdin:
             public = int(public)
             gender = float(gender)
         except:
-            continue
+            return
             
-        # Emit data for overall completion percentage statistics
-        print(f"COMPLETION_STATS\t{completion_percentage}")
+        completion = str(completion_percentage)
         
-        # Emit data for correlation analysis
+        # Count data for overall completion percentage statistics
+        combiner.add(('COMPLETION_STATS', completion))
+        
+        # Count data for correlation analysis
         if public in [0, 1]:
-            print(f"CORRELATION\tpublic\t{public}\t{completion_percentage}")
+            combiner.add(('CORRELATION', 'public', str(public), completion))
             
         if gender in [0, 1]:
-            print(f"CORRELATION\tgender\t{gender}\t{completion_percentage}")
+            combiner.add(('CORRELATION', 'gender', str(gender), completion))
             
         if is_valid_age(age):
             age_val = int(age)
-            print(f"CORRELATION\tage\t{age_val}\t{completion_percentage}")
+            combiner.add(('CORRELATION', 'age', str(age_val), completion))
             
-            # Emit data for age group analysis
+            # Count data for age group analysis
             age_group = get_age_group(age_val)
             if age_group:
-                print(f"AGE_GROUP\t{age_group}\t{completion_percentage}")
+                combiner.add(('AGE_GROUP', age_group, completion))
         
-        # Emit data for gender-specific analysis
+        # Count data for gender-specific analysis
         if gender in [0, 1]:
-            print(f"GENDER_COMPLETION\t{gender}\t{completion_percentage}")
+            combiner.add(('GENDER_COMPLETION', str(gender), completion))
             
     except Exception as e:
-        continue  # Skip malformed lines
+        return  # Skip malformed lines
+
+def main():
+    combiner = open_output()
+    for fields in read_fields(FIELDS):
+        map_fields(fields, combiner)
+    combiner.flush()
+
+if __name__ == "__main__":
+    main()
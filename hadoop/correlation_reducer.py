@@ -1,51 +1,66 @@
 #!/usr/bin/env python3
 """
 Reducer for analyzing correlations between completion_percentage and other features
+
+With --partial the reducer prints its partial statistics as one JSON line
+instead of the report, so the job can run with many reduce tasks and
+merge_parts.py can combine the part-* files into the final report.
 """
+import os
 import sys
 import json
 from collections import defaultdict
 import math
 
+# Shared helpers live in the project root (shipped alongside with -file on Hadoop)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from streaming_stats import DenseHistogram
+
+# Completion percentages are whole numbers from 0 to 100
+COMPLETION_RANGE = (0, 100)
+
 class StatisticsCalculator:
+    """Exact completion statistics from a histogram of the 101 possible values"""
     def __init__(self):
-        self.count = 0
-        self.sum = 0
-        self.sum_squares = 0
-        self.values = []
-        self.min_val = float('inf')
-        self.max_val = float('-inf')
+        self.histogram = DenseHistogram(*COMPLETION_RANGE)
+    
+    @property
+    def count(self):
+        return self.histogram.count
+    
+    def add_value(self, value, count=1):
+        self.histogram.update(value, count)
+    
+    def merge(self, other):
+        self.histogram.merge(other.histogram)
+        return self
     
-    def add_value(self, value):
-        self.count += 1
-        self.sum += value
-        self.sum_squares += value * value
-        self.values.append(value)
-        self.min_val = min(self.min_val, value)
-        self.max_val = max(self.max_val, value)
+    def to_dict(self):
+        return self.histogram.to_dict()
+    
+    @classmethod
+    def from_dict(cls, data):
+        calc = cls()
+        calc.histogram = DenseHistogram.from_dict(data)
+        return calc
     
     def get_stats(self):
-        if self.count == 0:
+        histogram = self.histogram
+        count = histogram.count
+        if count == 0:
             return None
             
-        mean = self.sum / self.count
-        variance = (self.sum_squares / self.count) - (mean * mean)
+        mean = histogram.total / count
+        variance = (histogram.sum_squares / count) - (mean * mean)
         std_dev = math.sqrt(variance) if variance > 0 else 0
-        
-        # Calculate median
-        self.values.sort()
-        if self.count % 2 == 0:
-            median = (self.values[self.count//2-1] + self.values[self.count//2]) / 2
-        else:
-            median = self.values[self.count//2]
             
         return {
-            'count': self.count,
+            'count': count,
             'mean': round(mean, 2),
-            'median': round(median, 2),
+            'median': round(histogram.median(), 2),
             'std_dev': round(std_dev, 2),
-            'min': round(self.min_val, 2),
-            'max': round(self.max_val, 2)
+            'min': round(float(histogram.min), 2),
+            'max': round(float(histogram.max), 2)
         }
 
 class CorrelationCalculator:
@@ -57,13 +72,27 @@ class CorrelationCalculator:
         self.sum_y2 = 0
         self.n = 0
     
-    def add_pair(self, x, y):
-        self.sum_x += x
-        self.sum_y += y
-        self.sum_xy += x * y
-        self.sum_x2 += x * x
-        self.sum_y2 += y * y
-        self.n += 1
+    def add_pair(self, x, y, count=1):
+        self.sum_x += x * count
+        self.sum_y += y * count
+        self.sum_xy += x * y * count
+        self.sum_x2 += x * x * count
+        self.sum_y2 += y * y * count
+        self.n += count
+    
+    def merge(self, other):
+        for name, value in vars(other).items():
+            setattr(self, name, getattr(self, name) + value)
+        return self
+    
+    def to_dict(self):
+        return dict(vars(self))
+    
+    @classmethod
+    def from_dict(cls, data):
+        calc = cls()
+        vars(calc).update(data)
+        return calc
     
     def get_correlation(self):
         if self.n == 0:
@@ -80,43 +109,92 @@ class CorrelationCalculator:
             
         return round(numerator / denominator, 3)
 
-# Initialize data structures
-completion_stats = StatisticsCalculator()
-correlations = defaultdict(CorrelationCalculator)
-gender_stats = defaultdict(StatisticsCalculator)
-age_group_stats = defaultdict(StatisticsCalculator)
+# Value fields of each record, before the optional count
+RECORD_FIELDS = {'COMPLETION_STATS': 1, 'CORRELATION': 3, 'GENDER_COMPLETION': 2, 'AGE_GROUP': 2}
+
+class PartialState:
+    """Everything one reduce task has aggregated; mergeable across tasks."""
 
-# Process input from mapper
-for line in sys.stdin:
-    try:
+    def __init__(self):
+        self.completion_stats = StatisticsCalculator()
+        self.correlations = defaultdict(CorrelationCalculator)
+        self.gender_stats = defaultdict(StatisticsCalculator)
+        self.age_group_stats = defaultdict(StatisticsCalculator)
+
+    def add_line(self, line):
         key, *values = line.strip().split('\t')
+        # Records end in a count when the mapper combined them
+        count = int(values.pop()) if len(values) == RECORD_FIELDS.get(key, 0) + 1 else 1
         
         if key == 'COMPLETION_STATS':
-            completion_stats.add_value(float(values[0]))
+            self.completion_stats.add_value(float(values[0]), count)
             
         elif key == 'CORRELATION':
             feature, value, completion = values
-            correlations[feature].add_pair(float(value), float(completion))
+            self.correlations[feature].add_pair(float(value), float(completion), count)
             
         elif key == 'GENDER_COMPLETION':
             gender, completion = values
-            gender_stats[gender].add_value(float(completion))
+            self.gender_stats[gender].add_value(float(completion), count)
             
         elif key == 'AGE_GROUP':
             age_group, completion = values
-            age_group_stats[age_group].add_value(float(completion))
-            
-    except Exception as e:
-        continue
+            self.age_group_stats[age_group].add_value(float(completion), count)
+
+    def merge(self, other):
+        self.completion_stats.merge(other.completion_stats)
+        for mine, theirs in [(self.correlations, other.correlations),
+                             (self.gender_stats, other.gender_stats),
+                             (self.age_group_stats, other.age_group_stats)]:
+            for key, calc in theirs.items():
+                mine[key].merge(calc)
+        return self
+
+    def to_dict(self):
+        return {
+            'completion_stats': self.completion_stats.to_dict(),
+            'correlations': {k: c.to_dict() for k, c in self.correlations.items()},
+            'gender_stats': {k: c.to_dict() for k, c in self.gender_stats.items()},
+            'age_group_stats': {k: c.to_dict() for k, c in self.age_group_stats.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        state.completion_stats = StatisticsCalculator.from_dict(data['completion_stats'])
+        for name, calc_class in [('correlations', CorrelationCalculator),
+                                 ('gender_stats', StatisticsCalculator),
+                                 ('age_group_stats', StatisticsCalculator)]:
+            target = getattr(state, name)
+            for key, calc in data[name].items():
+                target[key] = calc_class.from_dict(calc)
+        return state
+
+def read_state(lines):
+    """Fold mapper output lines into a PartialState."""
+    state = PartialState()
+    for line in lines:
+        try:
+            state.add_line(line)
+        except Exception as e:
+            continue
+    return state
 
-# Generate report
-report = """# Profile Completion Correlation Analysis Report
+def render(state):
+    """The markdown report, wrapped in the start/end markers."""
+    completion_stats = state.completion_stats
+    correlations = state.correlations
+    gender_stats = state.gender_stats
+    age_group_stats = state.age_group_stats
+
+    # Generate report
+    report = """# Profile Completion Correlation Analysis Report
 
 ## Overall Completion Percentage Statistics"""
 
-stats = completion_stats.get_stats()
-if stats:
-    report += f"""
+    stats = completion_stats.get_stats()
+    if stats:
+        report += f"""
 - Mean: {stats['mean']}%
 - Median: {stats['median']}%
 - Standard Deviation: {stats['std_dev']}%
@@ -124,31 +202,39 @@ if stats:
 
 ## Correlations with Completion Percentage"""
 
-    for feature, calc in correlations.items():
-        correlation = calc.get_correlation()
-        report += f"\n- {feature}: {correlation}"
+        for feature, calc in sorted(correlations.items()):
+            correlation = calc.get_correlation()
+            report += f"\n- {feature}: {correlation}"
 
-    report += "\n\n## Completion Percentage by Gender"
-    for gender, calc in gender_stats.items():
-        stats = calc.get_stats()
-        if stats:
-            report += f"""
+        report += "\n\n## Completion Percentage by Gender"
+        for gender, calc in sorted(gender_stats.items()):
+            stats = calc.get_stats()
+            if stats:
+                report += f"""
 - Gender {gender}:
   - Mean: {stats['mean']}%
   - Median: {stats['median']}%
   - Count: {stats['count']:,}"""
 
-    report += "\n\n## Completion Percentage by Age Group"
-    for age_group in ['<20', '20-30', '30-40', '40-50', '>50']:
-        stats = age_group_stats[age_group].get_stats()
-        if stats:
-            report += f"""
+        report += "\n\n## Completion Percentage by Age Group"
+        for age_group in ['<20', '20-30', '30-40', '40-50', '>50']:
+            stats = age_group_stats[age_group].get_stats()
+            if stats:
+                report += f"""
 - Age {age_group}:
   - Mean: {stats['mean']}%
   - Median: {stats['median']}%
   - Count: {stats['count']:,}"""
 
-# Print report in a format that can be easily parsed
-print("###START_REPORT###")
-print(report)
-print("###END_REPORT###")
+    # Report in a format that can be easily parsed
+    return f"###START_REPORT###\n{report}\n###END_REPORT###"
+
+def main():
+    state = read_state(sys.stdin)
+    if '--partial' in sys.argv[1:]:
+        print(json.dumps(state.to_dict()))
+    else:
+        print(render(state))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Run a Hadoop Streaming mapper/reducer pair on one machine, no cluster needed.
+
+The input file is cut into byte-range splits read with Hadoop's line
+record reader semantics (a split owns every line that starts inside it).
+Mapper processes run in parallel, one per split; each map task partitions
+its output on the key fields, sorts it in memory and spills sorted runs to
+local disk. Each reduce task then merges its runs and pipes them into a
+reducer process writing part-NNNNN in the output directory, just as
+`hadoop jar hadoop-streaming.jar` would. Records are ordered by whole-line
+bytes, the same order as `LC_ALL=C sort`, which also groups equal keys.
+
+Timings of the map, sort/spill and merge/reduce phases go to stderr.
+
+Usage:
+  local_streaming.py --input data/soc-pokec-profiles.txt --output out/correlations \\
+      --mapper "python3 hadoop/correlation_mapper.py" \\
+      --reducer "python3 hadoop/correlation_reducer.py --partial" \\
+      --num-reduce-tasks 4 --key-fields 2
+"""
+import argparse
+import heapq
+import math
+import multiprocessing as mp
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+# Default split size, matching a common HDFS block size
+SPLIT_SIZE = 128 * 1024 * 1024
+# Map output buffered per task before a sorted run is spilled (like io.sort.mb)
+SPILL_BYTES = 100 * 1024 * 1024
+# Bytes handed to a mapper's stdin per write
+BLOCK_SIZE = 1024 * 1024
+
+def input_splits(path, split_size=SPLIT_SIZE):
+    """(start, stop) byte ranges covering ``path``."""
+    size = os.path.getsize(path)
+    return [(start, min(start + split_size, size)) for start in range(0, size, split_size)]
+
+def read_split(path, start, stop, block_size=BLOCK_SIZE):
+    """Yield the bytes of the whole lines that start in [start, stop)."""
+    with open(path, 'rb') as f:
+        if start > 0:
+            # Skip to just past the newline that ends the previous split's last line
+            f.seek(start - 1)
+            f.readline()
+        position = f.tell()
+        while position < stop:
+            data = f.read(min(block_size, stop - position))
+            if not data:
+                break
+            position += len(data)
+            if position >= stop and not data.endswith(b'\n'):
+                data += f.readline()
+            yield data
+
+def partition_of(line, fields, n_partitions):
+    """Reduce task of a record, from a stable hash of its first ``fields`` fields."""
+    key = b'\t'.join(line.rstrip(b'\n').split(b'\t', fields)[:fields])
+    return zlib.crc32(key) % n_partitions
+
+def _feed(proc, chunks, counter):
+    """Write ``chunks`` to the stdin of ``proc``, counting the bytes."""
+    try:
+        for chunk in chunks:
+            proc.stdin.write(chunk)
+            counter[0] += len(chunk)
+    except BrokenPipeError:
+        pass
+    finally:
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+
+def _environment(cmdenv):
+    env = dict(os.environ)
+    env.update(cmdenv)
+    return env
+
+def run_map_task(task):
+    """Run the mapper over one split; sorted runs per partition plus counters."""
+    (index, path, start, stop, mapper, cmdenv, n_reducers,
+     partition_fields, spill_bytes, work_dir, output_dir) = task
+    started = time.perf_counter()
+    env = _environment(cmdenv)
+    env['mapreduce_task_partition'] = str(index)
+    proc = subprocess.Popen(mapper, shell=True, stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, env=env)
+    bytes_in = [0]
+    feeder = threading.Thread(target=_feed, args=(proc, read_split(path, start, stop), bytes_in))
+    feeder.start()
+
+    records = 0
+    sort_time = 0.0
+    runs = [[] for _ in range(n_reducers)]
+    if n_reducers == 0:
+        # Map-only job: mapper output is the job output
+        with open(os.path.join(output_dir, f'part-m-{index:05d}'), 'wb') as out:
+            for line in proc.stdout:
+                out.write(line if line.endswith(b'\n') else line + b'\n')
+                records += 1
+    else:
+        buffers = [[] for _ in range(n_reducers)]
+        buffered = 0
+
+        def spill():
+            nonlocal buffered, sort_time
+            spill_started = time.perf_counter()
+            for partition, lines in enumerate(buffers):
+                if not lines:
+                    continue
+                lines.sort()
+                run = os.path.join(work_dir, f'map-{index:05d}-{partition:05d}-{len(runs[partition])}')
+                with open(run, 'wb') as f:
+                    f.writelines(lines)
+                runs[partition].append(run)
+                lines.clear()
+            buffered = 0
+            sort_time += time.perf_counter() - spill_started
+
+        for line in proc.stdout:
+            if not line.endswith(b'\n'):
+                line += b'\n'
+            buffers[partition_of(line, partition_fields, n_reducers)].append(line)
+            records += 1
+            buffered += len(line)
+            if buffered >= spill_bytes:
+                spill()
+        spill()
+
+    feeder.join()
+    if proc.wait() != 0:
+        raise RuntimeError(f"map task {index} failed: '{mapper}' exited with {proc.returncode}")
+    return {
+        'runs': runs,
+        'bytes_in': bytes_in[0],
+        'records_out': records,
+        'map_time': time.perf_counter() - started - sort_time,
+        'sort_time': sort_time
+    }
+
+def run_reduce_task(task):
+    """Merge one partition's sorted runs into the reducer; counters."""
+    index, runs, reducer, cmdenv, output_dir = task
+    started = time.perf_counter()
+    env = _environment(cmdenv)
+    env['mapreduce_task_partition'] = str(index)
+    records = 0
+    files = [open(run, 'rb') for run in runs]
+    try:
+        with open(os.path.join(output_dir, f'part-{index:05d}'), 'wb') as out:
+            proc = subprocess.Popen(reducer, shell=True, stdin=subprocess.PIPE,
+                                    stdout=out, env=env)
+            try:
+                for line in heapq.merge(*files):
+                    proc.stdin.write(line)
+                    records += 1
+            except BrokenPipeError:
+                pass
+            finally:
+                try:
+                    proc.stdin.close()
+                except BrokenPipeError:
+                    pass
+            if proc.wait() != 0:
+                raise RuntimeError(f"reduce task {index} failed: '{reducer}' exited with {proc.returncode}")
+    finally:
+        for f in files:
+            f.close()
+    return {'records_in': records, 'reduce_time': time.perf_counter() - started}
+
+def run_job(input_path, output_dir, mapper, reducer=None, n_reducers=1, key_fields=1,
+            partition_fields=None, cmdenv=None, split_size=SPLIT_SIZE, n_workers=None,
+            spill_bytes=SPILL_BYTES, tmp_dir=None):
+    """Run a streaming job locally; returns the per-phase timings and counters."""
+    if reducer is None:
+        n_reducers = 0
+    partition_fields = partition_fields or key_fields
+    n_workers = n_workers or os.cpu_count()
+    os.makedirs(output_dir, exist_ok=False)
+    work_dir = tempfile.mkdtemp(prefix='local-streaming-', dir=tmp_dir)
+    cmdenv = dict(cmdenv or {})
+    stats = {}
+    started = time.perf_counter()
+    try:
+        with mp.Pool(n_workers) as pool:
+            splits = input_splits(input_path, split_size)
+            map_tasks = [
+                (index, input_path, start, stop, mapper, cmdenv, n_reducers,
+                 partition_fields, spill_bytes, work_dir, output_dir)
+                for index, (start, stop) in enumerate(splits)
+            ]
+            phase_started = time.perf_counter()
+            map_results = pool.map(run_map_task, map_tasks, chunksize=1)
+            stats['map'] = {
+                'tasks': len(map_tasks),
+                'wall': time.perf_counter() - phase_started,
+                'task_time': sum(r['map_time'] for r in map_results),
+                'sort_time': sum(r['sort_time'] for r in map_results),
+                'bytes_in': sum(r['bytes_in'] for r in map_results),
+                'records_out': sum(r['records_out'] for r in map_results),
+                'runs': sum(len(runs) for r in map_results for runs in r['runs'])
+            }
+
+            if n_reducers:
+                reduce_tasks = [
+                    (index, [run for r in map_results for run in r['runs'][index]],
+                     reducer, cmdenv, output_dir)
+                    for index in range(n_reducers)
+                ]
+                phase_started = time.perf_counter()
+                reduce_results = pool.map(run_reduce_task, reduce_tasks, chunksize=1)
+                stats['reduce'] = {
+                    'tasks': n_reducers,
+                    'wall': time.perf_counter() - phase_started,
+                    'task_time': sum(r['reduce_time'] for r in reduce_results),
+                    'records_in': sum(r['records_in'] for r in reduce_results)
+                }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    stats['wall'] = time.perf_counter() - started
+    return stats
+
+def format_stats(stats):
+    """Human-readable per-phase timings."""
+    m = stats['map']
+    lines = [
+        f"map     {m['tasks']:>5} tasks  wall {m['wall']:8.2f}s  task time {m['task_time']:8.2f}s"
+        f"  input {m['bytes_in'] / 2**20:,.1f} MiB  output {m['records_out']:,} records",
+        f"sort                 task time {m['sort_time']:8.2f}s  spilled {m['runs']} runs"
+    ]
+    if 'reduce' in stats:
+        r = stats['reduce']
+        lines.append(
+            f"reduce  {r['tasks']:>5} tasks  wall {r['wall']:8.2f}s  task time {r['task_time']:8.2f}s"
+            f"  input {r['records_in']:,} records"
+        )
+    lines.append(f"total                wall {stats['wall']:8.2f}s")
+    return '\n'.join(lines)
+
+def parse_cmdenv(values):
+    env = {}
+    for value in values:
+        name, sep, setting = value.partition('=')
+        if not sep:
+            raise argparse.ArgumentTypeError(f"--cmdenv expects NAME=VALUE, got {value}")
+        env[name] = setting
+    return env
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a Hadoop Streaming job locally.")
+    parser.add_argument('--input', required=True, help="input file")
+    parser.add_argument('--output', required=True, help="output directory (must not exist)")
+    parser.add_argument('--mapper', required=True, help="mapper command")
+    parser.add_argument('--reducer', help="reducer command (map-only job when omitted)")
+    parser.add_argument('--num-reduce-tasks', type=int, default=1)
+    parser.add_argument('--key-fields', type=int, default=1,
+                        help="leading tab-separated fields forming the key")
+    parser.add_argument('--partition-fields', type=int,
+                        help="leading key fields hashed to pick a reducer (default: all)")
+    parser.add_argument('--cmdenv', action='append', default=[], metavar='NAME=VALUE',
+                        help="environment variable for the mapper and reducer")
+    parser.add_argument('--split-size', type=int, default=SPLIT_SIZE, help="bytes per map task")
+    parser.add_argument('--num-map-tasks', type=int,
+                        help="split the input evenly into this many map tasks instead")
+    parser.add_argument('--workers', type=int, help="parallel tasks (default: CPU count)")
+    parser.add_argument('--spill-mb', type=int, default=SPILL_BYTES // 2**20,
+                        help="map output buffered before a sorted run is spilled")
+    parser.add_argument('--tmp-dir', help="directory for spilled runs")
+    args = parser.parse_args()
+
+    split_size = args.split_size
+    if args.num_map_tasks:
+        split_size = max(1, math.ceil(os.path.getsize(args.input) / args.num_map_tasks))
+    try:
+        stats = run_job(args.input, args.output, args.mapper, args.reducer,
+                        n_reducers=args.num_reduce_tasks, key_fields=args.key_fields,
+                        partition_fields=args.partition_fields,
+                        cmdenv=parse_cmdenv(args.cmdenv), split_size=split_size,
+                        n_workers=args.workers, spill_bytes=args.spill_mb * 2**20,
+                        tmp_dir=args.tmp_dir)
+    except (RuntimeError, FileExistsError, argparse.ArgumentTypeError) as e:
+        sys.stderr.write(f"{e}\n")
+        sys.exit(1)
+    sys.stderr.write(format_stats(stats) + '\n')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Merge the part-* outputs of a multi-reducer streaming job into its report.
+
+Each reduce task runs its reducer with --partial and writes one JSON line
+of partial state; this script merges those states with the reducer's own
+PartialState.merge and prints what a single reducer would have printed.
+
+Usage: merge_parts.py JOB [PART_FILE ...]   (reads stdin without files)
+  hadoop fs -cat /user/pokec/output/correlations/part-* | merge_parts.py correlation
+"""
+import fileinput
+import importlib
+import json
+import sys
+
+# Jobs whose reducer supports --partial, by reducer module
+REDUCERS = {
+    'categorical': 'categorical_reducer',
+    'correlation': 'correlation_reducer',
+    'user_features': 'user_features_reducer'
+}
+
+def merge(job, lines):
+    """Final report of ``job`` from the partial-state lines of its reducers."""
+    module = importlib.import_module(REDUCERS[job])
+    merged = module.PartialState()
+    for line in lines:
+        if line.strip():
+            merged.merge(module.PartialState.from_dict(json.loads(line)))
+    return module.render(merged)
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in REDUCERS:
+        sys.stderr.write(f"Usage: {sys.argv[0]} {{{','.join(REDUCERS)}}} [PART_FILE ...]\n")
+        sys.exit(2)
+    print(merge(sys.argv[1], fileinput.input(sys.argv[2:])))
+
+if __name__ == "__main__":
+    main()
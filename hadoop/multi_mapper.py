@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Single-pass mapper running several analyses over one scan of the input
+Input: Tab-separated lines from Pokec profiles
+Output: Each analysis' mapper records, prefixed with the analysis name:
+
+    age\tstats\t{"age": 24.0, "count": 1}
+    categorical\tgender\tmale\t9149
+
+Every input line is split once, as far as the selected analyses need,
+and each analysis' FIELDS are handed to its map_fields; multi_reducer.py
+routes the records back to the matching reducers. Analyses are chosen on the command line or with
+-cmdenv ANALYSES=age,outlier (default: all of them).
+"""
+import importlib
+import os
+import sys
+from streaming_fields import read_lines
+
+# Analyses whose <name>_mapper.py / <name>_reducer.py can share a scan
+ANALYSES = ('age', 'categorical', 'correlation', 'clustering', 'outlier',
+            'multilabel', 'registration_duration', 'user_features')
+
+class PrefixedOutput:
+    """Writes each record line after the name of its analysis"""
+
+    def __init__(self, name, out):
+        self.prefix = name + '\t'
+        self.out = out
+
+    def write(self, line):
+        self.out.write(self.prefix + line)
+
+def selected_analyses(names=()):
+    """Analyses named in ``names`` or ANALYSES, all of them when neither is set"""
+    names = list(names) or [name for name in os.environ.get('ANALYSES', '').split(',') if name]
+    unknown = [name for name in names if name not in ANALYSES]
+    if unknown:
+        raise ValueError(f"unknown analyses: {', '.join(unknown)}")
+    return names or list(ANALYSES)
+
+def open_mappers(names, out=None):
+    """(fields, map_fields, output) of each named analysis, writing prefixed records to ``out``"""
+    out = out or sys.stdout
+    mappers = []
+    for name in names:
+        module = importlib.import_module(f'{name}_mapper')
+        mappers.append((module.FIELDS, module.map_fields,
+                        module.open_output(PrefixedOutput(name, out))))
+    return mappers
+
+def main():
+    try:
+        names = selected_analyses(sys.argv[1:])
+    except ValueError as e:
+        sys.stderr.write(f"{e}\nAnalyses: {', '.join(ANALYSES)}\n")
+        sys.exit(2)
+    mappers = open_mappers(names)
+    # Split each line once, as far as the analysis needing most fields
+    split = max((fields for fields, _, _ in mappers), key=lambda fields: fields.min_fields).split
+
+    for line in read_lines():
+        parts = split(line)
+        for fields, map_fields, output in mappers:
+            picked = fields.pick(parts)
+            if picked is not None:
+                map_fields(picked, output)
+
+    # Write out what the combining and summarizing mappers still hold
+    for _, _, output in mappers:
+        flush = getattr(output, 'flush', None)
+        if flush is not None:
+            flush()
+
+if __name__ == "__main__":
+    main()
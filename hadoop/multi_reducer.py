@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Routing reducer for multi_mapper.py
+Input: analysis\trecord lines, sorted so each analysis' records are
+contiguous and in key order (partition on the first key field so one
+reduce task sees all of an analysis)
+Output: Each analysis' reducer output, every line prefixed with the
+analysis name; split a job's output with e.g.
+
+    hadoop fs -cat .../part-* | grep -P '^age\\t' | cut -f2-
+
+The records of each analysis are piped, prefix removed, into its own
+<analysis>_reducer.py, so the reports match the single-analysis jobs.
+"""
+import itertools
+import os
+import subprocess
+import sys
+import tempfile
+from multi_mapper import ANALYSES
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def analysis_of(line):
+    return line.partition('\t')[0]
+
+def run_reducer(name, records, out):
+    """Feed ``records`` to the reducer of ``name`` and write its output prefixed; exit status"""
+    script = os.path.join(SCRIPT_DIR, f'{name}_reducer.py')
+    with tempfile.TemporaryFile('w+') as result:
+        proc = subprocess.Popen([sys.executable, script], stdin=subprocess.PIPE,
+                                stdout=result, text=True)
+        try:
+            proc.stdin.writelines(records)
+        except BrokenPipeError:
+            pass
+        finally:
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+        status = proc.wait()
+        result.seek(0)
+        for line in result:
+            out.write(name + '\t' + line.rstrip('\n') + '\n')
+    return status
+
+def main():
+    failed = []
+    for name, lines in itertools.groupby(sys.stdin, key=analysis_of):
+        if name not in ANALYSES:
+            sys.stderr.write(f"Skipping records of unknown analysis: {name}\n")
+            continue
+        records = (line.partition('\t')[2] for line in lines)
+        if run_reducer(name, records, sys.stdout) != 0:
+            failed.append(name)
+    if failed:
+        sys.stderr.write(f"Reducers failed: {', '.join(failed)}\n")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Mapper encoding hobbies and languages against a frozen vocabulary
+Input: Tab-separated lines from Pokec profiles
+Output: user_id\tcolumn ids, the sorted distinct vocabulary ids of the
+profile's hobby and language words, comma-separated (empty if none)
+
+The vocabulary is the output of `multilabel_reducer.py --vocabulary`,
+read from the path given as the first argument (default
+multilabel_vocabulary.tsv, shipped with -file). Words outside it were
+pruned by the reducer's --min-count and are dropped. Run as a map-only
+job; multilabel_matrix.py turns the output into a sparse matrix.
+"""
+
+import sys
+from multilabel_mapper import FIELDS as MULTILABEL_FIELDS, process_hobbies, process_languages
+from streaming_fields import FieldExtractor, read_fields
+
+FIELDS = FieldExtractor(['user_id', 'hobbies', 'spoken_languages'],
+                        min_fields=MULTILABEL_FIELDS.min_fields)
+
+VOCABULARY = 'multilabel_vocabulary.tsv'
+
+def load_vocabulary(path):
+    """Column id of every vocabulary column name"""
+    vocabulary = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            column_id, column, _ = line.rstrip('\n').split('\t')
+            vocabulary[column] = int(column_id)
+    return vocabulary
+
+def encode(hobbies, languages, vocabulary):
+    """Sorted distinct column ids of one profile's words"""
+    ids = set()
+    for category, word in process_hobbies(hobbies) + process_languages(languages):
+        column_id = vocabulary.get(f'{category}_{word}')
+        if column_id is not None:
+            ids.add(column_id)
+    return sorted(ids)
+
+def main():
+    vocabulary = load_vocabulary(sys.argv[1] if len(sys.argv) > 1 else VOCABULARY)
+    write = sys.stdout.write
+    for user_id, hobbies, languages in read_fields(FIELDS):
+        try:
+            ids = encode(hobbies, languages, vocabulary)
+            write(f"{user_id}\t{','.join(map(str, ids))}\n")
+        except Exception as e:
+            sys.stderr.write(f"Error processing line: {str(e)}\n")
+            continue
+
+if __name__ == "__main__":
+    main()
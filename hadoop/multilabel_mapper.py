@@ -3,12 +3,33 @@
 Mapper for processing multi-label columns (hobbies and languages)
 Input: Tab-separated lines from Pokec profiles
 Output: Key-value pairs for word frequency counting
-Format: category_name|word\t1
+Format: category_name|word\tcount (counts combined in the mapper)
+
+With -cmdenv MULTILABEL_CATEGORIES=1 it also counts the keyword categories
+each profile matches (hobby_category|sport, language_category|english).
 """
 
+import os
 import sys
 import re
 from typing import List, Tuple
+from streaming_combiner import InMapperCombiner
+from streaming_fields import FieldExtractor, read_fields
+
+# Shared helpers live in the project root (shipped alongside with -file on Hadoop)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from keyword_matcher import KeywordMatcher
+from pokec_keywords import HOBBY_KEYWORDS, LANGUAGE_KEYWORDS
+
+# Lines are only used when they reach the eye_color field, as before
+FIELDS = FieldExtractor(['hobbies', 'spoken_languages'], min_fields=17)
+
+# Keyword automatons of the categories, when counting them
+COUNT_CATEGORIES = os.environ.get('MULTILABEL_CATEGORIES', '0') == '1'
+MATCHERS = {
+    'hobby': KeywordMatcher(HOBBY_KEYWORDS),
+    'language': KeywordMatcher(LANGUAGE_KEYWORDS)
+} if COUNT_CATEGORIES else {}
 
 def clean_text(text: str) -> str:
     """Clean and normalize text"""
@@ -20,17 +41,27 @@ def clean_text(text: str) -> str:
     text = re.sub(r'[^\w\s,;-]', ' ', text)
     return text
 
-def split_text(text: str) -> List[str]:
-    """Split text into individual words/terms"""
+def split_fragments(text: str) -> List[str]:
+    """Split text into its separated items"""
     # Split on common separators
     items = []
     for item in re.split(r'[,;]', text):
         # Clean and validate each item
         item = item.strip()
         if len(item) > 1:  # Ignore single characters
-            items.extend(item.split())
+            items.append(item)
     return items
 
+def split_text(text: str) -> List[str]:
+    """Split text into individual words/terms"""
+    return [word for item in split_fragments(text) for word in item.split()]
+
+def match_categories(kind: str, text: str) -> List[Tuple[str, str]]:
+    """Keyword categories matched by hobbies or languages text"""
+    matcher = MATCHERS[kind]
+    mask = matcher.match(split_fragments(clean_text(text)))
+    return [(f'{kind}_category', name) for name in matcher.names(mask)]
+
 def process_hobbies(text: str) -> List[Tuple[str, str]]:
     """Process hobbies text into category-word pairs"""
     hobby_words = split_text(clean_text(text))
@@ -41,29 +72,40 @@ def process_languages(text: str) -> List[Tuple[str, str]]:
     language_words = split_text(clean_text(text))
     return [('language', word) for word in language_words if word]
 
+def open_output(out=None) -> InMapperCombiner:
+    """Where map_fields writes its records (flushed at end of input)"""
+    return InMapperCombiner(out=out)
+
+def map_fields(fields: Tuple[str, str], combiner: InMapperCombiner):
+    """Count the hobby and language words of one line's FIELDS"""
+    try:
+        hobbies, languages = fields
+        
+        # Process hobbies
+        for category, word in process_hobbies(hobbies):
+            combiner.add(f"{category}|{word}")
+        
+        # Process languages
+        for category, word in process_languages(languages):
+            combiner.add(f"{category}|{word}")
+        
+        # Count the matched keyword categories once per profile
+        if COUNT_CATEGORIES:
+            for kind, text in (('hobby', hobbies), ('language', languages)):
+                for category, name in match_categories(kind, text):
+                    combiner.add(f"{category}|{name}")
+            
+    except Exception as e:
+        sys.stderr.write(f"Error processing line: {str(e)}\n")
+
 def main():
+    combiner = open_output()
+    
     # Process input lines from stdin
-    for line in sys.stdin:
-        try:
-            # Split line into fields
-            fields = line.strip().split('\t')
-            
-            if len(fields) >= 17:  # Ensure we have enough fields
-                # Extract hobbies (field 11) and languages (field 10)
-                hobbies = fields[11]
-                languages = fields[10]
-                
-                # Process hobbies
-                for category, word in process_hobbies(hobbies):
-                    print(f"{category}|{word}\t1")
-                
-                # Process languages
-                for category, word in process_languages(languages):
-                    print(f"{category}|{word}\t1")
-                    
-        except Exception as e:
-            sys.stderr.write(f"Error processing line: {str(e)}\n")
-            continue
+    for fields in read_fields(FIELDS):
+        map_fields(fields, combiner)
+    
+    combiner.flush()
 
 if __name__ == "__main__":
     main()
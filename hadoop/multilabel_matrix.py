@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Build the sparse multi-hot hobby/language matrix from the encode job.
+
+Reads the vocabulary written by `multilabel_reducer.py --vocabulary` and
+the user_id\tcolumn-ids lines of multilabel_encode_mapper.py, and saves
+a compressed .npz with the CSR arrays (indptr, indices, shape), the row
+user ids and the column names. load_multi_hot() reads it back as a
+scipy.sparse.csr_matrix.
+
+Usage: multilabel_matrix.py VOCABULARY OUTPUT.npz [ENCODED_FILE ...]   (reads stdin without files)
+  hadoop fs -cat /user/pokec/output/multilabel_encoded/part-* | \\
+      multilabel_matrix.py results/multilabel_vocabulary.tsv results/multilabel_encoded.npz
+"""
+import fileinput
+import sys
+import numpy as np
+
+def read_columns(path):
+    """Column names in column id order"""
+    columns = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            column_id, column, _ = line.rstrip('\n').split('\t')
+            if int(column_id) != len(columns):
+                raise ValueError(f"{path}: column ids are not consecutive at {column}")
+            columns.append(column)
+    return columns
+
+def build(lines, n_columns):
+    """(indptr, indices, row_ids) of the encoded lines"""
+    indptr = [0]
+    indices = []
+    row_ids = []
+    for line in lines:
+        line = line.rstrip('\n')
+        if not line:
+            continue
+        user_id, _, ids = line.partition('\t')
+        row_ids.append(user_id)
+        if ids:
+            indices.extend(int(column_id) for column_id in ids.split(','))
+        indptr.append(len(indices))
+    indices = np.array(indices, dtype=np.int32)
+    if len(indices) and indices.max() >= n_columns:
+        raise ValueError("encoded ids outside the vocabulary")
+    try:
+        row_ids = np.array(row_ids, dtype=np.int64)
+    except ValueError:
+        row_ids = np.array(row_ids)
+    return np.array(indptr, dtype=np.int64), indices, row_ids
+
+def save_multi_hot(path, indptr, indices, row_ids, columns):
+    np.savez_compressed(path, indptr=indptr, indices=indices,
+                        shape=np.array([len(row_ids), len(columns)]),
+                        row_ids=row_ids, columns=np.array(columns))
+
+def load_multi_hot(path):
+    """(csr_matrix, row_ids, columns) saved by save_multi_hot"""
+    from scipy import sparse
+
+    with np.load(path) as data:
+        matrix = sparse.csr_matrix(
+            (np.ones(len(data['indices']), dtype=bool), data['indices'], data['indptr']),
+            shape=tuple(data['shape'])
+        )
+        return matrix, data['row_ids'], data['columns']
+
+def main():
+    if len(sys.argv) < 3:
+        sys.stderr.write(f"Usage: {sys.argv[0]} VOCABULARY OUTPUT.npz [ENCODED_FILE ...]\n")
+        sys.exit(2)
+    columns = read_columns(sys.argv[1])
+    indptr, indices, row_ids = build(fileinput.input(sys.argv[3:]), len(columns))
+    save_multi_hot(sys.argv[2], indptr, indices, row_ids, columns)
+    print(f"{len(row_ids):,} rows x {len(columns):,} columns, {len(indices):,} entries -> {sys.argv[2]}")
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,18 @@
 #!/usr/bin/env python3
 """
 Reducer for processing multi-label columns (hobbies and languages)
-Input: Key-value pairs from mapper (category_name|word\t1)
+Input: Key-value pairs from mapper (category_name|word\tcount)
 Output: JSON format with word frequencies and binary flags
+
+With --vocabulary [--min-count N] it prints the frozen vocabulary instead:
+one column_id\tcolumn\tcount line per word seen at least N times
+(default 1), hobby_* columns first, then language_*, each sorted by word.
+multilabel_encode_mapper.py encodes profiles against that file.
 """
 
 import sys
 import json
+import heapq
 from collections import defaultdict
 from typing import Dict, Set, List
 
@@ -20,6 +26,9 @@ class MultiLabelReducer:
         self.hobby_words: Set[str] = set()
         self.language_words: Set[str] = set()
         
+        # Profiles per keyword category (when the mapper counts them)
+        self.category_counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        
         # Track total records
         self.total_records = 0
     
@@ -43,6 +52,8 @@ class MultiLabelReducer:
                 elif category == 'language':
                     self.language_counts[word] += count
                     self.language_words.add(word)
+                elif category in ('hobby_category', 'language_category'):
+                    self.category_counts[category][word] += count
                 
             except Exception as e:
                 sys.stderr.write(f"Error processing line: {str(e)}\n")
@@ -50,12 +61,27 @@ class MultiLabelReducer:
     
     def get_top_items(self, counts: Dict[str, int], n: int = 10) -> List[Dict]:
         """Get top N items by frequency"""
-        sorted_items = sorted(counts.items(), key=lambda x: x[1], reverse=True)
+        top_items = heapq.nlargest(n, counts.items(), key=lambda x: x[1])
         return [
             {'word': word, 'count': count, 'percentage': (count/self.total_records)*100}
-            for word, count in sorted_items[:n]
+            for word, count in top_items
         ]
     
+    def vocabulary(self, min_count: int = 1) -> List[tuple]:
+        """Frozen (column_id, column, count) of every word seen at least min_count times"""
+        columns = []
+        for prefix, counts in (('hobby', self.hobby_counts), ('language', self.language_counts)):
+            columns.extend(
+                (f'{prefix}_{word}', counts[word])
+                for word in sorted(counts) if counts[word] >= min_count
+            )
+        return [(column_id, column, count) for column_id, (column, count) in enumerate(columns)]
+    
+    def output_vocabulary(self, min_count: int = 1):
+        """Output the frozen vocabulary, one tab-separated line per column"""
+        for column_id, column, count in self.vocabulary(min_count):
+            print(f"{column_id}\t{column}\t{count}")
+    
     def output_results(self):
         """Output results in JSON format"""
         # Calculate total records (use max of hobby/language counts)
@@ -64,6 +90,10 @@ class MultiLabelReducer:
             sum(self.language_counts.values())
         )
         
+        # Sort each vocabulary once for the columns and the instructions
+        hobby_columns = sorted(self.hobby_words)
+        language_columns = sorted(self.language_words)
+        
         results = {
             'summary': {
                 'total_records': self.total_records,
@@ -72,15 +102,20 @@ class MultiLabelReducer:
             },
             'hobbies': {
                 'top_frequencies': self.get_top_items(self.hobby_counts),
-                'binary_columns': sorted(list(self.hobby_words)),
+                'binary_columns': hobby_columns,
                 'total_mentions': sum(self.hobby_counts.values())
             },
             'languages': {
                 'top_frequencies': self.get_top_items(self.language_counts),
-                'binary_columns': sorted(list(self.language_words)),
+                'binary_columns': language_columns,
                 'total_mentions': sum(self.language_counts.values())
             }
         }
+        if self.category_counts:
+            results['keyword_categories'] = {
+                category: dict(sorted(counts.items()))
+                for category, counts in sorted(self.category_counts.items())
+            }
         
         # Output JSON results
         print(json.dumps(results, indent=2))
@@ -88,17 +123,22 @@ class MultiLabelReducer:
         # Output binary encoding instructions
         print("\nBINARY ENCODING INSTRUCTIONS:")
         print("1. Hobbies: Create these binary columns:")
-        for hobby in sorted(self.hobby_words):
+        for hobby in hobby_columns:
             print(f"   - hobby_{hobby}")
         
         print("\n2. Languages: Create these binary columns:")
-        for lang in sorted(self.language_words):
+        for lang in language_columns:
             print(f"   - language_{lang}")
 
 def main():
+    args = sys.argv[1:]
     reducer = MultiLabelReducer()
     reducer.process_input()
-    reducer.output_results()
+    if '--vocabulary' in args:
+        min_count = int(args[args.index('--min-count') + 1]) if '--min-count' in args else 1
+        reducer.output_vocabulary(min_count)
+    else:
+        reducer.output_results()
 
 if __name__ == "__main__":
     main()
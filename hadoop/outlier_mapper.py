@@ -2,9 +2,24 @@
 """
 Mapper for outlier analysis and handling sparsity in the dataset
 Input format: tab-separated values with user profile data
+
+The mapper summarizes its whole split before writing anything: a
+histogram of each numeric field (NUMERIC_COUNT records, one per distinct
+value) and, for every checked column, the rows seen and how many had it
+missing (FEATURE_COUNT records, one per column). The shuffle carries a
+few hundred records per mapper however large the input is.
 """
+import os
 import sys
-import json
+from streaming_codec import OUTLIER, StreamingCodec
+
+# Shared helpers live in the project root (shipped alongside with -file on Hadoop)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from pokec_schema import TSV_COLUMNS, TSV_INDEX, VALUE_RANGES
+from profile_completion import NULL_SENTINELS, field_missing_flags
+from streaming_combiner import MAX_KEYS
+from streaming_fields import FieldExtractor, read_fields
+from streaming_stats import DenseHistogram
 
 def clean_numeric(value):
     """Clean and validate numeric values"""
@@ -16,15 +31,6 @@ def clean_numeric(value):
     except:
         return None
 
-def emit_numeric_stats(key, value):
-    """Emit statistics for numeric fields"""
-    if value is not None:
-        print(f"NUMERIC\t{json.dumps({'field': key, 'value': value})}")
-
-def emit_feature_stats(field_name, value):
-    """Emit statistics for feature completeness"""
-    print(f"FEATURE\t{json.dumps({'field': field_name, 'is_missing': value is None})}")
-
 def process_age(age):
     """Process and validate age value"""
     age = clean_numeric(age)
@@ -32,64 +38,90 @@ def process_age(age):
         age = None
     return age
 
-# Define column indices and names
-COLUMNS = {
-    'user_id': 0,
-    'public': 1,
-    'completion_percentage': 2,
-    'gender': 3,
-    'region': 4,
-    'last_login': 5,
-    'registration': 6,
-    'AGE': 7,
-    'body': 8,
-    'I_am_working_in_field': 9,
-    'spoken_languages': 10,
-    'hobbies': 11,
-    'I_most_enjoy_good_food': 12,
-    'pets': 13,
-    'body_type': 14,
-    'my_eyesight': 15,
-    'eye_color': 16,
-    'hair_color': 17,
-    'hair_type': 18,
-    'completed_level_of_education': 19,
-    'favourite_color': 20,
-    'relation_to_smoking': 21,
-    'relation_to_alcohol': 22,
-    'sign_in_zodiac': 23,
-    'on_pokec_for': 24,
-    'love_is_for_me': 25,
-    'relation_to_casual_sex': 26,
-    'my_partner_should_be': 27,
-    'marital_status': 28,
-    'children': 29,
-    'relation_to_children': 30
-}
+# Columns checked for completeness, in TSV order
+COLUMNS = TSV_COLUMNS[:TSV_INDEX['relation_to_children'] + 1]
+FIELDS = FieldExtractor(COLUMNS)
+AGE = COLUMNS.index('AGE')
+COMPLETION = COLUMNS.index('completion_percentage')
 
-def main():
-    for line in sys.stdin:
+class OutlierSummary:
+    """Numeric histograms and completeness counters of one mapper's split"""
+
+    def __init__(self, out=None, max_patterns=MAX_KEYS):
+        self.codec = StreamingCodec(*OUTLIER, out=out)
+        self.histograms = {}
+        # Rows per distinct missing-field pattern; most profiles share a few
+        self.patterns = {}
+        self.max_patterns = max_patterns
+        self.rows = 0
+        self.missing = [0] * len(COLUMNS)
+
+    def add_numeric(self, field, value):
+        if value is None:
+            return
+        histogram = self.histograms.get(field)
+        if histogram is None:
+            histogram = self.histograms[field] = DenseHistogram(*VALUE_RANGES[field])
         try:
-            fields = line.strip().split('\t')
-            
-            if len(fields) < max(COLUMNS.values()) + 1:
-                continue
-                
-            # Process numeric fields
-            age = process_age(fields[COLUMNS['AGE']])
-            completion = clean_numeric(fields[COLUMNS['completion_percentage']])
-            
-            # Emit numeric statistics
-            emit_numeric_stats('AGE', age)
-            emit_numeric_stats('completion_percentage', completion)
+            histogram.update(value)
+        except ValueError:
+            return  # Not a whole number in range; the reducer would skip it too
+
+    def add_missing(self, flags):
+        key = tuple(flags)
+        self.patterns[key] = self.patterns.get(key, 0) + 1
+        if len(self.patterns) >= self.max_patterns:
+            self._fold_patterns()
+
+    def _fold_patterns(self):
+        """Add the pattern counts to the per-column counters"""
+        for flags, count in self.patterns.items():
+            self.rows += count
+            for index, is_missing in enumerate(flags):
+                if is_missing:
+                    self.missing[index] += count
+        self.patterns = {}
+
+    def flush(self):
+        """Write the summary records and start over"""
+        emit = self.codec.emit
+        for field, histogram in self.histograms.items():
+            for value, count in zip(histogram.values.tolist(), histogram.counts.tolist()):
+                if count:
+                    emit('NUMERIC_COUNT', {'field': field, 'value': value, 'count': count})
+        self._fold_patterns()
+        if self.rows:
+            for field_name, missing in zip(COLUMNS, self.missing):
+                emit('FEATURE_COUNT', {'field': field_name, 'total': self.rows, 'missing': missing})
+        self.histograms = {}
+        self.rows = 0
+        self.missing = [0] * len(COLUMNS)
+
+def open_output(out=None):
+    """Where map_fields adds its statistics (flushed at end of input)"""
+    return OutlierSummary(out=out)
+
+def map_fields(fields, summary):
+    """Add numeric and completeness statistics for one line's FIELDS"""
+    try:
+        # Process numeric fields
+        age = process_age(fields[AGE])
+        completion = clean_numeric(fields[COMPLETION])
+        
+        summary.add_numeric('AGE', age)
+        summary.add_numeric('completion_percentage', completion)
+        
+        # Feature completeness ('null' counts as missing)
+        summary.add_missing(field_missing_flags(fields, null_values=NULL_SENTINELS))
             
-            # Emit feature completeness statistics
-            for field_name, index in COLUMNS.items():
-                value = fields[index] if index < len(fields) else None
-                emit_feature_stats(field_name, value)
-                
-        except Exception as e:
-            continue
+    except Exception as e:
+        return
+
+def main():
+    summary = open_output()
+    for fields in read_fields(FIELDS):
+        map_fields(fields, summary)
+    summary.flush()
 
 if __name__ == "__main__":
     main()
@@ -2,40 +2,52 @@
 """
 Reducer for outlier analysis and handling sparsity in the dataset
 Input format: Key-value pairs from mapper with statistics
+
+The mappers' NUMERIC_COUNT histogram bins and FEATURE_COUNT counters are
+added up (single NUMERIC/FEATURE records count once), so the reducer
+holds one histogram per numeric field and two counters per column.
 """
+import os
 import sys
 import json
-import numpy as np
 from collections import defaultdict
+from streaming_codec import OUTLIER, StreamingCodec
+
+# Shared helpers live in the project root (shipped alongside with -file on Hadoop)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from pokec_schema import VALUE_RANGES
+from streaming_stats import DenseHistogram
 
 class NumericStatsAggregator:
-    def __init__(self):
-        self.values = []
+    def __init__(self, field):
+        self.histogram = DenseHistogram(*VALUE_RANGES[field])
         
-    def add(self, value):
-        self.values.append(value)
+    def add(self, value, count=1):
+        self.histogram.update(value, count)
     
     def compute_stats(self):
-        if not self.values:
+        histogram = self.histogram
+        if not histogram.count:
             return None
             
-        values = np.array(self.values)
-        q1 = np.percentile(values, 25)
-        q3 = np.percentile(values, 75)
-        iqr = q3 - q1
+        q1, q3, lower_bound, upper_bound = histogram.iqr_bounds()
         
         return {
-            'count': len(values),
-            'mean': np.mean(values),
-            'std': np.std(values),
-            'min': np.min(values),
-            'max': np.max(values),
+            'count': histogram.count,
+            'mean': histogram.mean,
+            'std': histogram.std,
+            'min': float(histogram.min),
+            'max': float(histogram.max),
             'q1': q1,
             'q3': q3,
-            'iqr': iqr,
-            'lower_bound': q1 - 1.5 * iqr,
-            'upper_bound': q3 + 1.5 * iqr
+            'iqr': q3 - q1,
+            'lower_bound': lower_bound,
+            'upper_bound': upper_bound
         }
+    
+    def count_outliers(self, stats):
+        """Values outside the IQR bounds of ``stats``"""
+        return self.histogram.count_outside(stats['lower_bound'], stats['upper_bound'])
 
 class FeatureStatsAggregator:
     def __init__(self):
@@ -47,6 +59,10 @@ class FeatureStatsAggregator:
         if is_missing:
             self.missing_count += 1
     
+    def add_counts(self, total, missing):
+        self.total_count += total
+        self.missing_count += missing
+    
     def compute_stats(self):
         if self.total_count == 0:
             return None
@@ -60,21 +76,26 @@ class FeatureStatsAggregator:
 
 def main():
     # Initialize aggregators
-    numeric_stats = defaultdict(NumericStatsAggregator)
+    numeric_stats = {}
     feature_stats = defaultdict(FeatureStatsAggregator)
+    codec = StreamingCodec(*OUTLIER)
     
     # Process input from mapper
     for line in sys.stdin:
         try:
-            key, value = line.strip().split('\t')
-            data = json.loads(value)
+            key, data = codec.parse(line)
             
-            if key == 'NUMERIC':
+            if key in ('NUMERIC', 'NUMERIC_COUNT'):
                 field = data['field']
-                numeric_stats[field].add(data['value'])
+                if field not in numeric_stats:
+                    numeric_stats[field] = NumericStatsAggregator(field)
+                numeric_stats[field].add(data['value'], data.get('count', 1))
             elif key == 'FEATURE':
                 field = data['field']
                 feature_stats[field].add(data['is_missing'])
+            elif key == 'FEATURE_COUNT':
+                field = data['field']
+                feature_stats[field].add_counts(data['total'], data['missing'])
                 
         except Exception as e:
             continue
@@ -97,11 +118,10 @@ def main():
             report['numeric_fields'][field] = stats
             
             # Calculate outliers
-            values = np.array(aggregator.values)
-            outliers = values[(values < stats['lower_bound']) | (values > stats['upper_bound'])]
+            outliers = aggregator.count_outliers(stats)
             report['outlier_summary'][field] = {
-                'total_outliers': len(outliers),
-                'outlier_percentage': (len(outliers) / len(values)) * 100
+                'total_outliers': outliers,
+                'outlier_percentage': (outliers / stats['count']) * 100
             }
     
     # Process feature quality
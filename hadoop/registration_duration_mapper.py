@@ -6,77 +6,60 @@ Input: Tab-separated lines from Pokec profiles
 Output: Key-value pairs for duration analysis
 """
 
+import os
 import sys
-from datetime import datetime
+from streaming_fields import FieldExtractor, read_fields
 
-def parse_date(date_str):
-    """Parse date string to datetime object"""
-    try:
-        if not date_str or date_str == 'null':
-            return None
-        # Try parsing with milliseconds
-        try:
-            return datetime.strptime(str(date_str), '%Y-%m-%d %H:%M:%S.%f')
-        except ValueError:
-            # Try without milliseconds
-            return datetime.strptime(str(date_str), '%Y-%m-%d %H:%M:%S')
-    except Exception:
-        return None
+# Shared helpers live in the project root (shipped alongside with -file on Hadoop)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from pokec_dates import duration_category, duration_days, parse_timestamp
+
+FIELDS = FieldExtractor(['last_login', 'registration'])
+
+# Names of the duration categories (see pokec_dates.DURATION_BOUNDS)
+CATEGORIES = ('1_month', '3_months', '6_months', '1_year', '2_years', '2+_years')
 
 def get_duration_category(days):
     """Get duration category for given days"""
-    if days <= 30:
-        return '1_month'
-    elif days <= 90:
-        return '3_months'
-    elif days <= 180:
-        return '6_months'
-    elif days <= 365:
-        return '1_year'
-    elif days <= 730:
-        return '2_years'
-    else:
-        return '2+_years'
+    return CATEGORIES[duration_category(days)]
 
-def main():
-    # Process input lines from stdin
-    for line in sys.stdin:
-        try:
-            # Split line into fields
-            fields = line.strip().split('\t')
+def open_output(out=None):
+    """Where map_fields writes its records"""
+    return out or sys.stdout
+
+def map_fields(fields, out):
+    """Emit the duration records for one line's FIELDS"""
+    try:
+        last_login_str, reg_str = fields
+        
+        # Parse dates (epoch microseconds) and calculate whole days
+        days = duration_days(parse_timestamp(reg_str), parse_timestamp(last_login_str))
+        
+        if days is not None and days >= 0:  # Valid only if registration is before last login
+            # Get duration category
+            category = get_duration_category(days)
             
-            if len(fields) >= 7:  # Ensure we have enough fields
-                # Extract registration (field 6) and last_login (field 5)
-                last_login_str = fields[5]
-                reg_str = fields[6]
-                
-                # Parse dates
-                last_login = parse_date(last_login_str)
-                reg_date = parse_date(reg_str)
-                
-                if last_login and reg_date:
-                    # Calculate days
-                    days = (last_login - reg_date).days
+            # Emit multiple key-value pairs for different analyses
+            # Format: key\tvalue
+            
+            # For category counts
+            out.write(f"category\t{category}\n")
+            
+            # For general statistics
+            out.write(f"stats\t{days}\n")
+            
+            # For detailed day counts (for percentiles)
+            out.write(f"days\t{days}\n")
                     
-                    if days >= 0:  # Valid only if registration is before last login
-                        # Get duration category
-                        category = get_duration_category(days)
-                        
-                        # Emit multiple key-value pairs for different analyses
-                        # Format: key\tvalue
-                        
-                        # For category counts
-                        print(f"category\t{category}")
-                        
-                        # For general statistics
-                        print(f"stats\t{days}")
-                        
-                        # For detailed day counts (for percentiles)
-                        print(f"days\t{days}")
-                        
-        except Exception as e:
-            sys.stderr.write(f"Error processing line: {str(e)}\n")
-            continue
+    except Exception as e:
+        sys.stderr.write(f"Error processing line: {str(e)}\n")
+
+def main():
+    out = open_output()
+    
+    # Process input lines from stdin
+    for fields in read_fields(FIELDS):
+        map_fields(fields, out)
 
 if __name__ == "__main__":
     main()
@@ -4,16 +4,25 @@ MapReduce implementation - Reducer
 Calculate days_since_registration statistics and distribution
 Input: Key-value pairs from mapper
 Output: JSON format with statistics and distribution
+
+Percentiles are read off an exact histogram of the whole-day durations,
+so memory is bounded by the range of durations, not the number of users.
 """
 
+import os
 import sys
 import json
 from collections import defaultdict
 
+# Shared helpers live in the project root (shipped alongside with -file on Hadoop)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from pokec_schema import VALUE_RANGES
+from streaming_stats import DenseHistogram
+
 class RegistrationDurationReducer:
     def __init__(self):
         self.category_counts = defaultdict(int)
-        self.days_list = []
+        self.days_histogram = DenseHistogram(*VALUE_RANGES['days_since_registration'])
         self.total_days = 0
         self.count = 0
         
@@ -31,19 +40,19 @@ class RegistrationDurationReducer:
         }
     
     def calculate_percentiles(self):
-        """Calculate percentiles from days list"""
-        if self.days_list:
-            sorted_days = sorted(self.days_list)
-            n = len(sorted_days)
+        """Calculate percentiles from the days histogram"""
+        n = self.days_histogram.count
+        if n:
+            day_at = self.days_histogram.item_at_rank
             
             # Calculate key percentiles
             self.stats['percentiles'] = {
-                'p25': sorted_days[n // 4],
-                'p50': sorted_days[n // 2],
-                'p75': sorted_days[3 * n // 4],
-                'p90': sorted_days[9 * n // 10],
-                'p95': sorted_days[95 * n // 100],
-                'p99': sorted_days[99 * n // 100]
+                'p25': day_at(n // 4),
+                'p50': day_at(n // 2),
+                'p75': day_at(3 * n // 4),
+                'p90': day_at(9 * n // 10),
+                'p95': day_at(95 * n // 100),
+                'p99': day_at(99 * n // 100)
             }
     
     def calculate_statistics(self):
@@ -51,8 +60,8 @@ class RegistrationDurationReducer:
         if self.count > 0:
             self.stats.update({
                 'valid_profiles': self.count,
-                'min_days': min(self.days_list),
-                'max_days': max(self.days_list),
+                'min_days': self.days_histogram.min,
+                'max_days': self.days_histogram.max,
                 'avg_days': self.total_days / self.count,
                 'distribution': dict(self.category_counts)
             })
@@ -85,8 +94,8 @@ class RegistrationDurationReducer:
                     self.count += 1
                     
                 elif key == 'days':
-                    # Store days for percentile calculation
-                    self.days_list.append(int(value))
+                    # Count days for min/max and percentile calculation
+                    self.days_histogram.update(int(value))
                     
             except Exception as e:
                 sys.stderr.write(f"Error processing line: {str(e)}\n")
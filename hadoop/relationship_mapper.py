@@ -4,7 +4,10 @@ Mapper for analyzing relationships between completion_percentage and categorical
 Input format: tab-separated values where columns contain user profile data
 """
 import sys
-import json
+from streaming_codec import RELATIONSHIP, StreamingCodec
+from streaming_fields import FieldExtractor, read_fields
+
+codec = StreamingCodec(*RELATIONSHIP)
 
 def clean_value(value):
     """Clean and validate a value"""
@@ -15,47 +18,44 @@ def clean_value(value):
 def emit_feature(feature_name, feature_value, completion_percentage):
     """Emit a feature-value pair with completion percentage"""
     if feature_value is not None:
-        print(f"FEATURE\t{json.dumps({'name': feature_name, 'value': feature_value, 'completion': float(completion_percentage)})}")
+        codec.emit('FEATURE', {'name': feature_name, 'value': feature_value, 'completion': float(completion_percentage)})
 
 def emit_correlation(value1, value2):
     """Emit values for correlation calculation"""
     try:
         v1, v2 = float(value1), float(value2)
-        print(f"CORRELATION\t{json.dumps({'x': v1, 'y': v2})}")
+        codec.emit('CORRELATION', {'x': v1, 'y': v2})
     except:
         pass
 
-# Define feature columns and their indices
-FEATURES = {
-    'eye_color': 20,
-    'hair_color': 21,
-    'hair_type': 22,
-    'body_type': 23,
-    'relation_to_smoking': 26,
-    'relation_to_alcohol': 27,
-    'sign_in_zodiac': 28,
-    'marital_status': 33
-}
+# Categorical feature columns
+FEATURES = (
+    'eye_color',
+    'hair_color',
+    'hair_type',
+    'body_type',
+    'relation_to_smoking',
+    'relation_to_alcohol',
+    'sign_in_zodiac',
+    'marital_status'
+)
+FIELDS = FieldExtractor(('user_id', 'completion_percentage') + FEATURES)
 
-for line in sys.stdin:
+for fields in read_fields(FIELDS):
     try:
-        # Remove leading/trailing whitespace and split by tab
-        fields = line.strip().split('\t')
+        user_id, completion_percentage = fields[:2]
         
-        if len(fields) < max(FEATURES.values()) + 1:
-            continue
-            
         # Get completion percentage
-        completion_percentage = clean_value(fields[2])
+        completion_percentage = clean_value(completion_percentage)
         if completion_percentage is None:
             continue
             
         # Emit user_id correlation data
-        emit_correlation(fields[0], completion_percentage)
+        emit_correlation(user_id, completion_percentage)
         
         # Process each categorical feature
-        for feature_name, index in FEATURES.items():
-            feature_value = clean_value(fields[index])
+        for feature_name, value in zip(FEATURES, fields[2:]):
+            feature_value = clean_value(value)
             emit_feature(feature_name, feature_value, completion_percentage)
             
     except Exception as e:
@@ -2,24 +2,31 @@
 """
 Reducer for analyzing relationships between completion_percentage and categorical variables
 """
+import os
 import sys
-import json
 from collections import defaultdict
 import math
 
+# Shared helpers live in the project root (shipped alongside with -file on Hadoop)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from pokec_schema import VALUE_RANGES
+from streaming_codec import RELATIONSHIP, StreamingCodec
+from streaming_stats import DenseHistogram
+
 class StatisticsCalculator:
     """Calculate statistics for a group of values"""
     def __init__(self):
         self.count = 0
         self.sum = 0
         self.sum_squares = 0
-        self.values = []
+        self.histogram = DenseHistogram(*VALUE_RANGES['completion_percentage'])
     
     def add_value(self, value):
+        # First, so a value that is not a whole percentage is rejected entirely
+        self.histogram.update(value)
         self.count += 1
         self.sum += value
         self.sum_squares += value * value
-        self.values.append(value)
     
     def get_stats(self):
         if self.count == 0:
@@ -29,12 +36,8 @@ class StatisticsCalculator:
         variance = (self.sum_squares / self.count) - (mean * mean)
         std_dev = math.sqrt(variance) if variance > 0 else 0
         
-        # Calculate median
-        self.values.sort()
-        if self.count % 2 == 0:
-            median = (self.values[self.count//2-1] + self.values[self.count//2]) / 2
-        else:
-            median = self.values[self.count//2]
+        # Exact median from the histogram (memory does not grow with count)
+        median = self.histogram.median()
             
         return {
             'count': self.count,
@@ -79,12 +82,12 @@ class CorrelationCalculator:
 # Initialize data structures
 feature_stats = defaultdict(lambda: defaultdict(StatisticsCalculator))
 correlation_calc = CorrelationCalculator()
+codec = StreamingCodec(*RELATIONSHIP)
 
 # Process input from mapper
 for line in sys.stdin:
     try:
-        key, value = line.strip().split('\t')
-        data = json.loads(value)
+        key, data = codec.parse(line)
         
         if key == 'FEATURE':
             # Add completion percentage to feature statistics
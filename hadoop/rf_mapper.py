@@ -6,7 +6,10 @@ Output: Key-value pairs for feature extraction and analysis
 """
 
 import sys
-import json
+from streaming_codec import RANDOM_FOREST, StreamingCodec
+from streaming_fields import FieldExtractor, read_fields
+
+FIELDS = FieldExtractor(['public', 'AGE', 'completion_percentage', 'spoken_languages', 'hobbies'])
 
 def validate_numeric(value):
     """Validate and convert numeric values"""
@@ -15,21 +18,18 @@ def validate_numeric(value):
     except (ValueError, TypeError):
         return None
 
-def process_line(line):
-    """Process a single line of input"""
+def process_fields(fields):
+    """Features of one line's FIELDS"""
     try:
-        fields = line.strip().split('\t')
+        public, age, completion_percentage, languages, hobbies = fields
         
-        if len(fields) < 12:  # Ensure minimum required fields
-            return None
-            
         # Extract features
         features = {
-            'public': fields[3],  # Target variable
-            'age': validate_numeric(fields[7]),
-            'completion_percentage': validate_numeric(fields[9]),
-            'has_languages': 1 if fields[10].strip() else 0,
-            'has_hobbies': 1 if fields[11].strip() else 0
+            'public': public,  # Target variable
+            'age': validate_numeric(age),
+            'completion_percentage': validate_numeric(completion_percentage),
+            'has_languages': 1 if languages.strip() else 0,
+            'has_hobbies': 1 if hobbies.strip() else 0
         }
         
         # Basic validation
@@ -46,16 +46,18 @@ def process_line(line):
         return None
 
 def main():
+    codec = StreamingCodec(*RANDOM_FOREST)
+    
     # Process input lines from stdin
-    for line in sys.stdin:
-        features = process_line(line)
+    for fields in read_fields(FIELDS):
+        features = process_fields(fields)
         
         if features:
             # Emit for feature statistics (used in normalization)
-            print(f"stats\t{json.dumps(features)}")
+            codec.emit('stats', features)
             
             # Emit for model training
-            print(f"data\t{json.dumps(features)}")
+            codec.emit('data', features)
 
 if __name__ == "__main__":
     main()
@@ -13,6 +13,7 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import classification_report
 from collections import defaultdict
+from streaming_codec import RANDOM_FOREST, StreamingCodec
 
 class RFReducer:
     def __init__(self):
@@ -24,6 +25,7 @@ class RFReducer:
             'max': float('-inf')
         })
         self.data = []
+        self.codec = StreamingCodec(*RANDOM_FOREST)
         
     def update_stats(self, features):
         """Update running statistics for numeric features"""
@@ -103,8 +105,7 @@ class RFReducer:
         """Process input from mapper"""
         for line in sys.stdin:
             try:
-                key, value = line.strip().split('\t')
-                features = json.loads(value)
+                key, features = self.codec.parse(line)
                 
                 if key == 'stats':
                     self.update_stats(features)
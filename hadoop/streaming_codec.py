@@ -0,0 +1,126 @@
+"""
+Compact typed records for Hadoop Streaming intermediate data.
+
+A compact record is the key followed by its values, tab-separated, in
+the order of a schema that the mapper and its reducer both import:
+
+    CLUSTER\t3\t24.0\t55.0
+
+Compared to one JSON object per line this drops field names, quoting and
+the json.dumps/json.loads round trip. Missing values are written as \\N,
+and backslashes, tabs and newlines inside strings are escaped, so records
+survive both the Hadoop shuffle and a local `cat | map | sort | reduce`.
+Reducers decode compact and JSON values alike, so jobs can be switched
+one side at a time. Mappers emit JSON again with STREAMING_FORMAT=json
+(pass -cmdenv STREAMING_FORMAT=json to Hadoop Streaming).
+"""
+import json
+import os
+import sys
+
+NULL = '\\N'
+
+def _escape(value):
+    if '\\' in value or '\t' in value or '\n' in value:
+        value = value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+    return value
+
+def _unescape(value):
+    if '\\' not in value:
+        return value
+    out, chars = [], iter(value)
+    for char in chars:
+        if char == '\\':
+            char = {'t': '\t', 'n': '\n'}.get(next(chars, ''), '\\')
+        out.append(char)
+    return ''.join(out)
+
+ENCODERS = {
+    'int': lambda value: str(int(value)),
+    'float': repr,
+    'bool': lambda value: '1' if value else '0',
+    'str': lambda value: _escape(str(value))
+}
+
+DECODERS = {
+    'int': int,
+    'float': float,
+    'bool': lambda value: value == '1',
+    'str': _unescape
+}
+
+class Schema:
+    """Typed field layout of the records emitted under one key."""
+
+    def __init__(self, key, fields):
+        self.key = key
+        self.names = [name for name, _ in fields]
+        self.encoders = [ENCODERS[kind] for _, kind in fields]
+        self.decoders = [DECODERS[kind] for _, kind in fields]
+
+    def encode(self, record):
+        return '\t'.join(
+            NULL if record[name] is None else encode(record[name])
+            for name, encode in zip(self.names, self.encoders)
+        )
+
+    def decode(self, values):
+        if len(values) != len(self.names):
+            raise ValueError(f"{self.key}: expected {len(self.names)} values, got {len(values)}")
+        return {
+            name: None if value == NULL else decode(value)
+            for name, value, decode in zip(self.names, values, self.decoders)
+        }
+
+class StreamingCodec:
+    """Writes and reads key/record lines for a set of schemas."""
+
+    def __init__(self, *schemas, fmt=None, out=None):
+        self.schemas = {schema.key: schema for schema in schemas}
+        self.compact = (fmt or os.environ.get('STREAMING_FORMAT', 'compact')) != 'json'
+        self.out = out or sys.stdout
+
+    def emit(self, key, record):
+        if self.compact:
+            self.out.write(f"{key}\t{self.schemas[key].encode(record)}\n")
+        else:
+            self.out.write(f"{key}\t{json.dumps(record)}\n")
+
+    def parse(self, line):
+        """(key, record) of a compact or JSON line; ValueError when malformed."""
+        key, _, value = line.rstrip('\r\n').partition('\t')
+        if value.startswith('{') and value.endswith('}'):
+            try:
+                return key, json.loads(value)
+            except ValueError:
+                pass
+        schema = self.schemas.get(key)
+        if schema is None:
+            raise ValueError(f"unknown record key: {key}")
+        return key, schema.decode(value.split('\t'))
+
+# Record layouts shared by each mapper and its reducer
+CLUSTERING = (
+    Schema('CLUSTER', [('cluster', 'int'), ('age', 'float'), ('completion', 'float')]),
+    Schema('AGE_STATS', [('age', 'float'), ('completion', 'float')])
+)
+
+OUTLIER = (
+    Schema('NUMERIC', [('field', 'str'), ('value', 'float')]),
+    Schema('FEATURE', [('field', 'str'), ('is_missing', 'bool')]),
+    # Per-mapper summaries: one histogram bin, one field's completeness counters
+    Schema('NUMERIC_COUNT', [('field', 'str'), ('value', 'float'), ('count', 'int')]),
+    Schema('FEATURE_COUNT', [('field', 'str'), ('total', 'int'), ('missing', 'int')])
+)
+
+_RF_FEATURES = [('public', 'str'), ('age', 'float'), ('completion_percentage', 'float'),
+                ('has_languages', 'int'), ('has_hobbies', 'int')]
+RANDOM_FOREST = (
+    Schema('stats', _RF_FEATURES),
+    Schema('data', _RF_FEATURES)
+)
+
+RELATIONSHIP = (
+    Schema('FEATURE', [('name', 'str'), ('value', 'str'), ('completion', 'float')]),
+    Schema('CORRELATION', [('x', 'float'), ('y', 'float')])
+)
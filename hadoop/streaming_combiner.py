@@ -0,0 +1,57 @@
+"""
+In-mapper combining for Hadoop Streaming mappers.
+
+Instead of printing one record per row (or per token) with a count of 1,
+a mapper adds to a dictionary of partial counts/sums keyed by the output
+key and emits each key once with its partial aggregate. The dictionary
+holds at most ``max_keys`` entries; when a new key would exceed that it
+is flushed, and it is flushed again at end of input, so memory stays
+bounded however skewed the keys are.
+
+Records are written as the key fields followed by the aggregate values,
+tab-separated, e.g. ``gender\\tmale\\t9149``; reducers that sum a count
+column accept them unchanged.
+"""
+import os
+import sys
+
+# Distinct keys held before a flush (override with -cmdenv COMBINER_MAX_KEYS=...)
+MAX_KEYS = int(os.environ.get('COMBINER_MAX_KEYS', 100000))
+
+class InMapperCombiner:
+    """Bounded dictionary of partial aggregates, written out as tab-separated lines."""
+
+    def __init__(self, max_keys=MAX_KEYS, out=None):
+        self.max_keys = max_keys
+        self.out = out or sys.stdout
+        self.partials = {}
+
+    def add(self, key, value=1):
+        """Add ``value`` (a number or a tuple of numbers) to the partial for ``key``.
+
+        ``key`` is a string or a tuple of strings (one per output field).
+        """
+        partial = self.partials.get(key)
+        if partial is None:
+            if len(self.partials) >= self.max_keys:
+                self.flush()
+            self.partials[key] = value
+        elif isinstance(value, tuple):
+            self.partials[key] = tuple(a + b for a, b in zip(partial, value))
+        else:
+            self.partials[key] = partial + value
+
+    def flush(self):
+        """Write every partial aggregate and start over."""
+        write = self.out.write
+        for key, value in self.partials.items():
+            fields = key if isinstance(key, tuple) else (key,)
+            values = value if isinstance(value, tuple) else (value,)
+            write('\t'.join(fields + tuple(str(v) for v in values)) + '\n')
+        self.partials = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
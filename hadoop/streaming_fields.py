@@ -0,0 +1,67 @@
+"""
+Pull only the needed fields out of Pokec TSV lines in streaming mappers.
+
+A mapper names the columns it uses (see pokec_schema.TSV_COLUMNS) and
+gets them back as a tuple in that order, instead of splitting all 59
+fields of every line:
+
+    AGE_FIELDS = FieldExtractor(['AGE'])
+    for (age,) in read_fields(AGE_FIELDS):
+        ...
+
+Lines are read from stdin as bytes in large batches and split with a
+bounded maxsplit; only the extracted fields are decoded. As with
+`line.strip().split('\\t')`, surrounding whitespace is stripped first,
+and lines with fewer than ``min_fields`` fields are skipped.
+"""
+import os
+import sys
+
+# Shared helpers live in the project root (shipped alongside with -file on Hadoop)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from pokec_schema import tsv_indices
+
+# Bytes of input lines read per batch
+BUFFER_SIZE = 1024 * 1024
+
+class FieldExtractor:
+    """Named TSV columns of a line, or None when the line is too short."""
+
+    def __init__(self, names, min_fields=None):
+        self.names = tuple(names)
+        self.indices = tsv_indices(self.names)
+        # Lines need every extracted field, and at least min_fields in all
+        self.min_fields = max([index + 1 for index in self.indices] + [min_fields or 0])
+
+    def split(self, line):
+        """Fields of a bytes line up to min_fields; the rest stays unsplit."""
+        return line.strip().split(b'\t', self.min_fields)
+
+    def pick(self, parts):
+        """Decoded fields from the parts of a split line (of any extractor
+        splitting at least as far)."""
+        if len(parts) < self.min_fields:
+            return None
+        return tuple(parts[index].decode('utf-8', 'replace') for index in self.indices)
+
+    def __call__(self, line):
+        if isinstance(line, str):
+            line = line.encode('utf-8')
+        return self.pick(self.split(line))
+
+def read_lines(stream=None, buffer_size=BUFFER_SIZE):
+    """Bytes lines of ``stream`` (stdin by default), read in large batches."""
+    stream = stream or sys.stdin.buffer
+    while True:
+        lines = stream.readlines(buffer_size)
+        if not lines:
+            return
+        yield from lines
+
+def read_fields(extractor, stream=None):
+    """Extracted fields of every long enough line of ``stream``."""
+    pick, split = extractor.pick, extractor.split
+    for line in read_lines(stream):
+        fields = pick(split(line))
+        if fields is not None:
+            yield fields
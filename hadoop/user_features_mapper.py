@@ -6,8 +6,13 @@ Input format: tab-separated values where:
 - column 3: gender
 - column 4: region
 - column 7: age
+Output: KIND\tvalue\tcount, counts combined in the mapper
 """
 import sys
+from streaming_combiner import InMapperCombiner
+from streaming_fields import FieldExtractor, read_fields
+
+FIELDS = FieldExtractor(['gender', 'region', 'AGE'])
 
 def is_valid_age(age):
     try:
@@ -16,30 +21,35 @@ def is_valid_age(age):
     except:
         return False
 
-for line in sys.stdin:
+def open_output(out=None):
+    """Where map_fields writes its records (flushed at end of input)"""
+    return InMapperCombiner(out=out)
+
+def map_fields(fields, combiner):
+    """Count the age, gender and region of one line's FIELDS"""
     try:
-        # Remove leading/trailing whitespace and split by tab
-        fields = line.strip().split('\t')
-        
-        if len(fields) < 8:  # Ensure we have enough fields
-            continue
-            
-        user_id = fields[0]
-        gender = fields[3]
-        region = fields[4]
-        age = fields[7]
+        gender, region, age = fields
         
         # Emit for age analysis (if valid age)
         if is_valid_age(age):
-            print(f"AGE\t{age}")
+            combiner.add(('AGE', age))
         
         # Emit for gender analysis
         if gender in ['0', '1']:
-            print(f"GENDER\t{gender}")
+            combiner.add(('GENDER', gender))
         
         # Emit for region analysis (if region is not empty)
         if region and region != 'null':
-            print(f"REGION\t{region}")
+            combiner.add(('REGION', region))
             
     except Exception as e:
-        continue  # Skip malformed lines
+        return  # Skip malformed lines
+
+def main():
+    combiner = open_output()
+    for fields in read_fields(FIELDS):
+        map_fields(fields, combiner)
+    combiner.flush()
+
+if __name__ == "__main__":
+    main()
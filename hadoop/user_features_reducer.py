@@ -1,74 +1,115 @@
 #!/usr/bin/env python3
 """
 Reducer for analyzing user features (age, gender, region)
-Input format: key\tvalue where key is one of [AGE, GENDER, REGION]
+Input format: key\tvalue[\tcount] where key is one of [AGE, GENDER, REGION];
+a missing count means 1
+
+With --partial the reducer prints its partial counts as one JSON line
+instead of the report, so the job can run with many reduce tasks and
+merge_parts.py can combine the part-* files into the final report.
 """
+import os
 import sys
 from collections import defaultdict
 import json
 
-# Initialize counters
-age_data = {
-    'count': 0,
-    'sum': 0,
-    'min': float('inf'),
-    'max': float('-inf'),
-    'values': []  # For calculating median
-}
-
-gender_counts = defaultdict(int)
-region_counts = defaultdict(int)
-
-# Process input from mapper
-for line in sys.stdin:
-    try:
-        # Remove leading/trailing whitespace and split by tab
-        key, value = line.strip().split('\t')
+# Shared helpers live in the project root (shipped alongside with -file on Hadoop)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from streaming_stats import DenseHistogram
+
+# Ages are whole years (the mapper keeps 10-100)
+AGE_RANGE = (1, 100)
+
+class PartialState:
+    """Counters aggregated by one reduce task; mergeable across tasks."""
+
+    def __init__(self):
+        self.ages = DenseHistogram(*AGE_RANGE)
+        self.gender_counts = defaultdict(int)
+        self.region_counts = defaultdict(int)
+
+    def add_line(self, line):
+        # Remove the trailing newline and split by tab
+        key, value, *count = line.rstrip('\n').split('\t')
+        count = int(count[0]) if count else 1
         
         if key == 'AGE':
-            age = int(value)
-            age_data['count'] += 1
-            age_data['sum'] += age
-            age_data['min'] = min(age_data['min'], age)
-            age_data['max'] = max(age_data['max'], age)
-            age_data['values'].append(age)
+            self.ages.update(int(value), count)
             
         elif key == 'GENDER':
-            gender_counts[value] += 1
+            self.gender_counts[value] += count
             
         elif key == 'REGION':
-            region_counts[value] += 1
-            
-    except Exception as e:
-        continue
-
-# Calculate statistics
-results = {
-    'age_analysis': {
-        'total_users': age_data['count'],
-        'mean_age': round(age_data['sum'] / age_data['count'], 2) if age_data['count'] > 0 else 0,
-        'min_age': age_data['min'] if age_data['min'] != float('inf') else 0,
-        'max_age': age_data['max'] if age_data['max'] != float('-inf') else 0,
-        'median_age': sorted(age_data['values'])[len(age_data['values'])//2] if age_data['values'] else 0
-    },
-    'gender_analysis': {
-        'counts': dict(gender_counts),
-        'percentages': {
-            gender: round(count / sum(gender_counts.values()) * 100, 2)
-            for gender, count in gender_counts.items()
+            self.region_counts[value] += count
+
+    def merge(self, other):
+        self.ages.merge(other.ages)
+        for mine, theirs in [(self.gender_counts, other.gender_counts),
+                             (self.region_counts, other.region_counts)]:
+            for value, count in theirs.items():
+                mine[value] += count
+        return self
+
+    def to_dict(self):
+        return {
+            'ages': self.ages.to_dict(),
+            'gender_counts': self.gender_counts,
+            'region_counts': self.region_counts
         }
-    },
-    'region_analysis': {
-        'top_5_regions': dict(sorted(region_counts.items(), key=lambda x: x[1], reverse=True)[:5]),
-        'percentages': {
-            region: round(count / sum(region_counts.values()) * 100, 2)
-            for region, count in sorted(region_counts.items(), key=lambda x: x[1], reverse=True)[:5]
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        state.ages = DenseHistogram.from_dict(data['ages'])
+        state.gender_counts.update(data['gender_counts'])
+        state.region_counts.update(data['region_counts'])
+        return state
+
+def read_state(lines):
+    """Fold mapper output lines into a PartialState."""
+    state = PartialState()
+    for line in lines:
+        try:
+            state.add_line(line)
+        except Exception as e:
+            continue
+    return state
+
+def render(state):
+    """JSON results followed by the formatted markdown report."""
+    ages = state.ages
+    # Key order is fixed so merged and single-task runs print the same
+    gender_counts = dict(sorted(state.gender_counts.items()))
+    region_counts = dict(sorted(state.region_counts.items()))
+
+    # Calculate statistics
+    results = {
+        'age_analysis': {
+            'total_users': ages.count,
+            'mean_age': round(ages.mean, 2) if ages.count > 0 else 0,
+            'min_age': ages.min if ages.count > 0 else 0,
+            'max_age': ages.max if ages.count > 0 else 0,
+            # Value at position count // 2 of the sorted ages
+            'median_age': ages.item_at_rank(ages.count // 2) if ages.count > 0 else 0
+        },
+        'gender_analysis': {
+            'counts': dict(gender_counts),
+            'percentages': {
+                gender: round(count / sum(gender_counts.values()) * 100, 2)
+                for gender, count in gender_counts.items()
+            }
+        },
+        'region_analysis': {
+            'top_5_regions': dict(sorted(region_counts.items(), key=lambda x: x[1], reverse=True)[:5]),
+            'percentages': {
+                region: round(count / sum(region_counts.values()) * 100, 2)
+                for region, count in sorted(region_counts.items(), key=lambda x: x[1], reverse=True)[:5]
+            }
         }
     }
-}
 
-# Generate report
-report = f"""# User Features Analysis Report
+    # Generate report
+    report = f"""# User Features Analysis Report
 
 ## Dataset Overview
 Total number of users with valid age data: {results['age_analysis']['total_users']:,}
@@ -80,17 +121,29 @@ Total number of users with valid age data: {results['age_analysis']['total_users
 
 ## Gender Distribution"""
 
-for gender, count in results['gender_analysis']['counts'].items():
-    percentage = results['gender_analysis']['percentages'][gender]
-    report += f"\n- Gender {gender}: {count:,} users ({percentage:.2f}%)"
+    for gender, count in results['gender_analysis']['counts'].items():
+        percentage = results['gender_analysis']['percentages'][gender]
+        report += f"\n- Gender {gender}: {count:,} users ({percentage:.2f}%)"
+
+    report += "\n\n## Top 5 Regions by User Count"
+    for region, count in results['region_analysis']['top_5_regions'].items():
+        percentage = results['region_analysis']['percentages'][region]
+        report += f"\n- {region}: {count:,} users ({percentage:.2f}%)"
+
+    # Both JSON results and formatted report
+    return "\n".join([
+        "### JSON RESULTS ###",
+        json.dumps(results, indent=2),
+        "\n### FORMATTED REPORT ###",
+        report
+    ])
 
-report += "\n\n## Top 5 Regions by User Count"
-for region, count in results['region_analysis']['top_5_regions'].items():
-    percentage = results['region_analysis']['percentages'][region]
-    report += f"\n- {region}: {count:,} users ({percentage:.2f}%)"
+def main():
+    state = read_state(sys.stdin)
+    if '--partial' in sys.argv[1:]:
+        print(json.dumps(state.to_dict()))
+    else:
+        print(render(state))
 
-# Print both JSON results and formatted report
-print("### JSON RESULTS ###")
-print(json.dumps(results, indent=2))
-print("\n### FORMATTED REPORT ###")
-print(report)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Category keyword matching with a compiled Aho-Corasick automaton.
+
+KeywordMatcher is built once from a {category: [keywords]} table and
+finds every keyword in a text fragment in a single left-to-right pass,
+instead of testing each keyword of each category with a substring scan.
+A fragment matches a category when one of its keywords occurs as whole
+space-separated words or, for fragments longer than 8 characters,
+anywhere in it (the rule of process_multilabel_flexible.find_matches).
+
+Matches are bitsets: bit i stands for ``matcher.categories[i]``. A row's
+fragments OR together into one mask, and a column of masks converts to a
+sparse row x category membership matrix.
+"""
+from collections import deque
+from typing import Dict, Iterable, List, Sequence
+import numpy as np
+
+# Padded fragments longer than this also match keywords inside words
+SUBSTRING_MIN_LENGTH = 11
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over the keywords of a set of categories."""
+
+    def __init__(self, category_keywords: Dict[str, Iterable[str]]):
+        self.categories = sorted(category_keywords)
+        keyword_masks = {}
+        for bit, category in enumerate(self.categories):
+            for keyword in category_keywords[category]:
+                keyword_masks[keyword] = keyword_masks.get(keyword, 0) | (1 << bit)
+
+        # Trie of the keywords; outputs[state] lists (length, mask) of keywords ending there
+        goto = [{}]
+        outputs = [[]]
+        for keyword, mask in keyword_masks.items():
+            state = 0
+            for char in keyword:
+                if char not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            outputs[state].append((len(keyword), mask))
+
+        # Breadth-first failure links, folded into a full transition table
+        # so matching never follows a failure link
+        transitions = [dict(goto[0])]
+        transitions.extend({} for _ in range(len(goto) - 1))
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            transitions[state] = dict(transitions[fail[state]])
+            for char, child in goto[state].items():
+                fail[child] = transitions[fail[state]].get(char, 0)
+                transitions[state][char] = child
+                queue.append(child)
+        self.transitions = transitions
+        self.outputs = [tuple(output) for output in outputs]
+
+    def match_fragment(self, text: str) -> int:
+        """Bitset of the categories matched by one cleaned text fragment."""
+        padded = ' ' + text + ' '
+        anywhere = len(padded) >= SUBSTRING_MIN_LENGTH
+        transitions, outputs = self.transitions, self.outputs
+        mask = 0
+        state = 0
+        for end, char in enumerate(padded, 1):
+            state = transitions[state].get(char, 0)
+            for length, keyword_mask in outputs[state]:
+                if anywhere or (padded[end - length - 1] == ' ' and padded[end] == ' '):
+                    mask |= keyword_mask
+        return mask
+
+    def match(self, fragments: Iterable[str]) -> int:
+        """Bitset of the categories matched by any of a row's fragments."""
+        mask = 0
+        for fragment in fragments:
+            mask |= self.match_fragment(fragment)
+        return mask
+
+    def masks(self, rows: Iterable[Iterable[str]]) -> np.ndarray:
+        """Category bitset of every row of fragments (at most 64 categories)."""
+        if len(self.categories) > 64:
+            raise ValueError("masks() packs at most 64 categories into a uint64")
+        return np.array([self.match(fragments) for fragments in rows], dtype=np.uint64)
+
+    def names(self, mask: int) -> List[str]:
+        """Category names of a bitset, in category order."""
+        return [category for bit, category in enumerate(self.categories) if mask >> bit & 1]
+
+    def to_sparse(self, masks: Sequence[int]):
+        """Boolean rows x categories CSR membership matrix of the bitsets."""
+        from scipy import sparse
+
+        masks = np.asarray(masks, dtype=np.uint64)
+        bits = np.arange(len(self.categories), dtype=np.uint64)
+        members = (masks[:, None] >> bits) & np.uint64(1)
+        rows, columns = np.nonzero(members)
+        return sparse.csr_matrix(
+            (np.ones(len(rows), dtype=bool), (rows, columns)),
+            shape=(len(masks), len(self.categories))
+        )
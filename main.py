@@ -1,15 +1,16 @@
 import pandas as pd
 import pyarrow.parquet as pq
+from parquet_input import data_columns, read_columns
 
 def display_profile_stats():
-    # Read the parquet file
+    # Read only the columns shown below (labelled by position)
     print('Reading Parquet file...')
-    df = pd.read_parquet('profiles.parquet')
+    df = read_columns('profiles.parquet', columns=range(10))
     
     # Display basic information about the dataset
     print('\nDataset Info:')
     print(f'Number of profiles: {len(df)}')
-    print(f'Number of columns: {len(df.columns)}')
+    print(f'Number of columns: {len(data_columns("profiles.parquet"))}')
     
     # Display first few rows with better formatting
     print('\nFirst 5 profiles (selected columns):')
@@ -19,13 +20,13 @@ def display_profile_stats():
     
     # Display some basic statistics
     print('\nAge distribution (column 2):')
-    age_data = df.iloc[:, 2]  # Get the third column (age)
+    age_data = df[2]  # Get the third column (age)
     print(age_data.describe())
     
     # Count number of users by region
     print('\nTop 5 regions by number of users (column 4):')
-    regions = df.iloc[:, 4]  # Get the fifth column (region)
+    regions = df[4]  # Get the fifth column (region)
     print(regions.value_counts().head())
 
 if __name__ == '__main__':
-    display_profile_stats()
\ No newline at end of file
+    display_profile_stats()
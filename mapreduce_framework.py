@@ -1,50 +1,268 @@
 from abc import ABC, abstractmethod
 from collections import defaultdict
+from functools import partial
+import copy
 import multiprocessing as mp
-from typing import Iterator, List, Tuple, Any, Dict
+from multiprocessing import resource_tracker
+import operator
+import zlib
+from typing import Iterator, List, Tuple, Any, Dict, Optional
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from shared_frame import SharedFrame
+from pokec_schema import PARQUET_INDEX
+import profile_completion
 
 class MapReduceFramework:
-    def __init__(self, n_workers: int = None):
+    def __init__(self, n_workers: int = None, chunks_per_worker: int = 4,
+                 shared_memory: bool = True):
         self.n_workers = n_workers or mp.cpu_count()
+        self.chunks_per_worker = chunks_per_worker
+        self.shared_memory = shared_memory
 
     def run(self, mapper_class, reducer_class, input_data: pd.DataFrame) -> Dict:
-        # Initialize mapper and reducer
-        mapper = mapper_class()
-        reducer = reducer_class()
-        
-        # Partition data for parallel processing
-        chunks = np.array_split(input_data, self.n_workers)
-        
-        # Run map phase in parallel
-        with mp.Pool(self.n_workers) as pool:
-            mapped_results = pool.map(mapper.map, chunks)
-        
-        # Combine mapped results
-        combined_results = defaultdict(list)
-        for result in mapped_results:
-            for key, values in result.items():
-                combined_results[key].extend(values)
-        
-        # Run reduce phase
-        final_results = {}
-        for key, values in combined_results.items():
-            final_results[key] = reducer.reduce(key, values)
-            
+        """Run a job with combining and a parallel, hash-partitioned reduce.
+
+        Each worker combines its own map output before returning it, and the
+        parent folds partial aggregates into the running state as soon as a
+        chunk finishes instead of holding every mapper's output at once.
+
+        With ``shared_memory`` enabled the input is placed in a SharedFrame
+        once and tasks carry only (start, stop) row offsets.
+        """
+        with self.session(input_data) as session:
+            return session.run(mapper_class, reducer_class)
+
+    # Every run streams now; kept for callers of the former opt-in mode
+    run_streaming = run
+
+    def run_fused(self, jobs: List[Tuple[Any, Any]], input_data: pd.DataFrame) -> List[Dict]:
+        """Run several mapper/reducer pairs in a single scan of the input."""
+        with self.session(input_data) as session:
+            return session.run_fused(jobs)
+
+    def session(self, input_data, cache_splits: bool = False) -> 'MapReduceSession':
+        """Open a warm pool that can run several jobs over the same input."""
+        return MapReduceSession(self, input_data, cache_splits)
+
+    def _iter_bounds(self, n_rows: int) -> Iterator[Tuple[int, int]]:
+        """Yield (start, stop) row ranges small enough to keep every worker busy."""
+        n_chunks = max(1, min(n_rows, self.n_workers * self.chunks_per_worker))
+        bounds = np.linspace(0, n_rows, n_chunks + 1).astype(int)
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            yield int(start), int(stop)
+
+    def _iter_chunks(self, input_data: pd.DataFrame) -> Iterator[pd.DataFrame]:
+        """Yield row slices of the input for pickling to workers."""
+        for start, stop in self._iter_bounds(len(input_data)):
+            yield input_data.iloc[start:stop]
+
+    def _partition(self, partials: Dict[Any, List]) -> List[Dict[Any, List]]:
+        """Split combined map output into one reduce partition per worker."""
+        partitions = [{} for _ in range(self.n_workers)]
+        for key, values in partials.items():
+            partitions[partition_for(key, self.n_workers)][key] = values
+        return [part for part in partitions if part]
+
+class MapReduceSession:
+    """A worker pool kept alive across jobs, with the input already resident.
+
+    The dataset is shipped to the workers once when the session opens;
+    every ``run`` afterwards only sends row offsets, so back-to-back
+    analyses share both the pool start-up and the data transfer.
+
+    The input may also be a sequence of input splits (objects with a
+    ``read()`` method returning a DataFrame, see parquet_input and
+    tsv_input). Workers then read their splits themselves, in parallel,
+    and the parent never holds the table. Each job re-reads the splits
+    unless ``cache_splits`` is set: the workers then read every split once
+    when the session opens, into shared memory blocks of their own, and
+    later tasks only carry the spec of a cached split.
+    """
+
+    def __init__(self, framework: MapReduceFramework, input_data, cache_splits: bool = False):
+        self.framework = framework
+        self.splits = None
+        self.cached = None
+        self.input_data = None
+        self.frame = None
+        if not isinstance(input_data, pd.DataFrame):
+            # Input splits: every task reads its own split inside the worker
+            self.splits = list(input_data)
+            self.n_rows = None
+            if cache_splits:
+                # One tracker for the whole pool, so cached blocks outlive the worker that made them
+                resource_tracker.ensure_running()
+            self.pool = mp.Pool(framework.n_workers)
+            if cache_splits:
+                self.cached = [SharedFrame.attach(spec, owner=True)
+                               for spec in self.pool.map(_cache_split, self.splits)]
+        elif framework.shared_memory:
+            self.n_rows = len(input_data)
+            self.frame = SharedFrame.create(input_data)
+            self.pool = mp.Pool(framework.n_workers, initializer=_attach_frame,
+                                initargs=(self.frame.spec,))
+        else:
+            self.n_rows = len(input_data)
+            self.input_data = input_data
+            self.pool = mp.Pool(framework.n_workers)
+
+    def run(self, mapper_class, reducer_class) -> Dict:
+        """Run one mapper/reducer pair against the resident input."""
+        return self.run_fused([(mapper_class, reducer_class)])[0]
+
+    def run_fused(self, jobs: List[Tuple[Any, Any]]) -> List[Dict]:
+        """Run several mapper/reducer pairs in one scan of the resident input.
+
+        Each partition is read once, the derived columns any of the mappers
+        ask for are computed once, and every mapper sees the same chunk.
+        Results come back in the order of ``jobs``.
+        """
+        mappers = [_instantiate(mapper_class) for mapper_class, _ in jobs]
+        reducers = [_instantiate(reducer_class) for _, reducer_class in jobs]
+
+        # Partial aggregates are keyed by (job index, mapper key); folding them
+        # in chunk order keeps order-sensitive partials (sketches) reproducible
+        partials = defaultdict(list)
+        for results in self.pool.imap(partial(_map_fused, mappers), self._chunks()):
+            for job, result in enumerate(results):
+                for key, values in result.items():
+                    partials[job, key].extend(values)
+                    partials[job, key] = mappers[job].combine(key, partials[job, key])
+
+        partitions = self.framework._partition(partials)
+        reduced = self.pool.map(partial(_reduce_partition, reducers), partitions)
+
+        final_results = [{} for _ in jobs]
+        for part in reduced:
+            for (job, key), value in part.items():
+                final_results[job][key] = value
         return final_results
 
+    def _chunks(self):
+        if self.cached is not None:
+            return (frame.spec for frame in self.cached)
+        if self.splits is not None:
+            return iter(self.splits)
+        if self.frame is not None:
+            return self.framework._iter_bounds(self.n_rows)
+        return self.framework._iter_chunks(self.input_data)
+
+    def close(self):
+        """Shut the pool down and release the shared input."""
+        self.pool.close()
+        self.pool.join()
+        if self.frame is not None:
+            self.frame.close()
+        for frame in self.cached or ():
+            frame.close()
+        self.cached = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.pool.terminate()
+        self.close()
+
 class Mapper(ABC):
+    # Shared per-row columns (see DERIVED_COLUMNS) this mapper reads
+    derived_columns: Tuple[str, ...] = ()
+    # Raw input columns (by position) this mapper reads; None means all of them
+    columns: Optional[Tuple[int, ...]] = None
+    # Row filters as (column, op, value) triples that must all hold; column
+    # is a raw position or a derived column name, op one of FILTER_OPS
+    filters: Tuple[Tuple[Any, str, Any], ...] = ()
+
     @abstractmethod
     def map(self, chunk: pd.DataFrame) -> Dict[Any, List]:
         pass
 
+    def combine(self, key: Any, values: List) -> List:
+        """Collapse the values seen so far for a key into partial aggregates.
+
+        The default keeps every value. Mappers whose reducer is associative
+        override this so streaming runs only ever hold compact partials.
+        """
+        return values
+
+    def where(self, *filters: Tuple[Any, str, Any]) -> 'Mapper':
+        """Copy of this mapper that only sees rows matching ``filters`` too."""
+        mapper = copy.copy(self)
+        mapper.filters = tuple(self.filters) + filters
+        return mapper
+
 class Reducer(ABC):
     @abstractmethod
     def reduce(self, key: Any, values: List) -> Any:
         pass
 
+def _instantiate(job_class):
+    """Accept either a mapper/reducer class or a configured instance."""
+    return job_class() if isinstance(job_class, type) else job_class
+
+# Shared-memory input attached once per worker process
+_worker_frame = None
+
+def _attach_frame(spec: Dict[str, Any]):
+    """Pool initializer: map the shared input frame into this worker."""
+    global _worker_frame
+    _worker_frame = SharedFrame.attach(spec)
+
+# Cached splits this worker has attached, by the name of their first block
+_cached_frames = {}
+
+def _cache_split(split) -> Dict[str, Any]:
+    """Worker task: read a split into new shared memory; the session frees it."""
+    frame = SharedFrame.create(split.read())
+    frame.owner = False
+    frame.close()
+    return frame.spec
+
+def _attach_cached(spec: Dict[str, Any]) -> SharedFrame:
+    """This worker's mapping of a cached split, attached on first use."""
+    if not spec['columns']:
+        return SharedFrame.attach(spec)
+    key = spec['columns'][0]['block']
+    if key not in _cached_frames:
+        _cached_frames[key] = SharedFrame.attach(spec)
+    return _cached_frames[key]
+
+def _resolve_chunk(chunk) -> pd.DataFrame:
+    """Turn a task payload (a DataFrame, row offsets, a cached split's spec or
+    a split) into a DataFrame."""
+    if isinstance(chunk, tuple):
+        return _worker_frame.slice(*chunk)
+    if isinstance(chunk, dict):
+        return _attach_cached(chunk).slice(0, chunk['length'])
+    if not isinstance(chunk, pd.DataFrame):
+        return chunk.read()
+    return chunk
+
+def _map_fused(mappers: List[Mapper], chunk) -> List[Dict[Any, List]]:
+    """Worker task: scan a chunk once for every mapper, combining each output."""
+    chunk = _resolve_chunk(chunk)
+    needed = [name for mapper in mappers for name in mapper.derived_columns]
+    chunk = derive_columns(chunk, needed)
+    return [
+        {key: mapper.combine(key, values)
+         for key, values in mapper.map(filter_rows(chunk, mapper.filters)).items()}
+        for mapper in mappers
+    ]
+
+def _reduce_partition(reducers: List[Reducer], partition: Dict[Tuple[int, Any], List]) -> Dict:
+    """Worker task: reduce every (job, key) of one hash partition."""
+    return {
+        (job, key): reducers[job].reduce(key, values)
+        for (job, key), values in partition.items()
+    }
+
+def partition_for(key: Any, n_partitions: int) -> int:
+    """Stable hash partition of a key (independent of PYTHONHASHSEED)."""
+    return zlib.crc32(repr(key).encode('utf-8')) % n_partitions
+
 # Utility functions
 def parse_date(date_str: str) -> datetime:
     """Parse date string to datetime object."""
@@ -54,10 +272,109 @@ def parse_date(date_str: str) -> datetime:
         return None
 
 def calculate_completion_percentage(row: pd.Series) -> float:
-    """Calculate profile completion percentage."""
-    non_null_count = row.notna().sum()
-    total_fields = len(row)
-    return (non_null_count / total_fields) * 100
+    """Calculate profile completion percentage of a single row."""
+    return profile_completion.field_completion(row.tolist())
+
+def clean_age(chunk: pd.DataFrame) -> pd.Series:
+    """Numeric age (column 2); unparseable values become NaN."""
+    return pd.to_numeric(chunk[AGE_COLUMN], errors='coerce')
+
+def completion_rate(chunk: pd.DataFrame) -> pd.Series:
+    """Per-row profile completion percentage (vectorized over the null bitmap)."""
+    return pd.Series(profile_completion.completion_rate(chunk), index=chunk.index)
+
+# Parquet positions of the raw columns the analyses share
+GENDER_COLUMN = PARQUET_INDEX['gender']
+AGE_COLUMN = PARQUET_INDEX['AGE']
+REGION_COLUMN = PARQUET_INDEX['region']
+
+# Per-row columns shared between mappers, computed once per chunk
+DERIVED_COLUMNS = {
+    'age': clean_age,
+    'completion_rate': completion_rate
+}
+# Raw columns each derived column is computed from; None means the full row
+DERIVED_SOURCES = {
+    'age': (AGE_COLUMN,),
+    'completion_rate': None
+}
+
+FILTER_OPS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'in': lambda values, options: values.isin(options),
+    'not in': lambda values, options: ~values.isin(options)
+}
+
+def filter_rows(chunk: pd.DataFrame, filters) -> pd.DataFrame:
+    """Rows of the chunk for which every (column, op, value) filter holds."""
+    if not filters:
+        return chunk
+    mask = np.ones(len(chunk), dtype=bool)
+    for column, op, value in filters:
+        mask &= np.asarray(FILTER_OPS[op](chunk[column], value), dtype=bool)
+    return chunk[mask]
+
+def derive_columns(chunk: pd.DataFrame, names) -> pd.DataFrame:
+    """Return the chunk with the requested derived columns attached.
+
+    Every column is computed from the raw fields before any is added, so
+    derived columns never count towards each other (e.g. completion).
+    Columns already present on the chunk are reused as they are.
+    """
+    missing = [name for name in dict.fromkeys(names) if name not in chunk.columns]
+    if not missing:
+        return chunk
+    return chunk.assign(**{name: DERIVED_COLUMNS[name](chunk) for name in missing})
+
+def plan_columns(mappers) -> Tuple[Optional[List[int]], List[str], List]:
+    """Raw columns, derived columns and shared row filters for a set of mappers."""
+    derived = list(dict.fromkeys(name for mapper in mappers for name in mapper.derived_columns))
+    columns = set()
+    for mapper in mappers:
+        if mapper.columns is None:
+            columns = None
+            break
+        columns.update(mapper.columns)
+    # Only filters every job applies can drop rows before the map phase
+    shared = [f for f in (mappers[0].filters if mappers else ())
+              if all(f in mapper.filters for mapper in mappers[1:])]
+    return (None if columns is None else sorted(columns)), derived, shared
+
+def plan_read(n_columns: int, columns=None, derived=(), filters=(),
+              locate=None) -> Tuple[List[int], List[int]]:
+    """Positions to keep in the output and positions that must be read for them.
+
+    Filters may need extra raw columns, and a derived column whose source
+    is the full row (completion rate) forces every column to be read.
+    ``locate`` maps the positions mappers declare (the Parquet layout) to
+    positions in an input with another layout, such as the TSV.
+    """
+    locate = locate or (lambda column: column)
+    keep = list(range(n_columns)) if columns is None else sorted({locate(c) for c in columns})
+    sources = set(keep)
+    sources.update(locate(column) for column, _, _ in filters if isinstance(column, int))
+    for name in derived:
+        if DERIVED_SOURCES[name] is None:
+            return keep, list(range(n_columns))
+        sources.update(locate(column) for column in DERIVED_SOURCES[name])
+    return keep, sorted(sources)
+
+def project_chunk(chunk: pd.DataFrame, keep: List[int], derived=(), filters=()) -> pd.DataFrame:
+    """Derive columns from the raw fields, filter rows, then project."""
+    chunk = filter_rows(derive_columns(chunk, derived), filters)
+    return chunk[list(keep) + list(derived)]
+
+def sum_counts(pairs: List[Tuple[Any, int]]) -> List[Tuple[Any, int]]:
+    """Merge (value, count) pairs into one pair per distinct value."""
+    counts = defaultdict(int)
+    for value, count in pairs:
+        counts[value] += count
+    return list(counts.items())
 
 def process_multi_label_field(field: str) -> List[str]:
     """Process multi-label fields like hobbies and languages."""
@@ -0,0 +1,136 @@
+"""
+Column-projected, filter-pushed Parquet input for the MapReduce jobs.
+
+Every Mapper declares the raw columns it reads (``columns``), the derived
+columns it needs and optional row ``filters``. Only the union of those
+columns is kept, filters all jobs share are handed to pyarrow so failing
+rows (and whole row groups, via their statistics) are skipped while
+reading, and the result is labelled by original column position so
+mappers can address fields as ``chunk[position]``.
+"""
+from functools import reduce
+from typing import Any, Iterable, List, Optional, Sequence
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from mapreduce_framework import AGE_COLUMN, Mapper, plan_columns, plan_read, project_chunk
+
+# Comparisons that drop missing values both in pandas and in pyarrow
+PUSHDOWN_OPS = {
+    '==': lambda field, value: field == value,
+    '<': lambda field, value: field < value,
+    '<=': lambda field, value: field <= value,
+    '>': lambda field, value: field > value,
+    '>=': lambda field, value: field >= value,
+    'in': lambda field, value: field.isin(list(value))
+}
+
+def data_columns(path: str) -> List[str]:
+    """Names of the data columns of a Parquet file, in positional order."""
+    schema = ds.dataset(path, format='parquet').schema
+    return [name for name in schema.names if not name.startswith('__index_level_')]
+
+def read_for_jobs(path: str, mappers: Sequence[Mapper]) -> pd.DataFrame:
+    """Read just what ``mappers`` need from a Parquet file."""
+    columns, derived, filters = plan_columns(mappers)
+    return read_columns(path, columns, derived, filters)
+
+def read_columns(path: str, columns: Optional[Iterable[int]] = None,
+                 derived: Sequence[str] = (), filters: Sequence = ()) -> pd.DataFrame:
+    """Read a Parquet file with projection and filter pushdown.
+
+    ``columns`` are raw positions (None for all). Derived columns are
+    computed batch by batch from the raw fields before projecting, so
+    those that need the full row (completion rate) stay correct.
+    """
+    dataset = ds.dataset(path, format='parquet')
+    names = data_columns(path)
+    keep, read = plan_read(len(names), columns, derived, filters)
+
+    pushed = _pushdown_expression(filters, dataset.schema, names)
+    frames = []
+    for batch in dataset.to_batches(columns=[names[i] for i in read], filter=pushed):
+        chunk = batch.to_pandas()
+        chunk.columns = read
+        frames.append(project_chunk(chunk, keep, derived, filters))
+    if not frames:
+        return pd.DataFrame(columns=keep + list(derived))
+    return pd.concat(frames, ignore_index=True)
+
+class ParquetSplit:
+    """One row group of a Parquet file, read by whichever worker gets it.
+
+    Rows keep their position in the whole file as index labels, so output
+    that depends on row identity does not depend on the split layout.
+    """
+
+    def __init__(self, path: str, row_group: int, row_offset: int, names: List[str],
+                 read: List[int], keep: List[int], derived: Sequence[str] = (),
+                 filters: Sequence = ()):
+        self.path = path
+        self.row_group = row_group
+        self.row_offset = row_offset
+        self.names = names
+        self.read_columns = read
+        self.keep = keep
+        self.derived = list(derived)
+        self.filters = list(filters)
+
+    def read(self) -> pd.DataFrame:
+        table = pq.ParquetFile(self.path).read_row_group(
+            self.row_group, columns=[self.names[i] for i in self.read_columns])
+        chunk = table.to_pandas()
+        chunk.columns = self.read_columns
+        chunk.index = pd.RangeIndex(self.row_offset, self.row_offset + len(chunk))
+        return project_chunk(chunk, self.keep, self.derived, self.filters)
+
+def parquet_splits(path: str, mappers: Sequence[Mapper] = ()) -> List[ParquetSplit]:
+    """One input split per row group of a Parquet file or directory.
+
+    Columns and shared filters are planned from ``mappers`` as in
+    ``read_for_jobs``; row groups whose statistics rule out every row
+    are dropped before any worker opens them.
+    """
+    columns, derived, filters = plan_columns(mappers)
+    dataset = ds.dataset(path, format='parquet')
+    names = data_columns(path)
+    keep, read = plan_read(len(names), columns, derived, filters)
+    pushed = _pushdown_expression(filters, dataset.schema, names)
+
+    splits = []
+    row_offset = 0
+    for fragment in dataset.get_fragments():
+        metadata = fragment.metadata
+        live = None
+        if pushed is not None:
+            live = {piece.row_groups[0].id for piece in fragment.split_by_row_group(pushed)}
+        for row_group in range(metadata.num_row_groups):
+            if live is None or row_group in live:
+                splits.append(ParquetSplit(fragment.path, row_group, row_offset, names,
+                                           read, keep, derived, filters))
+            row_offset += metadata.row_group(row_group).num_rows
+    return splits
+
+def _pushdown_expression(filters: Sequence, schema: pa.Schema, names: List[str]):
+    """pyarrow expression for the filters that can be evaluated on raw columns."""
+    expressions = []
+    for column, op, value in filters:
+        # Age is only derivable in pyarrow when the raw column is numeric already
+        if column == 'age':
+            column = AGE_COLUMN
+        if not isinstance(column, int) or op not in PUSHDOWN_OPS:
+            continue
+        field_type = schema.field(names[column]).type
+        if _comparable(field_type, value):
+            expressions.append(PUSHDOWN_OPS[op](pc.field(names[column]), value))
+    return reduce(lambda a, b: a & b, expressions) if expressions else None
+
+def _comparable(field_type: pa.DataType, value: Any) -> bool:
+    values = value if isinstance(value, (list, tuple, set, frozenset)) else [value]
+    if pa.types.is_integer(field_type) or pa.types.is_floating(field_type):
+        return all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values)
+    if pa.types.is_string(field_type) or pa.types.is_large_string(field_type):
+        return all(isinstance(v, str) for v in values)
+    return False
@@ -0,0 +1,190 @@
+"""
+Typed Parquet cache of the Pokec profile TSV.
+
+build_cache() parses soc-pokec-profiles.txt once, chunk by chunk, into a
+directory of Parquet part files with the canonical types of pokec_schema:
+downcast integers, parsed timestamps and dictionary-encoded answer
+columns, the rest as strings. Missing values are read as pandas reads
+them by default ('null' and the like). Each part file holds the next
+PART_ROWS rows, so reading the parts in name order gives the rows in file
+order and ``nrows`` keeps meaning "the first rows of the TSV".
+
+load_profiles() and iter_profiles() read the cache with column
+projection, (re)building it first when it is missing or older than the
+TSV, so the analyses never parse the text file themselves.
+
+Usage: pokec_cache.py [TSV_FILE [CACHE_DIR]]   (always rebuilds the cache; CACHE_DIR
+defaults to TSV_FILE with a .parquet extension)
+"""
+import os
+import shutil
+import sys
+from typing import Iterator, Optional, Sequence
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pokec_dates import FORMATS
+from pokec_schema import CATEGORICAL_COLUMNS, INTEGER_TYPES, TIMESTAMP_COLUMNS, TSV_COLUMNS
+
+TSV_FILE = 'data/soc-pokec-profiles.txt'
+
+def cache_path(tsv_path: str) -> str:
+    """Default cache directory of a TSV: its path with a .parquet extension."""
+    return os.path.splitext(tsv_path)[0] + '.parquet'
+
+CACHE_DIR = cache_path(TSV_FILE)
+
+# Rows per part file (and per chunk parsed from the TSV)
+PART_ROWS = 250000
+
+# Written last by build_cache; its absence marks an incomplete cache
+BUILT_MARKER = '_SUCCESS'
+
+def cache_schema() -> pa.Schema:
+    """Arrow schema of the cache, one field per TSV column."""
+    fields = []
+    for name in TSV_COLUMNS:
+        if name in INTEGER_TYPES:
+            field_type = pa.from_numpy_dtype(np.dtype(INTEGER_TYPES[name]))
+        elif name in TIMESTAMP_COLUMNS:
+            field_type = pa.timestamp('us')
+        elif name in CATEGORICAL_COLUMNS:
+            field_type = pa.dictionary(pa.int32(), pa.string())
+        else:
+            field_type = pa.string()
+        fields.append(pa.field(name, field_type))
+    return pa.schema(fields)
+
+def parse_timestamps(values: pd.Series) -> pd.Series:
+    """Parse a column of Pokec timestamps; NaT where missing or invalid."""
+    parsed = pd.to_datetime(values, format=FORMATS[0], errors='coerce')
+    for fmt in FORMATS[1:]:
+        # Retry what the previous format could not parse (e.g. no milliseconds)
+        retry = parsed.isna() & values.notna()
+        if not retry.any():
+            break
+        parsed[retry] = pd.to_datetime(values[retry], format=fmt, errors='coerce')
+    return parsed
+
+def to_integers(values: pd.Series, dtype: str) -> pd.Series:
+    """Column as a nullable integer ``dtype``; missing where not a whole number in range."""
+    numbers = pd.to_numeric(values, errors='coerce')
+    info = np.iinfo(dtype)
+    numbers = numbers.where(numbers.between(info.min, info.max) & (numbers % 1 == 0))
+    return numbers.astype(dtype.capitalize())
+
+def convert_chunk(chunk: pd.DataFrame, schema: pa.Schema) -> pa.Table:
+    """Arrow table with the cache types of a chunk of raw (string) TSV columns."""
+    arrays = []
+    for field in schema:
+        values = chunk[field.name]
+        if field.name in INTEGER_TYPES:
+            array = pa.array(to_integers(values, INTEGER_TYPES[field.name]), type=field.type)
+        elif field.name in TIMESTAMP_COLUMNS:
+            array = pa.array(parse_timestamps(values), type=field.type, from_pandas=True)
+        elif field.name in CATEGORICAL_COLUMNS:
+            array = pa.array(values, type=pa.string(), from_pandas=True).dictionary_encode()
+        else:
+            array = pa.array(values, type=pa.string(), from_pandas=True)
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+def build_cache(tsv_path: str = TSV_FILE, cache_dir: str = CACHE_DIR,
+                part_rows: int = PART_ROWS) -> int:
+    """Convert the TSV into the Parquet cache; returns the number of rows.
+
+    The parts are written to a temporary directory that replaces
+    ``cache_dir`` only once complete.
+    """
+    building = cache_dir.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(building, ignore_errors=True)
+    os.makedirs(building)
+
+    schema = cache_schema()
+    rows = 0
+    # index_col=False keeps user_id a column when lines end in a tab
+    chunks = pd.read_csv(tsv_path, sep='\t', names=list(TSV_COLUMNS), index_col=False,
+                         dtype=str, chunksize=part_rows)
+    for part, chunk in enumerate(chunks):
+        pq.write_table(convert_chunk(chunk, schema),
+                       os.path.join(building, f'part-{part:05d}.parquet'))
+        rows += len(chunk)
+    with open(os.path.join(building, BUILT_MARKER), 'w') as f:
+        f.write(f'{rows}\n')
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(building, cache_dir)
+    return rows
+
+def is_current(tsv_path: str = TSV_FILE, cache_dir: str = CACHE_DIR) -> bool:
+    """Whether the cache is complete and not older than the TSV (if the TSV exists)."""
+    marker = os.path.join(cache_dir, BUILT_MARKER)
+    if not os.path.exists(marker):
+        return False
+    return not os.path.exists(tsv_path) or os.path.getmtime(tsv_path) <= os.path.getmtime(marker)
+
+def open_cache(tsv_path: str = TSV_FILE, cache_dir: Optional[str] = None) -> ds.Dataset:
+    """Dataset of the cache parts in row order, building the cache if needed.
+
+    ``cache_dir`` defaults to the cache_path of ``tsv_path``.
+    """
+    cache_dir = cache_dir or cache_path(tsv_path)
+    if not is_current(tsv_path, cache_dir):
+        print(f"Building Parquet cache of {tsv_path} in {cache_dir}...")
+        rows = build_cache(tsv_path, cache_dir)
+        print(f"Cached {rows:,} profiles")
+    parts = sorted(name for name in os.listdir(cache_dir) if name.endswith('.parquet'))
+    return ds.dataset([os.path.join(cache_dir, name) for name in parts], format='parquet')
+
+def to_frame(table: pa.Table, categorical: bool = True) -> pd.DataFrame:
+    """DataFrame of a cache table.
+
+    Dictionary columns become categoricals holding just the values that
+    occur, in sorted order, so grouping, value counts and dummies match
+    those of the plain strings; with ``categorical=False`` they are
+    decoded to strings. Integer columns with missing values come back as
+    float64, as pd.read_csv gives them.
+    """
+    for index, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type) and not categorical:
+            table = table.set_column(index, field.name, table.column(index).cast(pa.string()))
+    df = table.to_pandas()
+    if categorical:
+        for column in df.columns:
+            if isinstance(df[column].dtype, pd.CategoricalDtype):
+                values = df[column].cat.remove_unused_categories()
+                df[column] = values.cat.reorder_categories(sorted(values.cat.categories))
+    return df
+
+def load_profiles(columns: Optional[Sequence[str]] = None, nrows: Optional[int] = None,
+                  categorical: bool = True, tsv_path: str = TSV_FILE,
+                  cache_dir: Optional[str] = None) -> pd.DataFrame:
+    """The named columns (all by default) of the first ``nrows`` profiles (all by default)."""
+    dataset = open_cache(tsv_path, cache_dir)
+    columns = list(columns) if columns is not None else None
+    if nrows is None:
+        table = dataset.to_table(columns=columns)
+    else:
+        table = dataset.head(nrows, columns=columns)
+    return to_frame(table, categorical)
+
+def iter_profiles(columns: Optional[Sequence[str]] = None, batch_size: int = PART_ROWS,
+                  categorical: bool = True, tsv_path: str = TSV_FILE,
+                  cache_dir: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """DataFrames of at most ``batch_size`` consecutive profiles, in file order."""
+    dataset = open_cache(tsv_path, cache_dir)
+    columns = list(columns) if columns is not None else None
+    for batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+        if batch.num_rows:
+            yield to_frame(pa.Table.from_batches([batch]), categorical)
+
+def main():
+    tsv_path = sys.argv[1] if len(sys.argv) > 1 else TSV_FILE
+    cache_dir = sys.argv[2] if len(sys.argv) > 2 else cache_path(tsv_path)
+    rows = build_cache(tsv_path, cache_dir)
+    print(f"Cached {rows:,} profiles from {tsv_path} in {cache_dir}")
+
+if __name__ == "__main__":
+    main()
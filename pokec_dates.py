@@ -0,0 +1,101 @@
+"""
+Fast parsing of the Pokec last_login/registration timestamps.
+
+Timestamps look like ``2012-05-25 11:20:00.0``. parse_timestamp reads
+that fixed layout by slicing, with the calendar part memoized per date
+prefix (most profiles share a handful of login days), and falls back to
+strptime for any other layout. Times are integer microseconds since the
+epoch, so durations are exact integer arithmetic:
+``(last_login - registration) // US_PER_DAY`` equals
+``(datetime - datetime).days``.
+"""
+import bisect
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Optional
+import numpy as np
+
+US_PER_SECOND = 1000000
+US_PER_DAY = 86400 * US_PER_SECOND
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Upper bounds (inclusive, in days) of the registration duration categories;
+# longer durations fall in a last, open-ended category
+DURATION_BOUNDS = [30, 90, 180, 365, 730]
+
+# Distinct date prefixes remembered by epoch_day
+DATE_CACHE_SIZE = 65536
+
+FORMATS = ('%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S')
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def epoch_day(prefix: str) -> Optional[int]:
+    """Days since 1970-01-01 of a ``YYYY-MM-DD`` prefix; None if not a date."""
+    if prefix[4] != '-' or prefix[7] != '-':
+        return None
+    year, month, day = prefix[0:4], prefix[5:7], prefix[8:10]
+    if not (year.isdigit() and month.isdigit() and day.isdigit()):
+        return None
+    try:
+        return date(int(year), int(month), int(day)).toordinal() - EPOCH_ORDINAL
+    except ValueError:
+        return None
+
+def _parse_fixed(value: str) -> Optional[int]:
+    """Epoch microseconds of ``YYYY-MM-DD HH:MM:SS[.f]``; None if the layout differs."""
+    if (len(value) < 19 or value[10] != ' ' or value[13] != ':' or value[16] != ':'
+            or not value.isascii()):
+        return None
+    day = epoch_day(value[:10])
+    if day is None:
+        return None
+    hour, minute, second = value[11:13], value[14:16], value[17:19]
+    if not (hour.isdigit() and minute.isdigit() and second.isdigit()):
+        return None
+    hour, minute, second = int(hour), int(minute), int(second)
+    if hour > 23 or minute > 59 or second > 59:
+        return None
+    micros = 0
+    if len(value) > 19:
+        fraction = value[20:]
+        if value[19] != '.' or not 1 <= len(fraction) <= 6 or not fraction.isdigit():
+            return None
+        micros = int(fraction.ljust(6, '0'))
+    return (day * 86400 + hour * 3600 + minute * 60 + second) * US_PER_SECOND + micros
+
+def _parse_slow(value: str) -> Optional[int]:
+    """strptime fallback for layouts the fixed parser does not take."""
+    for fmt in FORMATS:
+        try:
+            parsed = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        day = parsed.toordinal() - EPOCH_ORDINAL
+        seconds = parsed.hour * 3600 + parsed.minute * 60 + parsed.second
+        return (day * 86400 + seconds) * US_PER_SECOND + parsed.microsecond
+    return None
+
+def parse_timestamp(value) -> Optional[int]:
+    """Epoch microseconds of a Pokec timestamp; None when missing or invalid."""
+    if not value or value == 'null':
+        return None
+    value = str(value)
+    try:
+        parsed = _parse_fixed(value)
+    except (ValueError, IndexError):
+        parsed = None
+    return parsed if parsed is not None else _parse_slow(value)
+
+def duration_days(start: Optional[int], end: Optional[int]) -> Optional[int]:
+    """Whole days from ``start`` to ``end`` (epoch microseconds), as timedelta.days."""
+    if start is None or end is None:
+        return None
+    return (end - start) // US_PER_DAY
+
+def duration_category(days: int) -> int:
+    """Index of the duration category of ``days`` (0 to len(DURATION_BOUNDS))."""
+    return bisect.bisect_left(DURATION_BOUNDS, days)
+
+def duration_categories(days) -> np.ndarray:
+    """Vectorized duration_category for an array of day counts."""
+    return np.searchsorted(DURATION_BOUNDS, days, side='left')
@@ -0,0 +1,49 @@
+"""
+Keyword tables of the Pokec hobby and language categories.
+
+Keywords are lower-case and without punctuation, like the cleaned text
+fragments they are matched against (see keyword_matcher.KeywordMatcher);
+they include common Slovak spelling and inflection variants.
+"""
+
+HOBBY_KEYWORDS = {
+    'sport': ['sport', 'futbal', 'basketbal', 'volejbal', 'tenis', 'hokej', 'fitness', 
+             'behanie', 'plavanie', 'sportovanie', 'futbalovy', 'basketbalovy', 'hokejovy'],
+    'music': ['hudba', 'spev', 'gitara', 'klavir', 'spievanie', 'koncerty', 'hudby', 
+             'spievam', 'hudobny', 'gitare', 'klaviri', 'koncertoch'],
+    'reading': ['citanie', 'knihy', 'literatura', 'citat', 'knih', 'literarny'],
+    'movies': ['filmy', 'kino', 'serial', 'filmov', 'serialy', 'filmare', 'kinach'],
+    'travel': ['cestovanie', 'turistika', 'cestovat', 'cestuje', 'turista', 'cestovatel'],
+    'art': ['umenie', 'malovanie', 'kresba', 'fotenie', 'fotografovanie', 'malovat', 
+           'kreslit', 'fotit', 'umeni', 'umelecky'],
+    'computers': ['pocitace', 'programovanie', 'hry', 'gaming', 'internet', 'pc', 
+                'notebook', 'programator', 'herne', 'online'],
+    'food': ['varenie', 'jedlo', 'gastonomia', 'pecenie', 'varit', 'kuchyna', 
+            'gastronomie', 'kucharske', 'peciem'],
+    'nature': ['priroda', 'zahrada', 'zvierata', 'turistika', 'prirode', 'zahradka', 
+             'zvieratka', 'prirodny'],
+    'social': ['priatelia', 'party', 'zabava', 'tanec', 'disco', 'zabavat', 
+             'kamarati', 'parties', 'diskoteky', 'tanecny'],
+    'sports_extreme': ['skateboard', 'snowboard', 'bike', 'adrenalin', 'extreme', 
+                     'skating', 'biking', 'adrenalinu'],
+    'education': ['studium', 'ucenie', 'skola', 'vzdelavanie', 'student', 'ucit', 
+                'skolsky', 'vzdelavaci'],
+    'cars': ['auta', 'motocykle', 'mechanika', 'auto', 'moto', 'automobily', 
+           'motorkarske', 'mechanik'],
+    'shopping': ['nakupovanie', 'moda', 'oblecenie', 'nakupovat', 'nakupy', 
+               'modne', 'obliekanie']
+}
+
+LANGUAGE_KEYWORDS = {
+    'slovak': ['slovensky', 'slovencina', 'slovensky jazyk', 'slovensky hovorim', 
+             'slovenska rec', 'slovensky perfektne'],
+    'english': ['anglicky', 'anglictina', 'english', 'aj', 'eng', 'anglicky jazyk'],
+    'german': ['nemecky', 'nemcina', 'deutsch', 'nj', 'nemecky jazyk', 'po nemecky'],
+    'czech': ['cesky', 'cestina', 'cj', 'cesky jazyk', 'po cesky'],
+    'hungarian': ['madarsky', 'madarcina', 'madarsky jazyk', 'po madarsky'],
+    'french': ['francuzsky', 'francuzstina', 'fj', 'francuzsky jazyk'],
+    'russian': ['rusky', 'rustina', 'rj', 'rusky jazyk', 'po rusky'],
+    'spanish': ['spanielsky', 'spanielcina', 'sj', 'spanielsky jazyk'],
+    'italian': ['taliansky', 'taliancina', 'tj', 'taliansky jazyk'],
+    'polish': ['polsky', 'polstina', 'pj', 'polsky jazyk']
+}
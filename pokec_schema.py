@@ -0,0 +1,70 @@
+"""
+Column layouts of the Pokec profile data.
+
+TSV_COLUMNS are the 59 tab-separated fields of soc-pokec-profiles.txt in
+order, which the Hadoop streaming scripts read. The Parquet extract the
+in-process analyses read keeps only some of them, at other positions
+(PARQUET_INDEX). The typed Parquet cache of the TSV (pokec_cache.py)
+keeps all of them, with the types given by INTEGER_TYPES,
+TIMESTAMP_COLUMNS and CATEGORICAL_COLUMNS. Look columns up here by name
+rather than hard-coding their indices.
+"""
+from typing import Sequence, Tuple
+
+TSV_COLUMNS = (
+    'user_id', 'public', 'completion_percentage', 'gender', 'region',
+    'last_login', 'registration', 'AGE', 'body', 'I_am_working_in_field',
+    'spoken_languages', 'hobbies', 'I_most_enjoy_good_food', 'pets', 'body_type',
+    'my_eyesight', 'eye_color', 'hair_color', 'hair_type',
+    'completed_level_of_education', 'favourite_color', 'relation_to_smoking',
+    'relation_to_alcohol', 'sign_in_zodiac', 'on_pokec_for', 'love_is_for_me',
+    'relation_to_casual_sex', 'my_partner_should_be', 'marital_status', 'children',
+    'relation_to_children', 'I_like_movies', 'I_like_watching_movie', 'I_like_music',
+    'I_mostly_like_listening_to_music', 'the_idea_of_good_evening',
+    'I_like_specialties_from_kitchen', 'fun', 'I_am_going_to_concerts',
+    'my_active_sports', 'my_passive_sports', 'profession', 'I_like_books',
+    'life_style', 'music', 'cars', 'politics', 'relationships', 'art_culture',
+    'hobbies_interests', 'science_technologies', 'computers_internet', 'education',
+    'sport', 'movies', 'travelling', 'health', 'companies_brands', 'more'
+)
+TSV_INDEX = {name: index for index, name in enumerate(TSV_COLUMNS)}
+
+# Positions of the columns the in-process analyses use in profiles.parquet
+PARQUET_INDEX = {
+    'gender': 1,
+    'AGE': 2,
+    'region': 4
+}
+
+# Narrowest integer type of each whole-number column of the cache
+INTEGER_TYPES = {
+    'user_id': 'int32',
+    'public': 'int8',
+    'completion_percentage': 'int8',
+    'gender': 'int8',
+    'AGE': 'int8'
+}
+
+# Columns parsed into timestamps in the cache
+TIMESTAMP_COLUMNS = ('last_login', 'registration')
+
+# Columns with few distinct answers, dictionary-encoded in the cache; the
+# remaining columns are kept as plain strings
+CATEGORICAL_COLUMNS = (
+    'region', 'body_type', 'my_eyesight', 'eye_color', 'hair_color', 'hair_type',
+    'completed_level_of_education', 'favourite_color', 'relation_to_smoking',
+    'relation_to_alcohol', 'sign_in_zodiac', 'on_pokec_for', 'love_is_for_me',
+    'relation_to_casual_sex', 'marital_status', 'children', 'relation_to_children'
+)
+
+# Inclusive ranges of the whole-number columns summarized with histograms
+VALUE_RANGES = {
+    'AGE': (0, 100),
+    'completion_percentage': (0, 100),
+    # Whole days from registration to last login, up to a century
+    'days_since_registration': (0, 36524)
+}
+
+def tsv_indices(names: Sequence[str]) -> Tuple[int, ...]:
+    """TSV positions of the named columns; KeyError for unknown names."""
+    return tuple(TSV_INDEX[name] for name in names)
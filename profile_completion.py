@@ -0,0 +1,61 @@
+"""
+Profile completion helpers shared by the in-process analyses, the Hadoop
+streaming scripts and the visualizations.
+
+A field counts as filled unless it is missing (None/NaN). Callers reading
+the raw dump, where empty answers are spelled out, opt in to also treat
+the NULL_SENTINELS strings as missing by passing them as ``null_values``.
+"""
+from typing import Iterable, List, Optional, Sequence
+import numpy as np
+
+# Values that mean "not filled in" in the raw Pokec export
+NULL_SENTINELS = ('', 'null')
+
+def null_mask(frame, columns: Optional[Sequence] = None,
+              null_values: Iterable[str] = ()) -> np.ndarray:
+    """Boolean (rows x columns) bitmap that is True where a field is missing."""
+    if columns is not None:
+        frame = frame[list(columns)]
+    missing = frame.isna().to_numpy()
+    null_values = list(null_values)
+    if null_values:
+        for i, dtype in enumerate(frame.dtypes):
+            # Numeric columns cannot hold sentinel strings
+            if isinstance(dtype, np.dtype) and dtype.kind in 'biufcmM':
+                continue
+            missing[:, i] |= frame.iloc[:, i].isin(null_values).to_numpy()
+    return missing
+
+def completion_rate(frame, columns: Optional[Sequence] = None,
+                    null_values: Iterable[str] = ()) -> np.ndarray:
+    """Vectorized per-row completion percentage of a DataFrame."""
+    missing = null_mask(frame, columns, null_values)
+    n_fields = missing.shape[1]
+    if n_fields == 0:
+        return np.zeros(len(missing))
+    filled = n_fields - missing.sum(axis=1)
+    return filled * (100.0 / n_fields)
+
+def is_missing(value, null_values: Iterable[str] = ()) -> bool:
+    """Whether a single raw field counts as not filled in."""
+    return value is None or value != value or value in null_values
+
+def field_missing_flags(fields: Sequence, columns: Optional[Sequence[int]] = None,
+                        null_values: Iterable[str] = ()) -> List[bool]:
+    """Per-field missing flags for one split record (e.g. a TSV line)."""
+    null_values = tuple(null_values)
+    if columns is None:
+        return [is_missing(value, null_values) for value in fields]
+    return [
+        index >= len(fields) or is_missing(fields[index], null_values)
+        for index in columns
+    ]
+
+def field_completion(fields: Sequence, columns: Optional[Sequence[int]] = None,
+                     null_values: Iterable[str] = ()) -> float:
+    """Completion percentage of one split record (e.g. a TSV line)."""
+    flags = field_missing_flags(fields, columns, null_values)
+    if not flags:
+        return 0.0
+    return (len(flags) - sum(flags)) / len(flags) * 100
@@ -7,12 +7,39 @@ HDFS_INPUT_DIR="/user/pokec/input"
 HDFS_OUTPUT_DIR="/user/pokec/output"
 PYTHON_PATH=$(which python3)
 
+# Reduce tasks for the partitioned jobs; their part-* files are merged afterwards
+NUM_REDUCERS=${NUM_REDUCERS:-4}
+# Partition on the first two key fields (e.g. CORRELATION\tage, gender\tmale)
+# so one hot record type is spread over every reducer
+PARTITIONER_OPTS="-D stream.num.map.output.key.fields=2 \
+    -D mapreduce.partition.keypartitioner.options=-k1,2 \
+    -partitioner org.apache.hadoop.mapred.lib.KeyFieldBasedPartitioner"
+
+# Analyses run together in one scan of the input by the single-pass job
+# (any of age, categorical, correlation, clustering, outlier, multilabel,
+# registration_duration, user_features)
+ANALYSES=${ANALYSES:-age,clustering,outlier,multilabel,registration_duration}
+# Key on the analysis name and the analysis' own key, but send all records
+# of an analysis to the same reducer
+MULTI_PARTITIONER_OPTS="-D stream.num.map.output.key.fields=2 \
+    -D mapreduce.partition.keypartitioner.options=-k1,1 \
+    -partitioner org.apache.hadoop.mapred.lib.KeyFieldBasedPartitioner"
+
+# Hobby/language words seen fewer times are left out of the multi-hot encoding
+MULTILABEL_MIN_COUNT=${MULTILABEL_MIN_COUNT:-5}
+
 # Enable debug mode
 set -x
 
 # Make scripts executable
 chmod +x hadoop/demographic_mapper.py hadoop/demographic_reducer.py
 chmod +x hadoop/correlation_mapper.py hadoop/correlation_reducer.py
+chmod +x hadoop/categorical_mapper.py hadoop/categorical_reducer.py
+chmod +x hadoop/user_features_mapper.py hadoop/user_features_reducer.py
+chmod +x hadoop/merge_parts.py
+chmod +x hadoop/multi_mapper.py hadoop/multi_reducer.py
+chmod +x hadoop/multilabel_encode_mapper.py hadoop/multilabel_matrix.py
+chmod +x hadoop/age_normalize_mapper.py
 
 # Create HDFS directories
 echo "Creating HDFS directories..."
@@ -26,6 +53,12 @@ hadoop fs -test -e $HDFS_INPUT_DIR/$INPUT_FILE || hadoop fs -put data/$INPUT_FIL
 echo "Removing existing output directories..."
 hadoop fs -rm -r $HDFS_OUTPUT_DIR/demographics
 hadoop fs -rm -r $HDFS_OUTPUT_DIR/correlations
+hadoop fs -rm -r $HDFS_OUTPUT_DIR/categorical
+hadoop fs -rm -r $HDFS_OUTPUT_DIR/user_features
+hadoop fs -rm -r $HDFS_OUTPUT_DIR/multi
+hadoop fs -rm -r $HDFS_OUTPUT_DIR/multilabel_vocabulary
+hadoop fs -rm -r $HDFS_OUTPUT_DIR/multilabel_encoded
+hadoop fs -rm -r $HDFS_OUTPUT_DIR/age_normalized
 
 # Run demographic analysis
 echo "Running demographic analysis..."
@@ -40,26 +73,120 @@ hadoop jar $HADOOP_STREAMING_JAR \
     -file hadoop/demographic_mapper.py \
     -file hadoop/demographic_reducer.py
 
-# Run correlation analysis with debug flags
+# Run correlation analysis with debug flags; each reducer writes partial
+# state (--partial) that merge_parts.py combines below
 echo "Running correlation analysis..."
 hadoop jar $HADOOP_STREAMING_JAR \
     -D mapred.job.name="Correlation Analysis" \
-    -D mapred.reduce.tasks=1 \
+    -D mapred.reduce.tasks=$NUM_REDUCERS \
     -D mapred.map.tasks=14 \
     -D mapred.task.timeout=6000000 \
     -D mapred.map.output.compress=false \
     -D mapred.compress.map.output=false \
     -D mapred.child.java.opts="-Dpython.path=$PYTHON_PATH" \
+    $PARTITIONER_OPTS \
     -input $HDFS_INPUT_DIR/$INPUT_FILE \
     -output $HDFS_OUTPUT_DIR/correlations \
     -mapper "$PYTHON_PATH hadoop/correlation_mapper.py" \
-    -reducer "$PYTHON_PATH hadoop/correlation_reducer.py" \
+    -reducer "$PYTHON_PATH hadoop/correlation_reducer.py --partial" \
     -file hadoop/correlation_mapper.py \
-    -file hadoop/correlation_reducer.py
+    -file hadoop/correlation_reducer.py \
+    -file hadoop/streaming_combiner.py \
+    -file hadoop/streaming_fields.py \
+    -file streaming_stats.py \
+    -file pokec_schema.py
+
+# Run categorical and user feature counts the same way (mappers combine counts)
+for JOB in categorical user_features; do
+    echo "Running $JOB analysis..."
+    hadoop jar $HADOOP_STREAMING_JAR \
+        -D mapred.job.name="$JOB analysis" \
+        -D mapred.reduce.tasks=$NUM_REDUCERS \
+        -D mapred.child.java.opts="-Dpython.path=$PYTHON_PATH" \
+        $PARTITIONER_OPTS \
+        -input $HDFS_INPUT_DIR/$INPUT_FILE \
+        -output $HDFS_OUTPUT_DIR/$JOB \
+        -mapper "$PYTHON_PATH hadoop/${JOB}_mapper.py" \
+        -reducer "$PYTHON_PATH hadoop/${JOB}_reducer.py --partial" \
+        -file hadoop/${JOB}_mapper.py \
+        -file hadoop/${JOB}_reducer.py \
+        -file hadoop/streaming_combiner.py \
+        -file hadoop/streaming_fields.py \
+        -file streaming_stats.py \
+        -file pokec_schema.py
+done
+
+# Run the remaining analyses in a single pass over the input
+MULTI_FILES=""
+for ANALYSIS in ${ANALYSES//,/ }; do
+    MULTI_FILES="$MULTI_FILES -file hadoop/${ANALYSIS}_mapper.py -file hadoop/${ANALYSIS}_reducer.py"
+done
+echo "Running single-pass analyses: $ANALYSES..."
+hadoop jar $HADOOP_STREAMING_JAR \
+    -D mapred.job.name="Single-pass Analysis" \
+    -D mapred.reduce.tasks=$NUM_REDUCERS \
+    -D mapred.child.java.opts="-Dpython.path=$PYTHON_PATH" \
+    $MULTI_PARTITIONER_OPTS \
+    -cmdenv ANALYSES=$ANALYSES \
+    -input $HDFS_INPUT_DIR/$INPUT_FILE \
+    -output $HDFS_OUTPUT_DIR/multi \
+    -mapper "$PYTHON_PATH hadoop/multi_mapper.py" \
+    -reducer "$PYTHON_PATH hadoop/multi_reducer.py" \
+    -file hadoop/multi_mapper.py \
+    -file hadoop/multi_reducer.py \
+    $MULTI_FILES \
+    -file hadoop/streaming_codec.py \
+    -file hadoop/streaming_combiner.py \
+    -file hadoop/streaming_fields.py \
+    -file streaming_stats.py \
+    -file profile_completion.py \
+    -file pokec_schema.py \
+    -file pokec_dates.py \
+    -file pokec_keywords.py \
+    -file keyword_matcher.py
 
 # Create results directory
 mkdir -p results
 
+# Build the hobby/language vocabulary, then encode every profile against it
+# in a map-only job and assemble the sparse multi-hot matrix
+echo "Building multilabel vocabulary..."
+hadoop jar $HADOOP_STREAMING_JAR \
+    -D mapred.job.name="Multilabel Vocabulary" \
+    -D mapred.reduce.tasks=1 \
+    -D mapred.child.java.opts="-Dpython.path=$PYTHON_PATH" \
+    -input $HDFS_INPUT_DIR/$INPUT_FILE \
+    -output $HDFS_OUTPUT_DIR/multilabel_vocabulary \
+    -mapper "$PYTHON_PATH hadoop/multilabel_mapper.py" \
+    -reducer "$PYTHON_PATH hadoop/multilabel_reducer.py --vocabulary --min-count $MULTILABEL_MIN_COUNT" \
+    -file hadoop/multilabel_mapper.py \
+    -file hadoop/multilabel_reducer.py \
+    -file hadoop/streaming_combiner.py \
+    -file hadoop/streaming_fields.py \
+    -file pokec_schema.py \
+    -file pokec_keywords.py \
+    -file keyword_matcher.py
+hadoop fs -cat $HDFS_OUTPUT_DIR/multilabel_vocabulary/part-* > results/multilabel_vocabulary.tsv
+
+echo "Encoding profiles against the vocabulary..."
+hadoop jar $HADOOP_STREAMING_JAR \
+    -D mapred.job.name="Multilabel Encoding" \
+    -D mapred.reduce.tasks=0 \
+    -D mapred.child.java.opts="-Dpython.path=$PYTHON_PATH" \
+    -input $HDFS_INPUT_DIR/$INPUT_FILE \
+    -output $HDFS_OUTPUT_DIR/multilabel_encoded \
+    -mapper "$PYTHON_PATH hadoop/multilabel_encode_mapper.py multilabel_vocabulary.tsv" \
+    -file hadoop/multilabel_encode_mapper.py \
+    -file hadoop/multilabel_mapper.py \
+    -file hadoop/streaming_combiner.py \
+    -file hadoop/streaming_fields.py \
+    -file results/multilabel_vocabulary.tsv \
+    -file pokec_schema.py \
+    -file pokec_keywords.py \
+    -file keyword_matcher.py
+hadoop fs -cat $HDFS_OUTPUT_DIR/multilabel_encoded/part-* \
+    | $PYTHON_PATH hadoop/multilabel_matrix.py results/multilabel_vocabulary.tsv results/multilabel_encoded.npz
+
 # Save and display results
 echo "Analysis complete. Results are in HDFS at $HDFS_OUTPUT_DIR"
 
@@ -86,7 +213,40 @@ if [ -z "$CORR_OUTPUT" ]; then
         yarn logs -applicationId $APP_ID
     fi
 else
-    echo "$CORR_OUTPUT" | tee results/correlation_analysis.json
+    echo "$CORR_OUTPUT" | $PYTHON_PATH hadoop/merge_parts.py correlation | tee results/correlation_analysis.json
+fi
+
+# Merge the partitioned categorical and user feature outputs
+for JOB in categorical user_features; do
+    echo -e "\n$JOB analysis results:"
+    hadoop fs -cat $HDFS_OUTPUT_DIR/$JOB/part-* 2>/dev/null \
+        | $PYTHON_PATH hadoop/merge_parts.py $JOB | tee results/${JOB}_analysis.txt
+done
+
+# Split the single-pass output into one file per analysis
+hadoop fs -cat $HDFS_OUTPUT_DIR/multi/part-* 2>/dev/null > results/multi_analysis.txt
+for ANALYSIS in ${ANALYSES//,/ }; do
+    echo -e "\n$ANALYSIS analysis results:"
+    grep -P "^$ANALYSIS\t" results/multi_analysis.txt | cut -f2- | tee results/${ANALYSIS}_analysis.txt
+done
+
+# Normalize every profile's age with the age report in a second, map-only pass
+if [[ ",$ANALYSES," == *",age,"* ]]; then
+    echo "Writing normalized ages..."
+    hadoop jar $HADOOP_STREAMING_JAR \
+        -D mapred.job.name="Age Normalization" \
+        -D mapred.reduce.tasks=0 \
+        -D mapred.child.java.opts="-Dpython.path=$PYTHON_PATH" \
+        -input $HDFS_INPUT_DIR/$INPUT_FILE \
+        -output $HDFS_OUTPUT_DIR/age_normalized \
+        -mapper "$PYTHON_PATH hadoop/age_normalize_mapper.py age_analysis.txt" \
+        -file hadoop/age_normalize_mapper.py \
+        -file hadoop/age_mapper.py \
+        -file hadoop/age_reducer.py \
+        -file hadoop/streaming_fields.py \
+        -file results/age_analysis.txt \
+        -file streaming_stats.py \
+        -file pokec_schema.py
 fi
 
 # Disable debug mode
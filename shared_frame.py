@@ -0,0 +1,129 @@
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Tuple
+import pandas as pd
+import numpy as np
+
+class SharedFrame:
+    """A DataFrame laid out column by column in shared memory.
+
+    Numeric and datetime columns are copied into their own block as-is.
+    Every other column is dictionary-encoded: the integer codes go into
+    shared memory and only the (small) array of distinct values travels
+    with the spec. Row labels are kept the same way, or just as a range
+    for a RangeIndex. Workers attach once by block name and rebuild any
+    row range from offsets, so partitions never have to be pickled.
+    """
+
+    def __init__(self, spec: Dict[str, Any], blocks: List[shared_memory.SharedMemory],
+                 owner: bool = False):
+        self.spec = spec
+        self.blocks = blocks
+        self.owner = owner
+        self.n_rows = spec['length']
+        self._arrays = [
+            np.ndarray((self.n_rows,), dtype=entry['dtype'], buffer=block.buf)
+            for entry, block in zip(_stored(spec), blocks)
+        ]
+
+    @classmethod
+    def create(cls, frame: pd.DataFrame) -> 'SharedFrame':
+        """Copy a DataFrame, row labels included, into new shared memory blocks.
+
+        Raises ValueError if column names repeat, since rows are rebuilt
+        column by column from their names.
+        """
+        if frame.columns.has_duplicates:
+            duplicated = frame.columns[frame.columns.duplicated()].unique().tolist()
+            raise ValueError(f"SharedFrame needs unique column names, got repeats of {duplicated}")
+        spec = {'length': len(frame), 'columns': [], 'index': None}
+        blocks = []
+        for name in frame.columns:
+            entry, block = _share(frame[name])
+            spec['columns'].append(dict(entry, name=name))
+            blocks.append(block)
+        index = frame.index
+        if isinstance(index, pd.RangeIndex):
+            # A default-like index is described by its range, not stored
+            spec['range'] = (index.start, index.step, index.name)
+        else:
+            entry, block = _share(index)
+            spec['index'] = dict(entry, name=index.name)
+            blocks.append(block)
+        return cls(spec, blocks, owner=True)
+
+    @classmethod
+    def attach(cls, spec: Dict[str, Any], owner: bool = False) -> 'SharedFrame':
+        """Map the blocks described by ``spec`` into this process.
+
+        With ``owner`` set, closing the frame also frees the blocks, e.g.
+        ones another process created for this one to manage.
+        """
+        blocks = [shared_memory.SharedMemory(name=entry['block']) for entry in _stored(spec)]
+        return cls(spec, blocks, owner)
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def slice(self, start: int, stop: int) -> pd.DataFrame:
+        """Rebuild rows ``start:stop`` as a regular DataFrame with their own labels."""
+        columns = {
+            entry['name']: _decode(entry, values[start:stop])
+            for entry, values in zip(self.spec['columns'], self._arrays)
+        }
+        if self.spec['index'] is None:
+            first, step, name = self.spec['range']
+            index = pd.RangeIndex(first + start * step, first + stop * step, step, name=name)
+        else:
+            entry = self.spec['index']
+            index = pd.Index(_decode(entry, self._arrays[-1][start:stop]), name=entry['name'],
+                             copy=True)
+        return pd.DataFrame(columns, index=index, columns=[e['name'] for e in self.spec['columns']])
+
+    def close(self):
+        """Detach from the blocks; the owner also frees them."""
+        self._arrays = []
+        for block in self.blocks:
+            block.close()
+            if self.owner:
+                block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def _stored(spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Entries of ``spec`` with a shared memory block, in block order."""
+    return spec['columns'] + ([spec['index']] if spec['index'] is not None else [])
+
+def _share(values) -> Tuple[Dict[str, Any], shared_memory.SharedMemory]:
+    """Copy a column or index into a new block; returns its spec entry and the block."""
+    if _is_plain_numeric(values):
+        codes = values.to_numpy()
+        categories = None
+    else:
+        codes, categories = pd.factorize(values, use_na_sentinel=True)
+        codes = codes.astype(_code_dtype(len(categories)))
+    block = shared_memory.SharedMemory(create=True, size=max(codes.nbytes, 1))
+    np.ndarray(codes.shape, dtype=codes.dtype, buffer=block.buf)[:] = codes
+    return {'block': block.name, 'dtype': codes.dtype.str, 'categories': categories}, block
+
+def _decode(entry: Dict[str, Any], values: np.ndarray):
+    """Values of a stored column or index, mapping codes back to categories."""
+    if entry['categories'] is None:
+        return values
+    return entry['categories'].take(values, allow_fill=True, fill_value=np.nan)
+
+def _is_plain_numeric(column) -> bool:
+    """Numeric/datetime columns that map directly onto a numpy buffer."""
+    return (isinstance(column.dtype, np.dtype)
+            and column.dtype.kind in 'biufM')
+
+def _code_dtype(n_categories: int) -> np.dtype:
+    """Smallest signed integer type that can hold the codes plus -1 for NA."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
@@ -0,0 +1,494 @@
+"""
+Mergeable summary statistics for MapReduce jobs.
+
+Every summary here can be updated one value (or one batch) at a time,
+merged with another summary of the same kind, and serialized to a plain
+dict. Mappers emit one small summary per chunk instead of raw values and
+reducers merge O(workers) summaries instead of sorting O(rows) values.
+"""
+import math
+import random
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+
+class RunningMoments:
+    """Count, mean, variance, min and max (Welford / Chan et al. merge)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, value: float):
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def update_many(self, values: Iterable[float]):
+        """Fold a batch in with one vectorized pass."""
+        values = np.asarray(values, dtype=float)
+        if values.size == 0:
+            return
+        batch = RunningMoments()
+        batch.count = int(values.size)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        self.merge(batch)
+
+    def merge(self, other: 'RunningMoments') -> 'RunningMoments':
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self) -> float:
+        """Population variance (ddof=0, like np.var)."""
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def to_dict(self) -> Dict:
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2,
+                'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'RunningMoments':
+        moments = cls()
+        moments.count = data['count']
+        moments.mean = data['mean']
+        moments.m2 = data['m2']
+        moments.min = data['min']
+        moments.max = data['max']
+        return moments
+
+class CoMoments:
+    """Sufficient statistics for the Pearson correlation of two variables.
+
+    Keeps n, both means, both second central moments and the co-moment
+    sum((x - mean_x) * (y - mean_y)); merging uses the pairwise update of
+    Chan et al., so the result does not depend on how rows were split.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.m2_x = 0.0
+        self.m2_y = 0.0
+        self.c_xy = 0.0
+
+    def update(self, x: float, y: float):
+        self.count += 1
+        dx = x - self.mean_x
+        self.mean_x += dx / self.count
+        dy = y - self.mean_y
+        self.mean_y += dy / self.count
+        self.m2_x += dx * (x - self.mean_x)
+        self.m2_y += dy * (y - self.mean_y)
+        self.c_xy += dx * (y - self.mean_y)
+
+    def update_many(self, xs: Iterable[float], ys: Iterable[float]):
+        """Fold in paired batches with one vectorized pass."""
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        if xs.size == 0:
+            return
+        batch = CoMoments()
+        batch.count = int(xs.size)
+        batch.mean_x = float(xs.mean())
+        batch.mean_y = float(ys.mean())
+        dx = xs - batch.mean_x
+        dy = ys - batch.mean_y
+        batch.m2_x = float(dx @ dx)
+        batch.m2_y = float(dy @ dy)
+        batch.c_xy = float(dx @ dy)
+        self.merge(batch)
+
+    def merge(self, other: 'CoMoments') -> 'CoMoments':
+        if other.count == 0:
+            return self
+        count = self.count + other.count
+        dx = other.mean_x - self.mean_x
+        dy = other.mean_y - self.mean_y
+        weight = self.count * other.count / count
+        self.mean_x += dx * other.count / count
+        self.mean_y += dy * other.count / count
+        self.m2_x += other.m2_x + dx * dx * weight
+        self.m2_y += other.m2_y + dy * dy * weight
+        self.c_xy += other.c_xy + dx * dy * weight
+        self.count = count
+        return self
+
+    @property
+    def correlation(self) -> float:
+        """Pearson r, or NaN when either variable is constant."""
+        denominator = math.sqrt(self.m2_x * self.m2_y)
+        if self.count < 2 or denominator == 0:
+            return math.nan
+        return self.c_xy / denominator
+
+    @property
+    def covariance(self) -> float:
+        """Population covariance (ddof=0)."""
+        return self.c_xy / self.count if self.count else 0.0
+
+    def to_dict(self) -> Dict:
+        return {'count': self.count, 'mean_x': self.mean_x, 'mean_y': self.mean_y,
+                'm2_x': self.m2_x, 'm2_y': self.m2_y, 'c_xy': self.c_xy}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CoMoments':
+        moments = cls()
+        for name, value in data.items():
+            setattr(moments, name, value)
+        return moments
+
+class KLLSketch:
+    """Mergeable quantile sketch (Karnin, Lang & Liberty, 2016).
+
+    Items live in a stack of compactors; level ``h`` items stand for
+    ``2**h`` inputs. When the sketch is full a level is sorted and every
+    other item is promoted, so memory stays O(k log(n/k)) while the
+    normalized rank error stays around ``rank_error(k)``.
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        self.k = k
+        self.n = 0
+        self.levels: List[List[float]] = []
+        self.size = 0
+        self.max_size = 0
+        self._random = random.Random(seed)
+        self._grow()
+
+    @staticmethod
+    def rank_error(k: int) -> float:
+        """Approximate normalized rank error for a given k (99% confidence)."""
+        return 2.296 / k ** 0.9723
+
+    @classmethod
+    def from_error(cls, epsilon: float, seed: Optional[int] = None) -> 'KLLSketch':
+        """Smallest sketch whose rank error is at most ``epsilon``."""
+        k = math.ceil((2.296 / epsilon) ** (1 / 0.9723))
+        return cls(k=max(k, 8), seed=seed)
+
+    def _capacity(self, height: int) -> int:
+        depth = len(self.levels) - height - 1
+        return int(math.ceil(self.k * (2.0 / 3.0) ** depth)) + 1
+
+    def _grow(self):
+        self.levels.append([])
+        self.max_size = sum(self._capacity(h) for h in range(len(self.levels)))
+
+    def _compress(self):
+        for height, level in enumerate(self.levels):
+            if len(level) >= self._capacity(height):
+                if height + 1 >= len(self.levels):
+                    self._grow()
+                level.sort()
+                # Keep the odd item out at this level, promote every other one
+                end = len(level) - len(level) % 2
+                offset = self._random.random() < 0.5
+                self.levels[height + 1].extend(level[offset:end:2])
+                self.levels[height] = level[end:]
+                self.size = sum(len(items) for items in self.levels)
+                if self.size < self.max_size:
+                    break
+
+    def update(self, value: float):
+        self.levels[0].append(float(value))
+        self.size += 1
+        self.n += 1
+        if self.size >= self.max_size:
+            self._compress()
+
+    def update_many(self, values: Iterable[float]):
+        values = np.asarray(values, dtype=float).ravel().tolist()
+        self.levels[0].extend(values)
+        self.size += len(values)
+        self.n += len(values)
+        while self.size >= self.max_size:
+            self._compress()
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        while len(self.levels) < len(other.levels):
+            self._grow()
+        for height, items in enumerate(other.levels):
+            self.levels[height].extend(items)
+        self.n += other.n
+        self.size = sum(len(items) for items in self.levels)
+        while self.size >= self.max_size:
+            self._compress()
+        return self
+
+    def _weighted_items(self):
+        items = sorted(
+            (value, 1 << height)
+            for height, level in enumerate(self.levels)
+            for value in level
+        )
+        values = np.array([value for value, _ in items])
+        cumulative = np.cumsum([weight for _, weight in items])
+        return values, cumulative
+
+    def quantiles(self, qs: Iterable[float]) -> List[float]:
+        """Approximate quantiles for fractions ``qs`` in [0, 1]."""
+        qs = list(qs)
+        if self.n == 0:
+            return [math.nan] * len(qs)
+        values, cumulative = self._weighted_items()
+        total = cumulative[-1]
+        positions = np.searchsorted(cumulative, [q * total for q in qs], side='left')
+        positions = np.clip(positions, 0, len(values) - 1)
+        return [float(values[i]) for i in positions]
+
+    def quantile(self, q: float) -> float:
+        return self.quantiles([q])[0]
+
+    def item_at_rank(self, rank: int) -> float:
+        """Item with 0-based ``rank`` in sorted input order.
+
+        Exact until the first compaction, within the rank error after.
+        """
+        if self.n == 0:
+            return math.nan
+        values, cumulative = self._weighted_items()
+        position = int(np.searchsorted(cumulative, rank, side='right'))
+        return float(values[min(position, len(values) - 1)])
+
+    def median(self) -> float:
+        """Median, averaging the two middle items when the count is even."""
+        if self.n == 0:
+            return math.nan
+        return (self.item_at_rank((self.n - 1) // 2) + self.item_at_rank(self.n // 2)) / 2
+
+    def __len__(self) -> int:
+        return self.n
+
+    def to_dict(self) -> Dict:
+        return {'k': self.k, 'n': self.n, 'levels': self.levels}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'KLLSketch':
+        sketch = cls(k=data['k'])
+        while len(sketch.levels) < len(data['levels']):
+            sketch._grow()
+        sketch.levels = [list(items) for items in data['levels']]
+        sketch.n = data['n']
+        sketch.size = sum(len(items) for items in sketch.levels)
+        return sketch
+
+class NumericSummary:
+    """Moments plus a quantile sketch for one numeric variable."""
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        self.moments = RunningMoments()
+        self.sketch = KLLSketch(k=k, seed=seed)
+
+    @classmethod
+    def from_error(cls, epsilon: float, seed: Optional[int] = None) -> 'NumericSummary':
+        """Summary whose sketch has rank error at most ``epsilon``; a fixed
+        ``seed`` makes its compactions, and so its quantiles, reproducible."""
+        summary = cls()
+        summary.sketch = KLLSketch.from_error(epsilon, seed=seed)
+        return summary
+
+    def update(self, value: float):
+        self.moments.update(value)
+        self.sketch.update(value)
+
+    def update_many(self, values: Iterable[float]):
+        values = np.asarray(values, dtype=float)
+        self.moments.update_many(values)
+        self.sketch.update_many(values)
+
+    def merge(self, other: 'NumericSummary') -> 'NumericSummary':
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def count(self) -> int:
+        return self.moments.count
+
+    def percentile(self, q: float) -> float:
+        """Approximate percentile for ``q`` in [0, 100]."""
+        return self.sketch.quantile(q / 100)
+
+    def to_dict(self) -> Dict:
+        return {'moments': self.moments.to_dict(), 'sketch': self.sketch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'NumericSummary':
+        summary = cls()
+        summary.moments = RunningMoments.from_dict(data['moments'])
+        summary.sketch = KLLSketch.from_dict(data['sketch'])
+        return summary
+
+def histogram_percentiles(values: Sequence[float], counts: Sequence[int],
+                          percentiles: Iterable[float]) -> np.ndarray:
+    """np.percentile (linear method) of a multiset given as sorted values and counts."""
+    values = np.asarray(values, dtype=float)
+    ranks = np.cumsum(counts)
+    n = int(ranks[-1])
+    position = (n - 1) * (np.asarray(percentiles, dtype=float) / 100)
+    below = np.floor(position)
+    fraction = position - below
+    below = below.astype(np.int64)
+    low = values[np.searchsorted(ranks, below, side='right')]
+    high = values[np.searchsorted(ranks, np.minimum(below + 1, n - 1), side='right')]
+    # Same interpolation as np.percentile, so results match it bit for bit
+    diff = high - low
+    return np.where(fraction >= 0.5, high - diff * (1 - fraction), low + diff * fraction)
+
+class DenseHistogram:
+    """Exact counts of an integer variable with a small known range.
+
+    One counter per value in ``[low, high]`` (age 1-100, completion 0-100,
+    0/1 flags), so mean, variance, median, percentiles and IQR outlier
+    counts are exact, memory is O(high - low) and merging is array
+    addition. Values outside the range, or not whole numbers, raise
+    ValueError.
+    """
+
+    def __init__(self, low: int, high: int):
+        self.low = low
+        self.high = high
+        self.counts = np.zeros(high - low + 1, dtype=np.int64)
+
+    def _bin(self, value: float) -> int:
+        if not self.low <= value <= self.high:  # also false for NaN
+            raise ValueError(f"{value!r} is not an integer in [{self.low}, {self.high}]")
+        index = int(value)
+        if index != value:
+            raise ValueError(f"{value!r} is not an integer in [{self.low}, {self.high}]")
+        return index - self.low
+
+    def update(self, value: float, count: int = 1):
+        self.counts[self._bin(value)] += count
+
+    def update_many(self, values: Iterable[float]):
+        values = np.asarray(values, dtype=float).ravel()
+        # Range check first (NaN fails it) so the cast below is always defined
+        if not ((values >= self.low) & (values <= self.high)).all():
+            raise ValueError(f"values outside the integers of [{self.low}, {self.high}]")
+        bins = values.astype(np.int64) - self.low
+        if ((bins + self.low) != values).any():
+            raise ValueError(f"values outside the integers of [{self.low}, {self.high}]")
+        self.counts += np.bincount(bins, minlength=len(self.counts))
+
+    def merge(self, other: 'DenseHistogram') -> 'DenseHistogram':
+        if (other.low, other.high) != (self.low, self.high):
+            raise ValueError("cannot merge histograms over different ranges")
+        self.counts += other.counts
+        return self
+
+    @property
+    def values(self) -> np.ndarray:
+        return np.arange(self.low, self.high + 1)
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def total(self) -> int:
+        """Sum of all values."""
+        return int(self.counts @ self.values)
+
+    @property
+    def sum_squares(self) -> int:
+        return int(self.counts @ self.values ** 2)
+
+    @property
+    def min(self) -> int:
+        return self.low + int(np.flatnonzero(self.counts)[0]) if self.count else math.inf
+
+    @property
+    def max(self) -> int:
+        return self.low + int(np.flatnonzero(self.counts)[-1]) if self.count else -math.inf
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def variance(self) -> float:
+        """Population variance (ddof=0, like np.var)."""
+        if not self.count:
+            return 0.0
+        return float(self.counts @ (self.values - self.mean) ** 2) / self.count
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def item_at_rank(self, rank: int) -> int:
+        """Value with 0-based ``rank`` in sorted order."""
+        return self.low + int(np.searchsorted(np.cumsum(self.counts), rank, side='right'))
+
+    def median(self) -> float:
+        """Median, averaging the two middle values when the count is even (np.median)."""
+        if not self.count:
+            return math.nan
+        n = self.count
+        return (self.item_at_rank((n - 1) // 2) + self.item_at_rank(n // 2)) / 2
+
+    def percentiles(self, qs: Iterable[float]) -> List[float]:
+        """np.percentile of the values for each ``q`` in [0, 100]."""
+        qs = list(qs)
+        if not self.count:
+            return [math.nan] * len(qs)
+        return [float(p) for p in histogram_percentiles(self.values, self.counts, qs)]
+
+    def percentile(self, q: float) -> float:
+        return self.percentiles([q])[0]
+
+    def iqr_bounds(self, k: float = 1.5):
+        """(q1, q3, lower, upper): quartiles and the Tukey fences k * IQR beyond them."""
+        q1, q3 = self.percentiles([25, 75])
+        iqr = q3 - q1
+        return q1, q3, q1 - k * iqr, q3 + k * iqr
+
+    def count_outside(self, lower: float, upper: float) -> int:
+        """Number of values below ``lower`` or above ``upper``."""
+        values = self.values
+        return int(self.counts[(values < lower) | (values > upper)].sum())
+
+    def to_dict(self) -> Dict:
+        return {'low': self.low, 'high': self.high, 'counts': self.counts.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'DenseHistogram':
+        histogram = cls(data['low'], data['high'])
+        histogram.counts = np.array(data['counts'], dtype=np.int64)
+        return histogram
+
+def merge_all(summaries: Iterable):
+    """Merge a non-empty sequence of summaries of the same kind into the first."""
+    summaries = iter(summaries)
+    merged = next(summaries)
+    for summary in summaries:
+        merged.merge(summary)
+    return merged
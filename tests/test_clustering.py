@@ -0,0 +1,35 @@
+"""Distributed k-means: argument checks and partition-independent seeding."""
+import numpy as np
+import pandas as pd
+import pytest
+from clustering import DistributedKMeans
+from mapreduce_framework import MapReduceFramework
+
+def test_max_iter_must_allow_one_lloyd_pass():
+    with pytest.raises(ValueError, match='max_iter'):
+        DistributedKMeans(max_iter=0)
+
+def profile_features(index):
+    rng = np.random.default_rng(7)
+    n = len(index)
+    age = rng.normal(30, 10, n).round()
+    age[rng.random(n) < 0.1] = np.nan
+    return pd.DataFrame({'age': age, 'completion_rate': rng.uniform(20, 90, n)}, index=index)
+
+def fit(frame, shared_memory):
+    framework = MapReduceFramework(n_workers=2, shared_memory=shared_memory)
+    with framework.session(frame) as session:
+        return DistributedKMeans(n_clusters=3, seed=3).fit(session)
+
+@pytest.mark.parametrize('index', [
+    pd.RangeIndex(600),
+    pd.Index([f'user{i}' for i in range(600)]),
+    pd.date_range('2012-01-01', periods=600, freq='h'),
+])
+def test_fit_does_not_depend_on_how_rows_reach_workers(index):
+    frame = profile_features(index)
+    shared, pickled = fit(frame, True), fit(frame, False)
+    assert shared['cluster_stats'] == pickled['cluster_stats']
+    assert shared['n_iter'] == pickled['n_iter']
+    for cluster_id, centroid in shared['centroids'].items():
+        np.testing.assert_array_equal(centroid, pickled['centroids'][cluster_id])
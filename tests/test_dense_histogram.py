@@ -0,0 +1,108 @@
+"""DenseHistogram and histogram_percentiles must reproduce numpy and pandas exactly."""
+import importlib.util
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from streaming_stats import DenseHistogram, histogram_percentiles, merge_all
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+# The streaming scripts import their neighbours by module name
+sys.path.append(os.path.join(ROOT, 'hadoop'))
+from outlier_mapper import OutlierSummary
+
+def load_script(relative_path):
+    """Import a script by path (code/ shares module names with the root)."""
+    path = os.path.join(ROOT, relative_path)
+    spec = importlib.util.spec_from_file_location(os.path.basename(path)[:-3], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+PERCENTILES = [0, 1, 5, 10, 25, 33.3, 50, 66.7, 75, 90, 95, 99, 100]
+
+SAMPLES = {
+    'uniform ages': lambda rng: rng.integers(1, 101, 9999),
+    'skewed completion': lambda rng: np.minimum(rng.geometric(0.05, 20000), 100),
+    'two values': lambda rng: rng.choice([0, 100], 501),
+    'single value': lambda rng: np.full(7, 42),
+    'one row': lambda rng: np.array([17]),
+}
+
+def histogram_of(values, low=0, high=100, chunks=1):
+    histograms = []
+    for chunk in np.array_split(np.asarray(values), chunks):
+        histogram = DenseHistogram(low, high)
+        histogram.update_many(chunk)
+        histograms.append(histogram)
+    return merge_all(histograms)
+
+@pytest.mark.parametrize('name', SAMPLES)
+def test_statistics_match_numpy_and_pandas(name):
+    values = SAMPLES[name](np.random.default_rng(11))
+    histogram = histogram_of(values, chunks=min(5, len(values)))
+    assert histogram.count == len(values)
+    assert histogram.percentiles(PERCENTILES) == list(np.percentile(values, PERCENTILES))
+    assert histogram.median() == np.median(values)
+    assert (histogram.min, histogram.max) == (values.min(), values.max())
+    assert histogram.mean == pytest.approx(np.mean(values), rel=1e-12)
+    assert histogram.std == pytest.approx(np.std(values), rel=1e-12, abs=1e-12)
+    for rank in (0, len(values) // 2, len(values) - 1):
+        assert histogram.item_at_rank(rank) == np.sort(values)[rank]
+
+@pytest.mark.parametrize('name', SAMPLES)
+def test_iqr_bounds_and_outlier_counts_match_numpy(name):
+    values = SAMPLES[name](np.random.default_rng(12))
+    q1, q3 = np.percentile(values, [25, 75])
+    iqr = q3 - q1
+    expected = (q1, q3, q1 - 1.5 * iqr, q3 + 1.5 * iqr)
+    histogram = histogram_of(values)
+    assert histogram.iqr_bounds() == expected
+    lower, upper = expected[2:]
+    assert histogram.count_outside(lower, upper) == int(((values < lower) | (values > upper)).sum())
+
+def test_histogram_percentiles_of_sparse_counts_match_numpy():
+    rng = np.random.default_rng(13)
+    values = np.sort(rng.choice(np.arange(-50, 3000), 40, replace=False)).astype(float)
+    counts = rng.integers(1, 500, 40)
+    expanded = np.repeat(values, counts)
+    assert (histogram_percentiles(values, counts, PERCENTILES)
+            == np.percentile(expanded, PERCENTILES)).all()
+
+def test_round_trip_and_single_updates():
+    values = np.random.default_rng(14).integers(0, 101, 1000)
+    one_by_one = DenseHistogram(0, 100)
+    for value in values:
+        one_by_one.update(float(value))
+    restored = DenseHistogram.from_dict(one_by_one.to_dict())
+    assert (restored.counts == histogram_of(values).counts).all()
+
+def test_outlier_stats_match_pandas():
+    numeric_stats = load_script(os.path.join('code', 'outlier_analysis_v4.py')).numeric_stats
+    values = pd.Series(np.random.default_rng(15).integers(0, 101, 5000))
+    stats = numeric_stats(histogram_of(values))
+    described = values.describe()
+    assert stats['mean'] == pytest.approx(described['mean'], rel=1e-12)
+    assert stats['std'] == pytest.approx(described['std'], rel=1e-12)
+    assert (stats['q1'], stats['q3']) == (described['25%'], described['75%'])
+
+@pytest.mark.parametrize('value', [-1, 101, 2.5, np.nan, np.inf])
+def test_values_outside_the_integer_range_raise(value):
+    histogram = DenseHistogram(0, 100)
+    with pytest.raises(ValueError):
+        histogram.update(value)
+    with pytest.raises(ValueError):
+        histogram.update_many([3, value, 4])
+    assert histogram.count == 0
+
+def test_merging_different_ranges_raises():
+    with pytest.raises(ValueError):
+        DenseHistogram(0, 100).merge(DenseHistogram(1, 100))
+
+def test_streaming_mapper_drops_values_the_histogram_rejects():
+    summary = OutlierSummary(out=open(os.devnull, 'w'))
+    for value in (25, 130, 33.5, -4, 40):
+        summary.add_numeric('AGE', value)
+    assert summary.histograms['AGE'].count == 2
+    assert summary.histograms['AGE'].percentiles([0, 100]) == [25.0, 40.0]
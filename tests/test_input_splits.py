@@ -0,0 +1,98 @@
+"""TSV and Parquet input splits must hand mappers the same columns."""
+import pandas as pd
+from mapreduce_framework import (GENDER_COLUMN, REGION_COLUMN, MapReduceFramework, Mapper,
+                                 Reducer)
+from parquet_input import parquet_splits
+from pokec_schema import PARQUET_INDEX, TSV_COLUMNS, TSV_INDEX
+from tsv_input import tsv_splits
+
+PROFILES = [
+    # user_id, public, completion_percentage, gender, region, AGE, filled extra fields
+    (1, 1, 14, 1, 'zilinsky kraj, zilina', 26, 3),
+    (2, 0, 62, 0, 'bratislavsky kraj, bratislava - ruzinov', 0, 40),
+    (3, 1, 38, None, 'zilinsky kraj, zilina', 33, 12),
+    (4, 1, 100, 1, 'kosicky kraj, kosice - juh', None, 53),
+    (5, 0, 9, 1, 'zilinsky kraj, zilina', 19, 0),
+    (6, 1, 45, 0, 'kosicky kraj, kosice - juh', 41, 21),
+    (7, 1, 71, 1, 'bratislavsky kraj, bratislava - ruzinov', 17, 30),
+    (8, 0, 0, 0, 'zilinsky kraj, zilina', 52, 7),
+]
+
+# Columns other than the six above, filled in order up to the row's count
+EXTRA_COLUMNS = [name for name in TSV_COLUMNS
+                 if name not in ('user_id', 'public', 'completion_percentage',
+                                 'gender', 'region', 'AGE')]
+
+class ProfileMapper(Mapper):
+    columns = (GENDER_COLUMN, REGION_COLUMN)
+    derived_columns = ('age', 'completion_rate')
+    filters = (('age', '>=', 18),)
+
+    def map(self, chunk):
+        rows = zip(chunk[REGION_COLUMN], chunk[GENDER_COLUMN], chunk['age'],
+                   chunk['completion_rate'])
+        results = {}
+        for region, gender, age, completion in rows:
+            gender = None if pd.isna(gender) else gender
+            results.setdefault(region, []).append((gender, age, round(completion, 9)))
+        return results
+
+class SortedReducer(Reducer):
+    def reduce(self, key, values):
+        return sorted(values, key=repr)
+
+def profile_records():
+    """Each profile as a dict of TSV column name to value (None if missing)."""
+    records = []
+    for user_id, public, completion, gender, region, age, extra in PROFILES:
+        record = dict.fromkeys(TSV_COLUMNS)
+        record.update(user_id=user_id, public=public, completion_percentage=completion,
+                      gender=gender, region=region, AGE=age)
+        for name in EXTRA_COLUMNS[:extra]:
+            record[name] = 'x'
+        records.append(record)
+    return records
+
+def write_tsv(path):
+    with open(path, 'w') as f:
+        for record in profile_records():
+            fields = ['null' if record[name] is None else str(record[name])
+                      for name in TSV_COLUMNS]
+            # Lines of the Pokec dump end in a tab
+            f.write('\t'.join(fields) + '\t\n')
+
+def write_parquet(path):
+    # The columns the analyses use at their PARQUET_INDEX positions, then the rest
+    layout = {**PARQUET_INDEX, 'user_id': 0, 'completion_percentage': 3}
+    names = sorted(layout, key=layout.get) + [n for n in TSV_COLUMNS if n not in layout]
+    frame = pd.DataFrame(profile_records())[names]
+    frame.columns = [str(position) for position in range(len(names))]
+    frame.to_parquet(path, row_group_size=3)
+
+def run_splits(splits, cache_splits=False):
+    with MapReduceFramework(n_workers=2).session(splits, cache_splits) as session:
+        return session.run(ProfileMapper, SortedReducer)
+
+def test_tsv_splits_match_parquet_splits(tmp_path):
+    tsv_path, parquet_path = tmp_path / 'profiles.txt', tmp_path / 'profiles.parquet'
+    write_tsv(tsv_path)
+    write_parquet(parquet_path)
+
+    from_tsv = run_splits(tsv_splits(str(tsv_path), [ProfileMapper()], split_size=1500))
+    from_parquet = run_splits(parquet_splits(str(parquet_path), [ProfileMapper()]))
+
+    assert from_tsv == from_parquet
+    # Six fields are set besides the extras; a 'null' gender is missing and not filled
+    assert from_tsv['zilinsky kraj, zilina'] == [
+        (gender, age, round(filled * 100 / 59, 9))
+        for gender, age, filled in [(0, 52, 13), (1, 19, 6), (1, 26, 9), (None, 33, 17)]
+    ]
+
+def test_cached_splits_give_the_same_results(tmp_path):
+    tsv_path, parquet_path = tmp_path / 'profiles.txt', tmp_path / 'profiles.parquet'
+    write_tsv(tsv_path)
+    write_parquet(parquet_path)
+
+    for splits in (tsv_splits(str(tsv_path), [ProfileMapper()], split_size=1500),
+                   parquet_splits(str(parquet_path), [ProfileMapper()])):
+        assert run_splits(splits, cache_splits=True) == run_splits(splits)
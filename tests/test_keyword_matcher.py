@@ -0,0 +1,65 @@
+"""KeywordMatcher must find exactly the categories the old substring rule found."""
+import random
+import pytest
+from keyword_matcher import KeywordMatcher
+from pokec_keywords import HOBBY_KEYWORDS, LANGUAGE_KEYWORDS
+
+def find_matches(text_list, category_keywords):
+    """Reference: the rule of process_multilabel_flexible before the automaton."""
+    matches = set()
+    for text in text_list:
+        text = ' ' + text + ' '
+        for category, keywords in category_keywords.items():
+            if any(f' {keyword} ' in text for keyword in keywords):
+                matches.add(category)
+            elif len(text) > 10 and any(keyword in text for keyword in keywords):
+                matches.add(category)
+    return matches
+
+# Overlapping, nested and multi-word keywords shared between categories
+OVERLAPPING = {
+    'a': ['ab', 'b', 'abc abc'],
+    'b': ['bc', 'c', 'ab'],
+    'c': ['cab', 'a b'],
+}
+
+TABLES = {'hobbies': HOBBY_KEYWORDS, 'languages': LANGUAGE_KEYWORDS, 'overlapping': OVERLAPPING}
+
+def random_fragment(rng, keywords):
+    """Fragments around the substring length boundary, built from keyword pieces."""
+    pieces = []
+    for _ in range(rng.randint(1, 3)):
+        choice = rng.random()
+        if choice < 0.5:
+            keyword = rng.choice(keywords)
+            start = rng.randint(0, len(keyword) // 2)
+            pieces.append(keyword if rng.random() < 0.7 else keyword[start:])
+        else:
+            pieces.append(''.join(rng.choice('abcikno ') for _ in range(rng.randint(0, 6))))
+    return (' ' if rng.random() < 0.5 else '').join(pieces)
+
+@pytest.mark.parametrize('table', TABLES)
+def test_matches_equal_the_reference_rule(table):
+    category_keywords = TABLES[table]
+    matcher = KeywordMatcher(category_keywords)
+    keywords = sorted({k for words in category_keywords.values() for k in words})
+    rng = random.Random(table)
+    for _ in range(5000):
+        row = [random_fragment(rng, keywords) for _ in range(rng.randint(1, 3))]
+        assert set(matcher.names(matcher.match(row))) == find_matches(row, category_keywords)
+        for fragment in row:
+            assert (set(matcher.names(matcher.match_fragment(fragment)))
+                    == find_matches([fragment], category_keywords))
+
+@pytest.mark.parametrize('fragment, matched', [
+    ('kino', True),             # whole word
+    ('xkinox', False),          # inside a word, padded length 8
+    ('xxkinoxx', False),        # padded length 10: still whole words only
+    ('xxkinoxxx', True),        # padded length 11: keywords anywhere
+    ('idem do kina', False),    # no keyword, long fragment
+    ('idem do kinaa kino', True),
+])
+def test_substring_length_boundary(fragment, matched):
+    matcher = KeywordMatcher({'movies': ['kino']})
+    assert bool(matcher.match_fragment(fragment)) == matched
+    assert bool(find_matches([fragment], {'movies': ['kino']})) == matched
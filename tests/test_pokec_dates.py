@@ -0,0 +1,87 @@
+"""The fixed-layout timestamp parser must agree with pd.to_datetime/timedelta.days."""
+import random
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import pytest
+from pokec_cache import parse_timestamps
+from pokec_dates import (DURATION_BOUNDS, US_PER_DAY, duration_categories, duration_category,
+                         duration_days, parse_timestamp)
+
+LABELS = ['1 month', '3 months', '6 months', '1 year', '2 years', '2+ years']
+
+def reference_category(days):
+    """The if-chain calculate_registration_days_final used before the bounds table."""
+    if days <= 30:
+        return '1 month'
+    elif days <= 90:
+        return '3 months'
+    elif days <= 180:
+        return '6 months'
+    elif days <= 365:
+        return '1 year'
+    elif days <= 730:
+        return '2 years'
+    return '2+ years'
+
+def format_timestamp(moment, fraction):
+    """Pokec layout: with a 1-6 digit fraction, or without one."""
+    text = moment.strftime('%Y-%m-%d %H:%M:%S')
+    if fraction:
+        text += '.' + f'{moment.microsecond:06d}'[:fraction]
+    return text
+
+def timestamp_pairs():
+    """(registration, last_login) strings around every duration bound."""
+    rng = random.Random(18)
+    pairs = []
+    for bound in [0, 1] + DURATION_BOUNDS + [3650]:
+        for day_offset in (-1, 0, 1):
+            for _ in range(40):
+                registration = datetime(2004, 1, 1) + timedelta(
+                    days=rng.randint(0, 2500), seconds=rng.randint(0, 86399),
+                    microseconds=rng.choice([0, 100000, rng.randint(0, 999999)]))
+                # Either side of the same time of day, so floor division matters
+                login = registration + timedelta(days=bound + day_offset,
+                                                 seconds=rng.randint(-3600, 3600))
+                pairs.append((format_timestamp(registration, rng.choice([0, 1, 3, 6])),
+                              format_timestamp(login, rng.choice([0, 1, 3, 6]))))
+    return pairs
+
+PAIRS = timestamp_pairs()
+
+def test_days_and_categories_match_pd_to_datetime():
+    registration = pd.Series([r for r, _ in PAIRS])
+    last_login = pd.Series([l for _, l in PAIRS])
+    expected_days = (parse_timestamps(last_login) - parse_timestamps(registration)).dt.days
+
+    days = [duration_days(parse_timestamp(r), parse_timestamp(l)) for r, l in PAIRS]
+    assert days == expected_days.tolist()
+
+    valid = expected_days >= 0
+    expected_labels = [reference_category(d) for d in expected_days[valid]]
+    assert [LABELS[duration_category(d)] for d in np.array(days)[valid]] == expected_labels
+    assert [LABELS[i] for i in duration_categories(np.array(days)[valid])] == expected_labels
+
+@pytest.mark.parametrize('bound', DURATION_BOUNDS)
+def test_bound_values_close_their_category(bound):
+    start = parse_timestamp('2010-03-14 12:00:00.0')
+    for days, label in [(bound, reference_category(bound)),
+                        (bound + 1, reference_category(bound + 1))]:
+        end = start + days * US_PER_DAY
+        assert duration_days(start, end) == days
+        assert LABELS[duration_category(days)] == label
+    # A microsecond short of the bound is still the day before
+    assert duration_days(start, start + bound * US_PER_DAY - 1) == bound - 1
+
+@pytest.mark.parametrize('value', ['2012-05-25 11:20:00.0', '2012-05-25 11:20:00',
+                                   '2012-05-25 11:20:00.123456', '1999-12-31 23:59:59.9'])
+def test_timestamps_match_pd_to_datetime(value):
+    expected = parse_timestamps(pd.Series([value]))[0]
+    assert parse_timestamp(value) == (expected - pd.Timestamp(0)) // pd.Timedelta(microseconds=1)
+
+@pytest.mark.parametrize('value', [None, '', 'null', '2012-02-30 10:00:00.0',
+                                   '2012-05-25 24:00:00.0', '25.05.2012 11:20', 'garbage'])
+def test_invalid_timestamps_are_missing(value):
+    assert parse_timestamp(value) is None
+    assert pd.isna(parse_timestamps(pd.Series([value], dtype=object))[0])
@@ -0,0 +1,35 @@
+"""SharedFrame must give back the rows, labels and columns it was built from."""
+import numpy as np
+import pandas as pd
+import pytest
+from shared_frame import SharedFrame
+
+def sample_frame(index):
+    return pd.DataFrame({
+        'age': [26.0, np.nan, 33.0, 19.0, 41.0],
+        'gender': [1, 0, 0, 1, 0],
+        'region': ['zilina', None, 'kosice', 'zilina', 'nitra'],
+    }, index=index)
+
+@pytest.mark.parametrize('index', [
+    pd.RangeIndex(5),
+    pd.RangeIndex(100, 110, 2, name='row'),
+    pd.Index([7, 3, 11, 2, 5]),
+    pd.Index(['a', 'b', 'c', 'd', 'e'], name='user'),
+    pd.date_range('2012-05-25', periods=5, freq='D'),
+])
+def test_slices_keep_values_and_row_labels(index):
+    frame = sample_frame(index)
+    with SharedFrame.create(frame) as shared:
+        attached = SharedFrame.attach(shared.spec)
+        try:
+            for start, stop in [(0, 5), (1, 4), (3, 3)]:
+                pd.testing.assert_frame_equal(attached.slice(start, stop),
+                                              frame.iloc[start:stop], check_freq=False)
+        finally:
+            attached.close()
+
+def test_duplicate_column_names_are_rejected():
+    frame = pd.DataFrame([[1, 2, 3]], columns=['age', 'gender', 'age'])
+    with pytest.raises(ValueError, match='age'):
+        SharedFrame.create(frame)
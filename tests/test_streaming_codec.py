@@ -0,0 +1,78 @@
+"""Every streaming schema must survive emit -> parse, compact or JSON."""
+import io
+import json
+import os
+import sys
+import pytest
+
+# The streaming scripts import their neighbours by module name
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'hadoop'))
+from streaming_codec import (CLUSTERING, ENCODERS, NULL, OUTLIER, RANDOM_FOREST,
+                             RELATIONSHIP, StreamingCodec)
+
+# Strings the compact format has to escape or must not mistake for a null
+AWKWARD = ['', 'zilinsky kraj, zilina', 'tab\there', 'line\nbreak', 'back\\slash',
+           NULL, '\\t', 'trailing\\', '{"looks": "like json"}', 'čučoriedky']
+
+SAMPLE_VALUES = {
+    'int': [0, 7, -3, 2 ** 40],
+    'float': [0.0, -0.0, 0.1, 24.0, -1.5e-7, 1e300],
+    'bool': [True, False],
+    'str': AWKWARD,
+}
+
+# Field type of each encoder, since schemas keep only the encoders
+KINDS = {id(encode): kind for kind, encode in ENCODERS.items()}
+
+def sample_records(schema):
+    """Records covering every sample value of every field, plus one all-null record."""
+    types = [KINDS[id(encode)] for encode in schema.encoders]
+    width = max(len(SAMPLE_VALUES[kind]) for kind in types)
+    records = [
+        {name: SAMPLE_VALUES[kind][i % len(SAMPLE_VALUES[kind])]
+         for name, kind in zip(schema.names, types)}
+        for i in range(width)
+    ]
+    records.append(dict.fromkeys(schema.names))
+    return records
+
+def emit_all(schemas, fmt):
+    out = io.StringIO()
+    codec = StreamingCodec(*schemas, fmt=fmt, out=out)
+    emitted = []
+    for schema in schemas:
+        for record in sample_records(schema):
+            codec.emit(schema.key, record)
+            emitted.append((schema.key, record))
+    return out.getvalue().splitlines(keepends=True), emitted
+
+@pytest.mark.parametrize('fmt', ['compact', 'json'])
+@pytest.mark.parametrize('schemas', [CLUSTERING, OUTLIER, RANDOM_FOREST, RELATIONSHIP],
+                         ids=['clustering', 'outlier', 'random_forest', 'relationship'])
+def test_records_round_trip(schemas, fmt):
+    lines, emitted = emit_all(schemas, fmt)
+    assert len(lines) == len(emitted)
+    # Reducers always read with the default (compact) codec
+    reader = StreamingCodec(*schemas, fmt='compact')
+    for line, (key, record) in zip(lines, emitted):
+        parsed_key, parsed = reader.parse(line)
+        assert parsed_key == key
+        assert parsed == record
+        for name, value in record.items():
+            assert type(parsed[name]) is type(value)
+
+def test_json_records_outside_the_schemas_are_parsed():
+    reader = StreamingCodec(*RELATIONSHIP)
+    extra = {'name': 'gender', 'value': '1', 'completion': 55.0, 'note': 'not in the schema'}
+    assert reader.parse(f"FEATURE\t{json.dumps(extra)}\n") == ('FEATURE', extra)
+    other = {'anything': [1, 2, 3]}
+    assert reader.parse(f"UNKNOWN_KEY\t{json.dumps(other)}\n") == ('UNKNOWN_KEY', other)
+
+def test_malformed_compact_records_raise():
+    reader = StreamingCodec(*CLUSTERING)
+    with pytest.raises(ValueError):
+        reader.parse('UNKNOWN_KEY\t1\t2\n')
+    with pytest.raises(ValueError):
+        reader.parse('CLUSTER\t3\t24.0\n')
+    with pytest.raises(ValueError):
+        reader.parse('CLUSTER\tthree\t24.0\t55.0\n')
@@ -0,0 +1,158 @@
+"""Mergeable summaries must agree with numpy/pandas on the whole input."""
+import numpy as np
+import pandas as pd
+import pytest
+from correlation_analysis import CorrelationMapper, CorrelationReducer
+from demographic_analysis import DemographicMapper, DemographicReducer
+from mapreduce_framework import AGE_COLUMN, GENDER_COLUMN, REGION_COLUMN, MapReduceFramework
+from streaming_stats import CoMoments, KLLSketch, NumericSummary, merge_all
+
+QUANTILES = np.linspace(0, 1, 101)
+
+def rank_errors(values, estimates, qs):
+    """Normalized distance between each q and the rank range of its estimate."""
+    ordered = np.sort(values)
+    low = np.searchsorted(ordered, estimates, side='left') / len(ordered)
+    high = np.searchsorted(ordered, estimates, side='right') / len(ordered)
+    return np.maximum(0, np.maximum(low - qs, qs - high))
+
+def chunk_sketches(chunks, k=200, seed=0):
+    sketches = []
+    for chunk in chunks:
+        sketch = KLLSketch(k=k, seed=seed)
+        sketch.update_many(chunk)
+        sketches.append(sketch)
+    return sketches
+
+@pytest.mark.parametrize('draw', [
+    lambda rng, n: rng.normal(40, 15, n),
+    lambda rng, n: rng.integers(1, 100, n).astype(float),
+    lambda rng, n: rng.pareto(1.5, n),
+])
+def test_kll_rank_error_is_within_bound(draw):
+    values = draw(np.random.default_rng(1), 100000)
+    sketch = merge_all(chunk_sketches(np.array_split(values, 16)))
+    assert len(sketch) == len(values)
+    estimates = np.array(sketch.quantiles(QUANTILES))
+    epsilon = KLLSketch.rank_error(sketch.k)
+    assert rank_errors(values, estimates, QUANTILES).max() <= epsilon
+    # Equivalently, each estimate lies between np.quantile at q - epsilon and q + epsilon
+    lower = np.quantile(values, np.clip(QUANTILES - epsilon, 0, 1), method='inverted_cdf')
+    upper = np.quantile(values, np.clip(QUANTILES + epsilon, 0, 1), method='inverted_cdf')
+    assert ((lower <= estimates) & (estimates <= upper)).all()
+
+def test_kll_is_exact_until_it_compacts():
+    values = np.random.default_rng(2).normal(size=150)
+    sketch = merge_all(chunk_sketches(np.array_split(values, 3)))
+    assert sketch.median() == np.median(values)
+    assert sketch.quantiles(QUANTILES) == list(np.quantile(values, QUANTILES,
+                                                           method='inverted_cdf'))
+
+def test_kll_merge_grouping_only_moves_results_within_the_bound():
+    values = np.random.default_rng(3).exponential(size=60000)
+    a, b, c = chunk_sketches(np.array_split(values, 3))
+    left = merge_all(chunk_sketches(np.array_split(values, 3)))  # (a + b) + c
+    a.merge(b.merge(c))  # a + (b + c)
+    for sketch in (left, a):
+        assert len(sketch) == len(values)
+        errors = rank_errors(values, sketch.quantiles(QUANTILES), QUANTILES)
+        assert errors.max() <= KLLSketch.rank_error(sketch.k)
+
+def test_kll_merge_of_exact_sketches_is_associative():
+    values = np.random.default_rng(4).normal(size=90)
+    a, b, c = chunk_sketches(np.array_split(values, 3))
+    x, y, z = chunk_sketches(np.array_split(values, 3))
+    assert a.merge(b).merge(c).quantiles(QUANTILES) == x.merge(y.merge(z)).quantiles(QUANTILES)
+
+def test_seeded_summaries_are_reproducible():
+    chunks = np.array_split(np.random.default_rng(5).gamma(2, 10, 50000), 8)
+
+    def summarize(seed):
+        summaries = []
+        for chunk in chunks:
+            summary = NumericSummary.from_error(0.01, seed=seed)
+            summary.update_many(chunk)
+            summaries.append(summary)
+        return merge_all(summaries).to_dict()
+
+    assert summarize(0) == summarize(0)
+    assert summarize(0) != summarize(1)
+
+def test_demographic_job_is_reproducible():
+    rng = np.random.default_rng(6)
+    n = 40000
+    frame = pd.DataFrame({
+        GENDER_COLUMN: rng.integers(0, 2, n).astype(float),
+        AGE_COLUMN: rng.integers(0, 90, n).astype(float),
+        REGION_COLUMN: rng.choice(['zilina', 'kosice', 'nitra'], n),
+    })
+    framework = MapReduceFramework(n_workers=4, chunks_per_worker=8)
+    first, second = (framework.run(DemographicMapper, DemographicReducer, frame)
+                     for _ in range(2))
+    assert repr(first) == repr(second)
+
+def merged_comoments(xs, ys, bounds):
+    """CoMoments built per chunk of rows [start, stop), then merged in order."""
+    merged = CoMoments()
+    for start, stop in bounds:
+        chunk = CoMoments()
+        chunk.update_many(xs[start:stop], ys[start:stop])
+        merged.merge(chunk)
+    return merged
+
+# Chunkings including empty chunks at the start, middle and end
+CHUNKINGS = [
+    [(0, 5000)],
+    [(0, 1), (1, 2500), (2500, 5000)],
+    [(0, 0), (0, 1700), (1700, 1700), (1700, 3100), (3100, 5000), (5000, 5000)],
+]
+
+@pytest.mark.parametrize('bounds', CHUNKINGS)
+def test_merged_comoments_match_the_whole_frame(bounds):
+    rng = np.random.default_rng(7)
+    xs = rng.normal(35, 12, 5000)
+    ys = 0.3 * xs + rng.normal(60, 8, 5000)
+    moments = merged_comoments(xs, ys, bounds)
+    frame = pd.DataFrame({'x': xs, 'y': ys})
+    assert moments.count == 5000
+    assert moments.correlation == pytest.approx(np.corrcoef(xs, ys)[0, 1], rel=1e-12)
+    assert moments.correlation == pytest.approx(frame.corr().loc['x', 'y'], rel=1e-12)
+    assert moments.covariance == pytest.approx(np.cov(xs, ys, ddof=0)[0, 1], rel=1e-12)
+
+def test_single_updates_match_batch_updates():
+    rng = np.random.default_rng(8)
+    xs, ys = rng.normal(size=300), rng.normal(size=300)
+    single = CoMoments()
+    for x, y in zip(xs, ys):
+        single.update(x, y)
+    assert single.correlation == pytest.approx(np.corrcoef(xs, ys)[0, 1], rel=1e-12)
+
+@pytest.mark.parametrize('bounds', CHUNKINGS)
+def test_constant_variable_has_no_correlation(bounds):
+    xs = np.random.default_rng(9).normal(size=5000)
+    ys = np.full(5000, 42.0)
+    moments = merged_comoments(xs, ys, bounds)
+    assert np.isnan(moments.correlation)
+    assert np.isnan(pd.DataFrame({'x': xs, 'y': ys}).corr().loc['x', 'y'])
+
+def test_empty_comoments_have_no_correlation():
+    moments = CoMoments().merge(CoMoments())
+    moments.update_many([], [])
+    assert moments.count == 0
+    assert np.isnan(moments.correlation)
+
+def test_correlation_job_matches_dataframe_corr():
+    rng = np.random.default_rng(10)
+    n = 20000
+    age = rng.integers(10, 80, n).astype(float)
+    age[rng.random(n) < 0.2] = np.nan
+    frame = pd.DataFrame({
+        GENDER_COLUMN: rng.integers(0, 2, n).astype(float),
+        AGE_COLUMN: age,
+        REGION_COLUMN: rng.choice(['zilina', 'kosice', 'nitra'], n),
+        'completion_rate': rng.uniform(0, 100, n) + np.nan_to_num(age) / 4,
+    })
+    framework = MapReduceFramework(n_workers=3, chunks_per_worker=5)
+    result = framework.run(CorrelationMapper, CorrelationReducer, frame)
+    expected = frame[[AGE_COLUMN, 'completion_rate']].corr().iloc[0, 1]
+    assert result['numerical_corr'][AGE_COLUMN] == pytest.approx(expected, rel=1e-12)
@@ -0,0 +1,126 @@
+"""
+Byte-range input splits over the raw tab-separated Pokec dump.
+
+Splits follow Hadoop's line record reader: a split owns every line that
+starts inside its byte range, so a reader skips the partial first line
+(unless it starts at offset 0) and reads past its end to finish the
+last line. The null sentinels of the dump ('null', empty) are read as
+missing values and the whole-number columns as numbers, so chunks look
+like the ones read from profiles.parquet.
+
+Mappers declare columns by their position in profiles.parquet
+(PARQUET_INDEX), so splits look those columns up in the TSV by name and
+label them with the Parquet position; other columns keep their TSV name.
+"""
+import csv
+import io
+import os
+from typing import List, Sequence
+import numpy as np
+import pandas as pd
+from mapreduce_framework import Mapper, plan_columns, plan_read, project_chunk
+from pokec_schema import INTEGER_TYPES, PARQUET_INDEX, TSV_COLUMNS, TSV_INDEX
+from profile_completion import NULL_SENTINELS
+
+# Default split size, matching a common HDFS block size
+SPLIT_SIZE = 128 * 1024 * 1024
+
+# Parquet position of each TSV column the in-process analyses use, and back
+PARQUET_LABELS = {TSV_INDEX[name]: position for name, position in PARQUET_INDEX.items()}
+TSV_POSITIONS = {position: index for index, position in PARQUET_LABELS.items()}
+
+# TSV positions of the whole-number columns, parsed as numbers
+NUMERIC_POSITIONS = frozenset(TSV_INDEX[name] for name in INTEGER_TYPES)
+
+def tsv_position(column: int) -> int:
+    """TSV position of the column at Parquet position ``column``."""
+    if column not in TSV_POSITIONS:
+        raise ValueError(f"Parquet column {column} has no known TSV position")
+    return TSV_POSITIONS[column]
+
+def column_label(index: int):
+    """Label of the TSV column at ``index``: its Parquet position, else its name."""
+    if index in PARQUET_LABELS:
+        return PARQUET_LABELS[index]
+    return TSV_COLUMNS[index] if index < len(TSV_COLUMNS) else f'field_{index}'
+
+class TsvSplit:
+    """Lines of a TSV file whose first byte lies in [start, stop).
+
+    Rows are labelled by the byte offset at which they start, which is
+    stable however the file is split. ``read`` holds TSV positions and
+    ``keep`` column labels (see column_label).
+    """
+
+    def __init__(self, path: str, start: int, stop: int, n_columns: int, read: List[int],
+                 keep: List[int], derived: Sequence[str] = (), filters: Sequence = ()):
+        self.path = path
+        self.start = start
+        self.stop = stop
+        self.n_columns = n_columns
+        self.read_columns = read
+        self.keep = keep
+        self.derived = list(derived)
+        self.filters = list(filters)
+
+    def read_bytes(self):
+        """(offset, bytes) of the whole lines this split owns."""
+        with open(self.path, 'rb') as f:
+            if self.start > 0:
+                # Skip to just past the newline that ends the previous split's last line
+                f.seek(self.start - 1)
+                f.readline()
+            offset = f.tell()
+            data = f.read(max(self.stop - offset, 0))
+            if data and not data.endswith(b'\n'):
+                data += f.readline()
+        return offset, data
+
+    def read(self) -> pd.DataFrame:
+        offset, data = self.read_bytes()
+        if not data:
+            empty = pd.DataFrame(columns=[column_label(i) for i in self.read_columns])
+            return project_chunk(empty, self.keep, self.derived, self.filters)
+        # index_col=False ignores the empty field after a line's trailing tab
+        chunk = pd.read_csv(io.BytesIO(data), sep='\t', header=None, dtype=str,
+                            names=range(self.n_columns), usecols=self.read_columns,
+                            index_col=False, keep_default_na=False,
+                            na_values=list(NULL_SENTINELS), quoting=csv.QUOTE_NONE,
+                            encoding='utf-8', encoding_errors='replace')
+        for column in chunk.columns:
+            if column in NUMERIC_POSITIONS:
+                chunk[column] = pd.to_numeric(chunk[column], errors='coerce')
+        newlines = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == ord('\n'))
+        starts = np.concatenate([[0], newlines + 1])[:len(chunk)]
+        chunk.index = pd.Index(offset + starts)
+        chunk.columns = [column_label(i) for i in chunk.columns]
+        return project_chunk(chunk, self.keep, self.derived, self.filters)
+
+def count_columns(path: str) -> int:
+    """Number of tab-separated fields on the first line of ``path``.
+
+    A trailing tab, as every line of the Pokec dump has, ends the last
+    field rather than starting another.
+    """
+    with open(path, 'rb') as f:
+        line = f.readline().rstrip(b'\r\n')
+    if line.endswith(b'\t'):
+        line = line[:-1]
+    return line.count(b'\t') + 1
+
+def tsv_splits(path: str, mappers: Sequence[Mapper] = (), split_size: int = SPLIT_SIZE,
+               n_columns: int = None) -> List[TsvSplit]:
+    """Byte-range input splits of a TSV file, planned from ``mappers``.
+
+    Raises ValueError if a mapper uses a Parquet column the TSV lacks.
+    """
+    columns, derived, filters = plan_columns(mappers)
+    n_columns = n_columns or count_columns(path)
+    keep, read = plan_read(n_columns, columns, derived, filters, locate=tsv_position)
+    keep = [column_label(i) for i in keep]
+    size = os.path.getsize(path)
+    return [
+        TsvSplit(path, start, min(start + split_size, size), n_columns, read, keep,
+                 derived, filters)
+        for start in range(0, size, split_size)
+    ]
@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import sys
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend
 import pandas as pd
@@ -7,6 +8,9 @@ import seaborn as sns
 import numpy as np
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from profile_completion import NULL_SENTINELS, field_completion
+
 # Create output directory for plots
 output_dir = Path(__file__).parent / 'plots'
 output_dir.mkdir(parents=True, exist_ok=True)
@@ -38,9 +42,7 @@ def read_pokec_data(sample_size=10000):
             fields = line.strip().split('\t')
             if len(fields) >= 5:
                 # Calculate completion percentage
-                total_fields = len(fields[5:])
-                non_null_fields = sum(1 for field in fields[5:] if field and field.lower() != 'null')
-                completion_percentage = (non_null_fields / total_fields * 100) if total_fields > 0 else 0
+                completion_percentage = field_completion(fields[5:], null_values=NULL_SENTINELS)
                 
                 # Extract basic fields
                 record = {